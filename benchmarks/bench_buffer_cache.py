@@ -0,0 +1,85 @@
+"""
+Cost of finding the buffer and SynthDef of a sample player note.
+
+Times what a `play` note ran before the BufferManager cached resolutions
+(`_resolve`, i.e. the SamplePackLibrary search, then the channel check of
+`_get_synth_name`), and the cached `BufferManager.resolve` over a mix of
+symbols, sample indices and a symbol without any sample.
+
+Uses a generated sample pack, or the sample packs of `--samples-dir` (e.g.
+the directory of the default pack, `~/.config/renardo/sample_packs`).
+
+Usage:
+    python benchmarks/bench_buffer_cache.py [--lookups 1000000] [--uncached 20000] [--samples-dir DIR]
+"""
+import argparse
+import itertools
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+from headless_session import Session
+
+from renardo.gatherer.sample_management.sample_pack_library import SamplePackLibrary
+from renardo.sc_backend.buffer_management import BufferManager
+
+SYMBOLS = "xo-*x-o-" + "q"  # q has no sample in the generated pack
+
+
+def lookups(count):
+    """ Returns `count` (symbol, spack, index) tuples cycling over a drum pattern """
+    keys = [(symbol, 0, index) for index in range(3) for symbol in SYMBOLS]
+    return list(itertools.islice(itertools.cycle(keys), count))
+
+
+def measure_uncached(manager, keys):
+    start = time.perf_counter()
+    for symbol, spack, index in keys:
+        buffer = manager._resolve(symbol, index)[0]
+        if buffer.bufnum:
+            synthdef = "play1" if manager.get_buffer(buffer.bufnum).channels == 1 else "play2"
+    return (time.perf_counter() - start) / len(keys)
+
+
+def measure_cached(manager, keys):
+    resolve = manager.resolve
+    start = time.perf_counter()
+    for symbol, spack, index in keys:
+        buffer, synthdef = resolve(symbol, spack, index)
+    return (time.perf_counter() - start) / len(keys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=1000000)
+    parser.add_argument("--uncached", type=int, default=20000, help="lookups timed without the cache")
+    parser.add_argument("--samples-dir", default=None)
+    args = parser.parse_args(argv)
+
+    session = Session()
+    loops = tempfile.TemporaryDirectory()
+    try:
+        manager = session.buffers
+        if args.samples_dir is not None:
+            manager = BufferManager(session.server, SamplePackLibrary(Path(args.samples_dir), []))
+        # Missing symbols are searched for in the loop paths too
+        manager._sample_library._extra_paths = [Path(loops.name)]
+
+        uncached = measure_uncached(manager, lookups(args.uncached))
+        manager.clear_cache()
+        cached = measure_cached(manager, lookups(args.lookups))
+        print("{} packs, {} keys".format(len(manager._sample_library), len(manager._resolved)))
+        print("{:>10} {:>14}".format("", "lookup (us)"))
+        print("{:>10} {:>14.3f}".format("uncached", uncached * 1e6))
+        print("{:>10} {:>14.3f}".format("cached", cached * 1e6))
+        print("{} cached lookups in {:.2f} s, speed-up x{:.0f}".format(args.lookups, cached * args.lookups, uncached / cached))
+    finally:
+        loops.cleanup()
+        session.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
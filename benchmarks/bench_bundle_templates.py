@@ -0,0 +1,68 @@
+"""
+Bundles per second of ServerManager.get_synth_bundle with bundle templates.
+
+Makes the bundles of the notes of a Player using `--effects` effects with
+templates off ("generic": every message encoded argument by argument) and
+on ("templates": the values of each note written into a copy of the
+template of its structure), and checks that both give the same bytes.
+
+Usage:
+    python benchmarks/bench_bundle_templates.py [--bundles 20000] [--effects 6] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+
+from headless_session import EFFECTS, Session
+
+
+def measure(server, packets, count, templates):
+    """ Returns the bundles made per CPU second and the binary of the first bundles """
+    server.use_bundle_templates = templates
+    server.bundle_templates = {}
+    server.node, server.bus = 1000, 4
+    first = [server.get_synth_bundle("pluck", packet, 1.0).getBinary() for packet in packets]
+    start = time.thread_time()
+    for i in range(count):
+        server.get_synth_bundle("pluck", packets[i % len(packets)], 1.0)
+    return count / (time.thread_time() - start), first
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bundles", type=int, default=20000)
+    parser.add_argument("--effects", type=int, default=6, help="effects on in each note (up to {})".format(len(EFFECTS)))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    session = Session(sink=False)
+    try:
+        effects = {name: 0.5 for name in list(EFFECTS)[:args.effects]}
+        player = session.player("p1", "pluck", [0, 2, 4, 7], dur=1/4, pan=[-1, 1], amp=[1, 0.5, 0.75], **effects)
+        server = session.server
+        packets = []
+        for n in range(24):
+            player.event_n = n
+            player._get_event()
+            packets.append(player._new_message_header(dict(player.event)))
+
+        best = {}
+        for _ in range(args.repeat):
+            for mode, templates in (("generic", False), ("templates", True)):
+                rate, first = measure(server, packets, args.bundles, templates)
+                best[mode] = max(best.get(mode, 0), rate)
+                assert best.setdefault(mode + " bytes", first) == first
+        assert best["generic bytes"] == best["templates bytes"]
+
+        print("{} bytes per bundle, {} templates".format(len(best["templates bytes"][0]), len(server.bundle_templates)))
+        print("{:>10} {:>14}".format("", "bundles/s"))
+        for mode in ("generic", "templates"):
+            print("{:>10} {:>14.0f}".format(mode, best[mode]))
+        print("speed-up: x{:.2f}".format(best["templates"] / best["generic"]))
+    finally:
+        session.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+CPU usage and timing jitter of the TempoClock scheduling modes.
+
+Runs the clock in the legacy "threads" mode (TimingThread + polling
+SchedulingThread) and in the "event" mode (scheduling thread sleeping until
+the next deadline), first idle and then with a callback scheduled every
+`--step` beats. The callback records how late it was called compared to the
+wall-clock time of its beat.
+
+Usage:
+    python benchmarks/bench_clock_modes.py [--seconds 5] [--bpm 120] [--step 0.25]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from renardo.sc_backend import ServerManager
+from renardo.lib.TempoClock import TempoClock
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def run(mode, seconds, bpm, step):
+    """ Returns (idle cpu %, busy cpu %, list of lateness values in seconds) """
+    clock = TempoClock(bpm=bpm)
+    clock.mode = mode
+    clock.start()
+
+    # Idle: nothing scheduled
+    cpu, wall = time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    idle = 100.0 * (time.process_time() - cpu) / (time.perf_counter() - wall)
+
+    # Busy: a callback every `step` beats
+    lateness = []
+
+    def tick(beat):
+        lateness.append(time.time() - clock.get_time_at_beat(beat))
+        clock.schedule(tick, beat + step, args=(beat + step,))
+
+    start = clock.next_bar()
+    clock.schedule(tick, start, args=(start,))
+    time.sleep(max(0, clock.get_time_at_beat(start) - time.time()))
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    busy = 100.0 * (time.process_time() - cpu) / (time.perf_counter() - wall)
+
+    clock.stop()
+    return idle, busy, lateness
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each measurement")
+    parser.add_argument("--bpm", type=float, default=120.0)
+    parser.add_argument("--step", type=float, default=0.25, help="beats between two events")
+    parser.add_argument("--modes", nargs="+", default=["threads", "event"])
+    args = parser.parse_args(argv)
+
+    TempoClock.set_server(ServerManager("127.0.0.1", 0, 0))
+
+    print("{:>8} {:>10} {:>10} {:>8} {:>10} {:>10} {:>10}".format(
+        "mode", "idle cpu%", "busy cpu%", "events", "p50 (ms)", "p99 (ms)", "max (ms)"))
+    for mode in args.modes:
+        idle, busy, lateness = run(mode, args.seconds, args.bpm, args.step)
+        print("{:>8} {:>10.1f} {:>10.1f} {:>8} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+            mode, idle, busy, len(lateness),
+            percentile(lateness, 50) * 1000, percentile(lateness, 99) * 1000,
+            max(lateness) * 1000 if lateness else float("nan")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
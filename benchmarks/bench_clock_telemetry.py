@@ -0,0 +1,71 @@
+"""
+Cost of the TempoClock timing telemetry.
+
+Runs the same QueueBlocks through the clock with `Clock.stats()` recording
+disabled and enabled and prints the extra cost per scheduled item.
+
+Usage:
+    python benchmarks/bench_clock_telemetry.py [--blocks 20000] [--items 8]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from renardo.sc_backend import ServerManager
+from renardo.lib.TempoClock import TempoClock
+from renardo.lib.TempoClock.scheduling_queue import QueueBlock
+
+
+def _event():
+    return None
+
+
+def run(clock, blocks, items):
+    """ Returns the time in seconds to run `blocks` blocks of `items` items """
+    queue = clock.scheduling_queue
+    funcs = [lambda: None for _ in range(items)]
+    todo = []
+    for n in range(blocks):
+        block = QueueBlock(queue, funcs[0], n)
+        for func in funcs[1:]:
+            block.add(func)
+        todo.append(block)
+    run_block = clock._TempoClock__run_block
+    start = time.perf_counter()
+    for block in todo:
+        run_block(block, block.beat)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=8, help="items per block")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    TempoClock.set_server(ServerManager("127.0.0.1", 0, 0))
+    clock = TempoClock()
+    events = args.blocks * args.items
+
+    best = {}
+    for _ in range(args.repeat):
+        for enabled in (False, True):
+            clock.enable_stats(enabled)
+            elapsed = run(clock, args.blocks, args.items)
+            best[enabled] = min(best.get(enabled, elapsed), elapsed)
+
+    print("{:>10} {:>12} {:>12}".format("telemetry", "total (s)", "us/event"))
+    for enabled in (False, True):
+        print("{:>10} {:>12.4f} {:>12.3f}".format(
+            "on" if enabled else "off", best[enabled], best[enabled] * 1e6 / events))
+    print("overhead: {:.3f} us/event".format((best[True] - best[False]) * 1e6 / events))
+    clock.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
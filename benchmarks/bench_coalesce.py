@@ -0,0 +1,83 @@
+"""
+Datagrams sent per clock block with and without OSC bundle coalescing.
+
+Renders the notes of `--players` Players into one QueueBlock (a bundle per
+note, all with the same time tag) and sends the block `--blocks` times to a
+local UDP sink, with `sc_backend.OSC_COALESCE_BUNDLES` off ("separate": one
+datagram per bundle) and on (the bundles nested into as few datagrams of
+each `--mtu` bytes as they fit in). Reports the send syscalls per block and
+per second, the CPU time of a block, and what the sink (standing in for
+scsynth) received: datagrams sent faster than it reads them are dropped.
+
+A note's bundle is 500 to 1000 bytes, so an Ethernet MTU of 1500 only
+nests a couple of them. scsynth usually runs on the same machine, where the
+loopback interface takes datagrams of up to 64KB.
+
+Usage:
+    python benchmarks/bench_coalesce.py [--players 16] [--blocks 2000] [--mtu 1500 9000 65535] [--effects 2]
+"""
+import argparse
+import sys
+import time
+
+from headless_session import EFFECTS, Session
+
+from renardo.lib.TempoClock import QueueBlock
+from renardo.settings_manager import settings
+
+
+def measure(session, block, count):
+    """ Sends `block` `count` times, returns the sendOSC calls and the CPU and wall time """
+    session.sink.reset()
+    session.sent = 0
+    wall, cpu = time.perf_counter(), time.thread_time()
+    for _ in range(count):
+        block.send_osc_messages()
+    cpu, wall = time.thread_time() - cpu, time.perf_counter() - wall
+    time.sleep(0.2)  # let the sink receive the last datagrams
+    return session.sent, cpu, wall
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=16)
+    parser.add_argument("--blocks", type=int, default=2000)
+    parser.add_argument("--mtu", type=int, nargs="+", default=[1500, 9000, 65535])
+    parser.add_argument("--effects", type=int, default=2, help="effects on in each note (up to {})".format(len(EFFECTS)))
+    args = parser.parse_args(argv)
+
+    keys = ("sc_backend.OSC_COALESCE_BUNDLES", "sc_backend.OSC_MTU")
+    previous = {key: settings.get(key) for key in keys}
+    session = Session(sink=True)
+    try:
+        effects = {name: 0.5 for name in list(EFFECTS)[:args.effects]}
+        block = QueueBlock(session.clock.scheduling_queue, lambda: None, 0)
+        timestamp = session.clock.get_time() + 3600
+        for i in range(args.players):
+            player = session.player("p{}".format(i), "pluck", [0, 2, 4], dur=1/4, **effects)
+            player.set_queue_block(block)
+            player._get_event()
+            player._send_osc_messages_to_server(timestamp=timestamp)
+        size = sum(len(bundle.getBinary()) for bundle in block.osc_messages)
+
+        print("{} bundles, {} bytes per block".format(len(block.osc_messages), size))
+        print("{:>12} {:>12} {:>10} {:>11} {:>15} {:>12}".format(
+            "", "sends/block", "sends/s", "CPU/block", "received/block", "bytes/block"))
+        runs = [("separate", False, args.mtu[0])] + [("MTU {}".format(mtu), True, mtu) for mtu in args.mtu]
+        for mode, coalesce, mtu in runs:
+            settings.set("sc_backend.OSC_COALESCE_BUNDLES", coalesce)
+            settings.set("sc_backend.OSC_MTU", mtu)
+            sent, cpu, wall = measure(session, block, args.blocks)
+            sink = session.sink
+            print("{:>12} {:>12.1f} {:>10.0f} {:>9.1f}us {:>15.1f} {:>12.0f}".format(
+                mode, sent / args.blocks, sent / wall, 1e6 * cpu / args.blocks,
+                sink.datagrams / args.blocks, sink.bytes / args.blocks))
+    finally:
+        session.close()
+        for key, value in previous.items():
+            settings.set(key, value)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
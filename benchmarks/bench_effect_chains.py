@@ -0,0 +1,110 @@
+"""
+CPU cost of the effect nodes of a note's bundle with a large effect library.
+
+Adds `--effects` extra effects to the headless session (as many as a full
+effect library) and times building the effect messages of the bundles of a
+Player using two of them:
+
+- "before": every effect of every order is checked against the packet and
+  its arguments looked up for each note, as it was done before effect chains
+- "all effects": the cached effect chain, checking every effect keyword
+- "player": the cached effect chain, checking only the effects that the
+  Player's event plan doesn't hold at 0, as the output backend does
+
+The time of a whole `ServerManager.get_synth_bundle` is printed for reference.
+
+Usage:
+    python benchmarks/bench_effect_chains.py [--effects 60] [--notes 5000] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+
+from headless_session import Session
+
+from renardo.lib.Player import Player
+from renardo.sc_backend import SCEffect
+from renardo.sc_backend.custom_osc_lib import OSCMessage
+
+
+def reference_effect_nodes(server, order, node, bus, group_id, packet):
+    """ The effect nodes of one order as they were built before effect chains """
+    pkg = []
+    for fx in server.fxlist.order[order]:
+        if fx in packet and packet[fx] != 0:
+            this_effect = server.prepare_effect(fx, packet)
+            node = server.nextnodeID()
+            msg = OSCMessage("/s_new")
+            msg.append([server.fx_names[fx], node, 1, group_id, 'bus', bus] + this_effect)
+            pkg.append(msg)
+    return pkg, node
+
+
+def measure(count, notes, mode):
+    """ Returns the CPU time per bundle of the effect nodes, and of the whole bundle """
+    session = Session(sink=False)
+    try:
+        for i in range(count):
+            name = "fx{}".format(i)
+            session.fx.new(SCEffect(name, "", fullname="Effect{}".format(i),
+                                    arguments={name: 0, name + "mix": 0.5}, order=i % 3))
+        session.server.setFx(session.fx)
+        Player.set_effect_manager(session.fx)
+        player = session.player("p1", "pluck", [0, 2, 4], dur=1/4, lpf=800, room=0.5)
+        server = session.server
+
+        packets = []
+        for n in range(16):
+            player.event_n = n
+            player._get_event()
+            packets.append(player._new_message_header(dict(player.event)))
+        effects = player._get_active_effects() if mode == "player" else None
+
+        start = time.thread_time()
+        if mode == "before":
+            for n in range(notes):
+                for order in range(3):
+                    reference_effect_nodes(server, order, 1001, 4, 1000, packets[n % 16])
+        else:
+            for n in range(notes):
+                packet = packets[n % 16]
+                chain = server.get_effect_chain(packet, effects)
+                for order in range(3):
+                    server.get_effect_nodes(chain[order], 1001, 4, 1000, packet)
+        nodes = (time.thread_time() - start) / notes
+
+        start = time.thread_time()
+        for n in range(notes // 10):
+            server.get_synth_bundle("pluck", packets[n % 16], timestamp=0, effects=effects)
+        bundle = (time.thread_time() - start) / (notes // 10)
+        return nodes, bundle
+    finally:
+        session.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--effects", type=int, default=60)
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    modes = ("before", "all effects", "player")
+    best = {}
+    for _ in range(args.repeat):
+        for mode in modes:
+            nodes, bundle = measure(args.effects, args.notes, mode)
+            old = best.get(mode, (nodes, bundle))
+            best[mode] = (min(old[0], nodes), min(old[1], bundle))
+    print("{} effects".format(args.effects + 8))
+    print("{:>12} {:>18} {:>18}".format("", "effect nodes (us)", "get_synth_bundle (us)"))
+    for mode in modes:
+        nodes, bundle = best[mode]
+        print("{:>12} {:>18.2f} {:>18}".format(mode, nodes * 1e6, "-" if mode == "before" else "{:.2f}".format(bundle * 1e6)))
+    print("effect nodes speed-up: x{:.2f} (all effects), x{:.2f} (player)".format(
+        best["before"][0] / best["all effects"][0], best["before"][0] / best["player"][0]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
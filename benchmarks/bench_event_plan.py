@@ -0,0 +1,71 @@
+"""
+Per-note cost of a Player with and without its compiled event plan.
+
+Plays `p1 >> pluck([0, 2, 4], dur=1/4, lpf=800, room=0.5)` on a simulated
+clock and prints the CPU time per note spent building the event
+(`Player._get_event`) and in total (event, OSC messages and scheduling) when
+every attribute is evaluated for each note ("before") and when the
+Player's EventPlan is used ("after").
+
+Usage:
+    python benchmarks/bench_event_plan.py [--notes 4000] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+
+from headless_session import Session
+
+from renardo.lib.Player import Player
+from renardo.lib.TempoClock.time_source import SimulatedTimeSource
+
+
+def measure(notes, plan):
+    """ Returns the CPU time per note of `_get_event` and of a whole note """
+    Player.use_event_plan = plan
+    session = Session(time_source=SimulatedTimeSource(start=time.time()))
+    try:
+        session.clock.set_time(0)
+        player = session.player("p1", "pluck", [0, 2, 4], dur=1/4, lpf=800, room=0.5)
+
+        start = time.thread_time()
+        for n in range(notes):
+            player.event_n = n
+            player._get_event()
+        event = (time.thread_time() - start) / notes
+
+        session.clock.step(4)  # the player starts on the next bar
+        played = player.notes_played
+        start = time.thread_time()
+        session.clock.step(notes / 4)
+        total = (time.thread_time() - start) / (player.notes_played - played)
+    finally:
+        session.close()
+        Player.use_event_plan = True
+    return event, total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    best = {}
+    for _ in range(args.repeat):
+        for plan in (False, True):
+            event, total = measure(args.notes, plan)
+            old = best.get(plan, (event, total))
+            best[plan] = (min(old[0], event), min(old[1], total))
+
+    print("{:>8} {:>16} {:>16}".format("", "_get_event (us)", "per note (us)"))
+    for plan, label in ((False, "before"), (True, "after")):
+        event, total = best[plan]
+        print("{:>8} {:>16.2f} {:>16.2f}".format(label, event * 1e6, total * 1e6))
+    print("speed-up: _get_event x{:.1f}, per note x{:.2f}".format(
+        best[False][0] / best[True][0], best[False][1] / best[True][1]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Node IDs and private buses of notes, before and after the allocators.
+
+- "nodes": `--threads` threads getting `--ids` node IDs each, from a shared
+  counter incremented without a lock as `ServerManager.nextnodeID` did
+  ("before"), and from a `NodeIDAllocator` ("after"). Reports the IDs got
+  per second and how many were handed out twice.
+- "buses": `--players` Players each playing a note every `--dur` seconds
+  for `--sus` seconds, one in `--long-every` for `--long-sus` seconds (their
+  groups living up to `sus * 8 + 0.1` seconds, see makeSound.scd), on
+  `--buses` buses given in turn as
+  `ServerManager.nextbusID` did ("before") and by a `BusPool` ("after").
+  Reports the notes given a bus still used by a playing note, and the
+  pool's stats: when more notes play than there are buses, the pool is
+  exhausted and has to share buses too.
+
+Usage:
+    python benchmarks/bench_node_allocator.py [--threads 8] [--ids 200000] [--players 16] [--dur 0.125] [--sus 0.25]
+        [--long-every 4] [--long-sus 1] [--buses 510]
+"""
+import argparse
+import sys
+import threading
+import time
+
+import headless_session  # noqa: F401, puts src on sys.path
+
+from renardo.sc_backend.node_allocator import BusPool, NodeIDAllocator
+
+
+class Counter:
+    """ The node IDs of ServerManager before the allocator """
+
+    def __init__(self, start=1000):
+        self.node = start
+
+    def next(self):
+        self.node += 1
+        return self.node
+
+
+def node_ids(next_id, threads, count):
+    """ Returns the IDs got per second by `threads` threads calling next_id `count` times each,
+        and the number of duplicate IDs """
+    got = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def run(ids):
+        append = ids.append
+        barrier.wait()
+        for _ in range(count):
+            append(next_id())
+
+    workers = [threading.Thread(target=run, args=(ids,)) for ids in got]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    every = [node for ids in got for node in ids]
+    return len(every) / elapsed, len(every) - len(set(every))
+
+
+def notes(args, seconds=60):
+    """ Yields the (start, release) times of the notes of the Players, in time order """
+    for n in range(int(seconds / args.dur)):
+        for player in range(args.players):
+            start = n * args.dur + player * 0.001
+            sus = args.long_sus if player % args.long_every == 0 else args.sus
+            yield start, start + sus * 8 + 0.1
+
+
+def shared_buses(allocate, args):
+    """ Returns the number of notes and of notes given a bus still used by another note """
+    releases = {}
+    shared = count = 0
+    for group, (start, release) in enumerate(notes(args)):
+        bus = allocate(start, release, group)
+        shared += releases.get(bus, 0) > start
+        releases[bus] = release
+        count += 1
+    return count, shared
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ids", type=int, default=200000, help="node IDs per thread")
+    parser.add_argument("--players", type=int, default=16)
+    parser.add_argument("--dur", type=float, default=0.125, help="seconds between the notes of a Player")
+    parser.add_argument("--sus", type=float, default=0.25, help="sus of the notes in seconds")
+    parser.add_argument("--long-every", type=int, default=4, help="one Player in N plays long notes")
+    parser.add_argument("--long-sus", type=float, default=1.0, help="sus of the long notes in seconds")
+    parser.add_argument("--buses", type=int, default=510, help="2-channel buses (510 with scsynth's default 1024 channels)")
+    args = parser.parse_args(argv)
+
+    switch = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)  # switch threads often, as busy block workers do
+    try:
+        print("{:>8} {:>14} {:>12}".format("nodes", "IDs/s", "duplicates"))
+        for version, next_id in (("before", Counter().next), ("after", NodeIDAllocator().next)):
+            rate, duplicates = node_ids(next_id, args.threads, args.ids)
+            print("{:>8} {:>14.0f} {:>12}".format(version, rate, duplicates))
+    finally:
+        sys.setswitchinterval(switch)
+
+    first, end = 4, 4 + 2 * args.buses + 1
+    old = {"bus": first}
+
+    def next_bus(start, release, group):
+        old["bus"] += 2
+        if old["bus"] + 1 >= end:
+            old["bus"] = first
+        return old["bus"]
+
+    pool = BusPool(first, end)
+    print()
+    print("{:>8} {:>10} {:>14}".format("buses", "notes", "shared buses"))
+    for version, allocate in (("before", next_bus), ("after", pool.allocate)):
+        count, shared = shared_buses(allocate, args)
+        print("{:>8} {:>10} {:>14}".format(version, count, shared))
+    stats = pool.stats(now=0)
+    print("pool: {buses} buses, peak {peak} in use, exhausted {exhausted} times".format(**stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Bundles per second of the OSC encoder against OSCMessage / OSCBundle.
+
+Takes the messages of the notes of a Player using `--effects` effects (a
+dozen `/s_new` messages with tens of arguments each) and times:
+
+- "encode": encoding the same messages with `OSCMessage.append` and
+  `OSCBundle.append` ("before"), and with an `OSCEncoder` ("after")
+- "note": a whole note's bundle, node IDs and arguments included, as it was
+  built before the encoder ("before") and by `ServerManager.get_synth_bundle`
+  ("after")
+- "send": sending the bundles to a UDP sink with `OSCClient.send`, which
+  encodes an OSCBundle ("before") and gives an EncodedBundle's buffer to the
+  socket ("after")
+
+Usage:
+    python benchmarks/bench_osc_encoder.py [--bundles 20000] [--effects 6] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+
+from headless_session import EFFECTS, Session
+
+from renardo.sc_backend.custom_osc_lib import OSCBundle, OSCMessage
+from renardo.sc_backend.osc_encoder import OSCEncoder
+
+
+def reference_bundle(messages, timestamp):
+    bundle = OSCBundle(time=timestamp)
+    for address, args in messages:
+        msg = OSCMessage(address)
+        msg.append(args)
+        bundle.append(msg)
+    return bundle
+
+
+def encoded_bundle(encoder, messages, timestamp):
+    for address, args in messages:
+        encoder.add_message(address, args)
+    return encoder.bundle(timestamp)
+
+
+def reference_synth_bundle(server, synthdef, packet, timestamp):
+    """ ServerManager.get_synth_bundle before the encoder """
+    bundle = OSCBundle(time=timestamp)
+    synthdef = server.synthdefs[synthdef]
+    chain = server.get_effect_chain(packet)
+    group_id = server.nextnodeID()
+    msg = OSCMessage("/g_new")
+    msg.append([group_id, 1, 1])
+    bundle.append(msg)
+    this_bus = server.nextbusID()
+    this_node = server.nextnodeID()
+    msg, this_node = server.get_init_node(this_node, this_bus, group_id, synthdef, packet)
+    bundle.append(msg)
+    for order in range(3):
+        if order == 1:
+            msg, this_node = server.get_synth_node(this_node, this_bus, group_id, synthdef, packet)
+            bundle.append(msg)
+        pkg, this_node = server.get_effect_nodes(chain[order], this_node, this_bus, group_id, packet)
+        for msg in pkg:
+            bundle.append(msg)
+    msg, _ = server.get_exit_node(this_node, this_bus, group_id, packet)
+    bundle.append(msg)
+    return bundle
+
+
+def rate(function, count):
+    """ Returns the calls of function(i) per CPU second """
+    start = time.thread_time()
+    for i in range(count):
+        function(i)
+    return count / (time.thread_time() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bundles", type=int, default=20000)
+    parser.add_argument("--effects", type=int, default=6, help="effects on in each note (up to {})".format(len(EFFECTS)))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    session = Session(sink=True)
+    try:
+        effects = {name: 0.5 for name in list(EFFECTS)[:args.effects]}
+        player = session.player("p1", "pluck", [0, 2, 4, 7], dur=1/4, pan=[-1, 1], **effects)
+        server = session.server
+        packets, notes = [], []
+        for n in range(16):
+            player.event_n = n
+            player._get_event()
+            packets.append(player._new_message_header(dict(player.event)))
+            bundle = reference_synth_bundle(server, "pluck", packets[-1], 0)
+            notes.append([(msg.address, list(msg.values())) for msg in bundle.values()])
+        timestamp = time.time() + 3600
+        encoder = OSCEncoder()
+        old = [reference_bundle(notes[n], timestamp) for n in range(16)]
+        new = [encoded_bundle(encoder, notes[n], timestamp) for n in range(16)]
+        assert [bundle.getBinary() for bundle in old] == [bundle.getBinary() for bundle in new]
+        client = server.client
+
+        runs = {
+            "encode": (lambda i: reference_bundle(notes[i % 16], timestamp),
+                       lambda i: encoded_bundle(encoder, notes[i % 16], timestamp)),
+            "note": (lambda i: reference_synth_bundle(server, "pluck", packets[i % 16], timestamp),
+                     lambda i: server.get_synth_bundle("pluck", packets[i % 16], timestamp)),
+            "send": (lambda i: client.send(old[i % 16]),
+                     lambda i: client.send(new[i % 16])),
+        }
+        best = {}
+        for _ in range(args.repeat):
+            for name, functions in runs.items():
+                for version, function in zip(("before", "after"), functions):
+                    best[name, version] = max(best.get((name, version), 0), rate(function, args.bundles))
+
+        print("{} messages, {} bytes per bundle".format(len(notes[0]), len(new[0].getBinary())))
+        print("{:>8} {:>16} {:>16} {:>9}".format("", "before (/s)", "after (/s)", "speed-up"))
+        for name in runs:
+            before, after = best[name, "before"], best[name, "after"]
+            print("{:>8} {:>16.0f} {:>16.0f} {:>8.2f}x".format(name, before, after, after / before))
+    finally:
+        session.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Status queries per second, one at a time and concurrently.
+
+A stub scsynth replies to /status after `--latency` milliseconds. Sends
+`--queries` /status queries with a BidirectionalOSCServer, waiting for each
+reply with `receive` before the next query as `ServerManager.getInfo` did
+("blocking"), then `--concurrency` at a time from an OSCTransport
+("asyncio"), their replies being correlated by the transport.
+
+Usage:
+    python benchmarks/bench_osc_transport.py [--queries 200] [--latency 5] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+
+import headless_session  # noqa: F401, puts src on sys.path
+
+from renardo.sc_backend.custom_osc_lib import OSCMessage, decodeOSC
+from renardo.sc_backend.osc_transport import OSCTransport
+from renardo.sc_backend.server_manager import BidirectionalOSCServer
+
+
+class StubServer:
+    """Replies to /status with /status.reply after `latency` seconds"""
+
+    def __init__(self, latency):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.settimeout(0.05)
+        self.address = self.socket.getsockname()
+        self.latency = latency
+        reply = OSCMessage("/status.reply")
+        reply.append([1, 20, 4, 5, 120, 1.5, 3.0, 48000.0, 47999.5])
+        self.reply = reply.getBinary()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            try:
+                data, remote = self.socket.recvfrom(65536)
+            except socket.timeout:
+                continue
+            if decodeOSC(data)[0] == "/status":
+                threading.Timer(self.latency, self.socket.sendto, (self.reply, remote)).start()
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        self.socket.close()
+
+
+def blocking(stub, count):
+    client = BidirectionalOSCServer(("127.0.0.1", 0))
+    client.connect(stub.address)
+    try:
+        start = time.perf_counter()
+        for _ in range(count):
+            client.send(OSCMessage("/status"))
+            client.receive("/status.reply")
+        return time.perf_counter() - start
+    finally:
+        client.stop()
+
+
+def concurrent(stub, count, concurrency):
+    transport = OSCTransport()
+    osc = transport.osc
+
+    async def queries():
+        limit = asyncio.Semaphore(concurrency)
+
+        async def query():
+            async with limit:
+                return await osc.query_status(stub.address)
+
+        return await asyncio.gather(*(query() for _ in range(count)))
+
+    try:
+        start = time.perf_counter()
+        replies = transport.call(queries())
+        assert len(replies) == count
+        return time.perf_counter() - start
+    finally:
+        transport.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=5, help="reply latency of the stub server in ms")
+    parser.add_argument("--concurrency", type=int, default=20, help="queries in flight at the same time")
+    args = parser.parse_args(argv)
+
+    stub = StubServer(args.latency / 1000)
+    try:
+        results = {
+            "blocking": blocking(stub, args.queries),
+            "asyncio": concurrent(stub, args.queries, args.concurrency),
+        }
+    finally:
+        stub.close()
+    print("{} queries, {}ms latency".format(args.queries, args.latency))
+    print("{:>9} {:>10} {:>11}".format("", "seconds", "queries/s"))
+    for name, elapsed in results.items():
+        print("{:>9} {:>10.3f} {:>11.0f}".format(name, elapsed, args.queries / elapsed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
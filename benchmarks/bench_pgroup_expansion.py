@@ -0,0 +1,94 @@
+"""
+CPU cost per chord of the PGroup expansion in Player._send_osc_message.
+
+For a few chord shapes, times `Player._send_osc_messages_to_server` with the
+recursive expansion used before ("before") and the current iterative one
+("after"), once with `_push_osc_to_server` replaced by a no-op (expansion
+only) and once with the OSC bundles compiled for each note (whole chord).
+
+Usage:
+    python benchmarks/bench_pgroup_expansion.py [--chords 2000] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+
+from headless_session import Session
+
+from renardo.lib.Patterns import P, PGroup
+from renardo.lib.TempoClock.scheduling_queue import QueueBlock
+
+SHAPES = {
+    "triad": {"degree": P(0, 2, 4)},
+    "4 notes, 2 amps": {"degree": P(0, 2, 4, 6), "amp": P(1, 0.5)},
+    "nested": {"degree": P(0, P(2, 4), P(5, P(7, 9))), "pan": P(-1, 1)},
+}
+
+
+def recursive_send_osc_message(self, event, index, timestamp=None, verbose=True, **kwargs):
+    """ The recursive implementation used before the iterative expansion """
+    packet = {}
+    event = event.copy()
+    event.update(kwargs)
+    for key, value in event.items():
+        if isinstance(value, PGroup):
+            new_event = {}
+            for new_key, new_value in event.items():
+                if isinstance(new_value, PGroup):
+                    new_event[new_key] = new_value[index]
+                else:
+                    new_event[new_key] = new_value
+            for i in range(self._get_event_length(new_event)):
+                recursive_send_osc_message(self, new_event, i, timestamp, verbose)
+            return None
+        else:
+            packet[key] = value
+    if ("amp" in packet) and ("amplify" in packet):
+        packet["amp"] = packet["amp"] * packet["amplify"]
+    self._push_osc_to_server(packet, timestamp, verbose, **kwargs)
+    return None
+
+
+def measure(session, player, shape, chords, recursive, push):
+    """ Returns the CPU time per chord """
+    if recursive:
+        player.__dict__["_send_osc_message"] = lambda *args, **kwargs: recursive_send_osc_message(player, *args, **kwargs)
+    if not push:
+        player.__dict__["_push_osc_to_server"] = lambda *args, **kwargs: None
+    player.event = dict(player.event, **shape)
+    block = QueueBlock(session.clock.scheduling_queue, lambda: None, 0)
+    player.set_queue_block(block)
+    start = time.thread_time()
+    for _ in range(chords):
+        player._send_osc_messages_to_server(timestamp=session.clock.get_time() + 1)
+        block.osc_messages.clear()
+    elapsed = (time.thread_time() - start) / chords
+    player.__dict__.pop("_send_osc_message", None)
+    player.__dict__.pop("_push_osc_to_server", None)
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chords", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    session = Session()
+    player = session.player("p1", "pluck", 0, lpf=800, room=0.5)
+    player._get_event()
+
+    print("{:>18} {:>8} {:>16} {:>16} {:>8}".format("shape", "notes", "before (us)", "after (us)", "speed-up"))
+    for push in (False, True):
+        print("expansion only" if not push else "whole chord (OSC bundles compiled)")
+        for name, shape in SHAPES.items():
+            before = min(measure(session, player, shape, args.chords, True, push) for _ in range(args.repeat))
+            after = min(measure(session, player, shape, args.chords, False, push) for _ in range(args.repeat))
+            print("{:>18} {:>8} {:>16.2f} {:>16.2f} {:>7.2f}x".format(
+                name, player._get_event_length(), before * 1e6, after * 1e6, before / after))
+    session.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Overhead of the per-player profiling counters.
+
+Times the notes of a few Players (evaluating the event, building the
+messages and bundles and adding them to a QueueBlock, as `Player.__call__`
+does) with stats disabled, i.e. what a note cost before profiling was added
+plus one attribute check per phase, and with stats enabled. Then prints the
+`Clock.top()` table of the enabled run.
+
+Usage:
+    python benchmarks/bench_player_stats.py [--notes 5000] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+
+from headless_session import Session
+
+from renardo.lib.TempoClock.scheduling_queue import QueueBlock
+
+
+def play(session, players, notes):
+    """ Returns the CPU time per note of `notes` notes of each Player """
+    clock = session.clock
+    # Far enough ahead for the QueueBlocks to keep every bundle
+    timestamp = clock.get_time() + 3600
+    start = time.thread_time()
+    for player in players:
+        for n in range(notes):
+            if n % 64 == 0:
+                player.set_queue_block(QueueBlock(clock.scheduling_queue, lambda: None, 0))
+            player.event_n = n
+            player._get_event()
+            player._send_osc_messages_to_server(timestamp=timestamp)
+    return (time.thread_time() - start) / (notes * len(players))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    session = Session(sink=False)
+    try:
+        players = [
+            session.player("p1", "pluck", [0, 2, 4, (0, 2)], dur=[1, 1/2], lpf=800, room=0.5),
+            session.player("p2", "blip", [0, 1, 2], dur=1/4, oct=(4, 5), pan=[-1, 1]),
+            session.player("p3", "pluck", [0, 4], dur=[1/2, 1/4], chop=2, echo=0.25),
+        ]
+        best = {}
+        for _ in range(args.repeat):
+            for enabled in (False, True):
+                for player in players:
+                    player.enable_stats(enabled)
+                note = play(session, players, args.notes)
+                best[enabled] = min(best.get(enabled, note), note)
+
+        print("{:>10} {:>14}".format("", "note (us)"))
+        print("{:>10} {:>14.2f}".format("disabled", best[False] * 1e6))
+        print("{:>10} {:>14.2f}".format("enabled", best[True] * 1e6))
+        print("overhead when enabled: {:+.1f}%".format((best[True] / best[False] - 1) * 100))
+        print()
+        session.clock.top()
+    finally:
+        session.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
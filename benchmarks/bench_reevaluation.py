@@ -0,0 +1,107 @@
+"""
+Cost of re-evaluating a buffer of 40 playing Players.
+
+Starts 40 Players from lines like `p1 >> pluck([0, 2, 4], dur=[1, 1/2], ...)`
+and times evaluating all the lines again, as a live coder does, when every
+attribute is set again ("before") and when attributes set to the same values
+as the last time are skipped ("after"). Also times the buffer with one
+argument changed in every line, and prints how many attributes were skipped.
+
+Usage:
+    python benchmarks/bench_reevaluation.py [--players 40] [--number 50] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+
+from headless_session import Session
+
+from renardo.lib.Patterns import P
+from renardo.lib.Player import Player
+from renardo.lib.TimeVar import var
+
+
+def line(n, changed=False):
+    """ Returns the instrument, arguments and keyword arguments of the nth line of the buffer """
+    if n % 4 == 3:
+        return "play", ("x-o-" if n % 8 == 3 else "(xo)--[--]",), {
+            "dur": 1/2, "amp": [1, 0.5] if changed else [1, 0.75], "sample": n % 3, "room": 0.25,
+        }
+    kwargs = {
+        "dur": [1, 1/2, 1/2] if n % 2 else P*(1/2, 1/4),
+        "amp": 0.5 if changed else 0.8,
+        "oct": (4, 5) if n % 3 else 5,
+        "pan": [-1, 0, 1],
+        "lpf": var([800, 2000], 4) if n % 5 == 0 else 1200,
+        "sus": 2,
+        "echo": 0.25,
+        "chop": [0, 2],
+    }
+    return "pluck" if n % 2 else "blip", ([0, 2, 4, (0, 3)],), kwargs
+
+
+def evaluate(session, players, changed=False):
+    """ Runs every line of the buffer once """
+    for n, player in enumerate(players):
+        instrument, args, kwargs = line(n, changed and n % 2 == 0)
+        player >> session.instruments[instrument](*args, **kwargs)
+
+
+def measure(count, number, compare):
+    """ Returns the time to re-evaluate the buffer unchanged and changed, and the skipped attributes """
+    session = Session(sink=False)
+    try:
+        players = [Player("p{}".format(n)) for n in range(count)]
+        session.players.extend(players)
+        if not compare:
+            for player in players:
+                player.__dict__["update_attr"] = (
+                    lambda name, value, compare=True, player=player: Player.update_attr(player, name, value, False)
+                )
+        evaluate(session, players)
+
+        start = time.perf_counter()
+        for _ in range(number):
+            evaluate(session, players)
+        same = (time.perf_counter() - start) / number
+        skipped_same = sum(player.skipped_attributes for player in players)
+
+        start = time.perf_counter()
+        for i in range(number):
+            evaluate(session, players, changed=i % 2 == 0)
+        changed = (time.perf_counter() - start) / number
+        evaluate(session, players)
+        evaluate(session, players, changed=True)
+        skipped_changed = sum(player.skipped_attributes for player in players)
+    finally:
+        session.close()
+    return same, changed, skipped_same, skipped_changed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=40)
+    parser.add_argument("--number", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    best = {}
+    for _ in range(args.repeat):
+        for compare in (False, True):
+            same, changed, skipped_same, skipped_changed = measure(args.players, args.number, compare)
+            old = best.get(compare, (same, changed))
+            best[compare] = (min(old[0], same), min(old[1], changed), skipped_same, skipped_changed)
+
+    print("{:>8} {:>16} {:>16} {:>14} {:>14}".format(
+        "", "unchanged (ms)", "changed (ms)", "skipped", "skipped"))
+    for compare, label in ((False, "before"), (True, "after")):
+        same, changed, skipped_same, skipped_changed = best[compare]
+        print("{:>8} {:>16.2f} {:>16.2f} {:>14} {:>14}".format(
+            label, same * 1e3, changed * 1e3, skipped_same, skipped_changed))
+    print("speed-up: unchanged x{:.2f}, changed x{:.2f}".format(
+        best[False][0] / best[True][0], best[False][1] / best[True][1]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Micro-benchmark for the TempoClock SchedulingQueue.
+
+Schedules N events at random beats into the heap based `SchedulingQueue` and
+into a copy of the previous list based implementation, then drains both queues.
+
+Usage:
+    python benchmarks/bench_scheduling_queue.py [-n 10000 100000] [--beats 512]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from renardo.lib.TempoClock.scheduling_queue import SchedulingQueue, QueueBlock
+
+
+class ListSchedulingQueue(SchedulingQueue):
+    """ The previous list based queue (sorted with the next block last), kept for comparison """
+
+    def __init__(self, clock):
+        SchedulingQueue.__init__(self, clock)
+        self.list_data = []
+
+    def __len__(self):
+        return len(self.list_data)
+
+    def add(self, item, beat, args=(), kwargs={}, is_priority=False):
+        if self.before_next_event(beat):
+            self.list_data.append(QueueBlock(self, item, beat, args, kwargs, is_priority))
+        else:
+            for block in self.list_data:
+                if beat == block.beat:
+                    block.add(item, args, kwargs, is_priority)
+                    break
+                if beat > block.beat:
+                    try:
+                        i = self.list_data.index(block)
+                    except ValueError:
+                        i = 0
+                    self.list_data.insert(i, QueueBlock(self, item, beat, args, kwargs, is_priority))
+                    break
+
+    def pop(self):
+        return self.list_data.pop() if len(self.list_data) > 0 else list()
+
+    def before_next_event(self, beat):
+        try:
+            return beat < self.list_data[-1].beat
+        except IndexError:
+            return True
+
+    def after_next_event(self, beat):
+        try:
+            return beat >= self.list_data[-1].beat
+        except IndexError:
+            return False
+
+
+class _StubClock:
+    server = None
+
+
+def _event():
+    return None
+
+
+def run(queue_class, beats):
+    """ Returns (schedule time, drain time) in seconds for scheduling `beats` """
+    queue = queue_class(_StubClock())
+    start = time.perf_counter()
+    for beat in beats:
+        queue.add(_event, beat)
+    scheduled = time.perf_counter()
+    while len(queue):
+        queue.pop()
+    drained = time.perf_counter()
+    return scheduled - start, drained - scheduled
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", type=int, nargs="+", default=[10000, 100000], help="number of events to schedule")
+    parser.add_argument("--beats", type=float, default=512, help="range of random beats (in beats)")
+    parser.add_argument("--resolution", type=int, default=16, help="subdivisions per beat")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-list", action="store_true", help="don't run the legacy list queue")
+    args = parser.parse_args(argv)
+
+    print("{:>8} {:>10} {:>14} {:>14} {:>10}".format("events", "queue", "schedule (s)", "drain (s)", "us/event"))
+    for n in args.n:
+        rng = random.Random(args.seed)
+        beats = [rng.randrange(int(args.beats * args.resolution)) / args.resolution for _ in range(n)]
+        queues = [("heap", SchedulingQueue)]
+        if not args.skip_list:
+            queues.append(("list", ListSchedulingQueue))
+        for name, queue_class in queues:
+            t_schedule, t_drain = run(queue_class, beats)
+            print("{:>8} {:>10} {:>14.4f} {:>14.4f} {:>10.2f}".format(
+                n, name, t_schedule, t_drain, (t_schedule + t_drain) * 1e6 / n))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
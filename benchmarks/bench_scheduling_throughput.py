@@ -0,0 +1,197 @@
+"""
+End-to-end scheduling throughput of TempoClock + Player + ServerManager.
+
+Runs headless against a local UDP sink (see headless_session.py), no scsynth
+needed. Two kinds of measurements:
+
+- CPU cost per event of typical players, stepping a simulated clock so that
+  only the work of the clock, the players and the OSC encoding is measured:
+  "synth" (pluck players), "play" (sample players), "fx" (players using many
+  effects), "chords" (PGroup chords) and "every" (players with several
+  every() calls). Lower is better.
+- "throughput": real-time run adding players until more than 1% of the
+  bundles reach the sink after their time tag with the given latency, which
+  gives the number of notes per second that can be sustained. Higher is better.
+
+Results are printed as JSON (or written with --output). With --baseline the
+results are compared to a previous JSON file and the script exits with status
+1 if a metric got worse by more than --tolerance.
+
+Usage:
+    python benchmarks/bench_scheduling_throughput.py [--beats 64] [--players 8]
+        [--scenarios synth play fx chords every throughput] [--latency 0.25]
+        [--output results.json] [--baseline baseline.json] [--tolerance 0.1]
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+from headless_session import Session, EFFECTS
+
+from renardo.lib.Patterns import P
+from renardo.lib.TempoClock.time_source import SimulatedTimeSource
+
+# Metric name -> True if higher is better
+METRICS = {
+    "us_per_event": False,
+    "us_per_bundle": False,
+    "notes_per_second": True,
+}
+
+MELODY = [0, 2, 4, 5, 7, 4, 2, 1]
+
+
+def synth(session, n):
+    for i in range(n):
+        session.player("s{}".format(i), "pluck", MELODY, dur=1/4, amp=0.5, pan=[-1, 1])
+
+
+def play(session, n):
+    for i in range(n):
+        session.player("s{}".format(i), "play", "x-o*", dur=1/4, sample=[0, 1])
+
+
+def fx(session, n):
+    kwargs = {name: 0.5 for name in EFFECTS}
+    for i in range(n):
+        session.player("s{}".format(i), "pluck", MELODY, dur=1/4, **kwargs)
+
+
+def chords(session, n):
+    for i in range(n):
+        session.player("s{}".format(i), "blip", [P(0, 2, 4), P(1, 3, 5, 7), 0], dur=1/4)
+
+
+def every(session, n):
+    for i in range(n):
+        (session.player("s{}".format(i), "pluck", MELODY, dur=1/4)
+            .every(3, "reverse").every(4, "shuffle").every(5, "rotate").every(7, "offadd", 4))
+
+
+SCENARIOS = {"synth": synth, "play": play, "fx": fx, "chords": chords, "every": every}
+
+
+def measure_cpu(scenario, players, beats):
+    """ Returns the CPU cost per event / bundle of `players` players of `scenario` """
+    session = Session(time_source=SimulatedTimeSource(start=time.time()))
+    try:
+        session.clock.set_time(0)
+        SCENARIOS[scenario](session, players)
+        session.clock.step(8)  # players start on the next bar, then warm up
+        events = sum(p.notes_played for p in session.players)
+        bundles = session.sent
+        # Blocks are run by `step` in this thread: the sink thread is not counted
+        cpu = time.thread_time()
+        session.clock.step(beats)
+        cpu = time.thread_time() - cpu
+        events = sum(p.notes_played for p in session.players) - events
+        bundles = session.sent - bundles
+    finally:
+        session.close()
+    return {
+        "players": players,
+        "beats": beats,
+        "events": events,
+        "bundles": bundles,
+        "cpu_seconds": cpu,
+        "us_per_event": cpu * 1e6 / max(events, 1),
+        "us_per_bundle": cpu * 1e6 / max(bundles, 1),
+    }
+
+
+def measure_throughput(latency, seconds, max_players, bpm=240, dur=1/8):
+    """ Adds players (doubling each time) until more than 1% of the bundles are late
+        and returns the highest rate of notes per second that was sustained """
+    best = {"latency": latency, "players": 0, "notes_per_second": 0.0}
+    players = 1
+    while players <= max_players:
+        session = Session(bpm=bpm)
+        session.clock.latency = latency
+        try:
+            for i in range(players):
+                session.player("s{}".format(i), "pluck", MELODY, dur=dur)
+            session.clock.start()
+            # Wait for the players to start on the next bar
+            time.sleep(max(0, session.clock.get_time_at_beat(session.clock.next_bar()) - session.clock.get_time()))
+            session.sink.reset()
+            notes = sum(p.notes_played for p in session.players)
+            time.sleep(seconds)
+            notes = sum(p.notes_played for p in session.players) - notes
+            time.sleep(latency + 0.1)  # let the last bundles arrive
+            late = session.sink.late / max(session.sink.datagrams, 1)
+        finally:
+            session.close()
+        if late > 0.01:
+            break
+        best = {"latency": latency, "players": players, "notes_per_second": notes / seconds, "late": late}
+        players *= 2
+    return best
+
+
+def compare(results, baseline, tolerance):
+    """ Prints the change of each metric and returns the list of regressions """
+    regressions = []
+    print("{:>12} {:>18} {:>12} {:>12} {:>9}".format("scenario", "metric", "baseline", "current", "change"))
+    for scenario, values in results["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(scenario)
+        if old is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in values or not old.get(metric):
+                continue
+            change = (values[metric] - old[metric]) / old[metric]
+            worse = -change if higher_is_better else change
+            flag = ""
+            if worse > tolerance:
+                flag = "REGRESSION"
+                regressions.append((scenario, metric, change))
+            print("{:>12} {:>18} {:>12.3f} {:>12.3f} {:>+8.1%} {}".format(
+                scenario, metric, old[metric], values[metric], change, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS) + ["throughput"])
+    parser.add_argument("--players", type=int, default=8, help="players per CPU scenario")
+    parser.add_argument("--beats", type=int, default=64, help="beats measured per CPU scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="keep the best of this many runs")
+    parser.add_argument("--latency", type=float, default=0.25, help="seconds, for the throughput scenario")
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration of each throughput step")
+    parser.add_argument("--max-players", type=int, default=256)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scenarios": {},
+    }
+    for scenario in args.scenarios:
+        if scenario == "throughput":
+            results["scenarios"][scenario] = measure_throughput(args.latency, args.seconds, args.max_players)
+        else:
+            runs = [measure_cpu(scenario, args.players, args.beats) for _ in range(args.repeat)]
+            results["scenarios"][scenario] = min(runs, key=lambda run: run["cpu_seconds"])
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
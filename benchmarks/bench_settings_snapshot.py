@@ -0,0 +1,62 @@
+"""
+Cost of reading a setting with `settings.get` and with the settings snapshot.
+
+Times the lookups done for every note or bundle (REAPER and Ableton backend
+flags, OSC MIDI address) with `settings.get("section.KEY")`, with attribute
+access on `settings.snapshot` and with `settings.snapshot.get("section.KEY")`,
+and a missing key with both `get`s.
+
+Usage:
+    python benchmarks/bench_settings_snapshot.py [--number 200000] [--repeat 5]
+"""
+import argparse
+import logging
+import operator
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from renardo.settings_manager import settings
+
+KEYS = [
+    "reaper_backend.REAPER_BACKEND_ENABLED",
+    "ableton_backend.ABLETON_BACKEND_ENABLED",
+    "sc_backend.OSC_MIDI_ADDRESS",
+]
+
+
+def measure(func, number, repeat):
+    """ Returns the best time per call in nanoseconds """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e9
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    # Misses are logged at INFO level, don't time the log handlers
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print("{:>42} {:>16} {:>16} {:>16}".format("key", "get (ns)", "attribute (ns)", "snapshot.get (ns)"))
+    for key in KEYS + ["core.MISSING_KEY"]:
+        get = measure(lambda: settings.get(key), args.number, args.repeat)
+        if key in KEYS:
+            getter = operator.attrgetter(key)
+            attribute = measure(lambda: getter(settings.snapshot), args.number, args.repeat)
+        else:
+            attribute = float("nan")
+        snapshot_get = measure(lambda: settings.snapshot.get(key), args.number, args.repeat)
+        print("{:>42} {:>16.0f} {:>16.0f} {:>16.0f}".format(key, get, attribute, snapshot_get))
+
+    # What the hot paths actually run
+    literal = measure(lambda: settings.snapshot.reaper_backend.REAPER_BACKEND_ENABLED, args.number, args.repeat)
+    print("settings.snapshot.reaper_backend.REAPER_BACKEND_ENABLED: {:.0f} ns".format(literal))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
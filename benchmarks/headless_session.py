@@ -0,0 +1,178 @@
+"""
+Headless renardo session shared by the benchmarks.
+
+Builds a ServerManager sending to a local UDP sink instead of scsynth, an
+EffectManager with a handful of effects, 'pluck' / 'blip' synths, a 'play'
+sample player reading from a generated sample pack, and a TempoClock that
+Players and TimeVars are attached to. Nothing here needs SuperCollider.
+"""
+import os
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from renardo.sc_backend import ServerManager, EffectManager, SCEffect
+from renardo.sc_backend.sc_music_resource import SCInstrument
+from renardo.sc_backend.buffer_management import BufferManager
+from renardo.gatherer.sample_management.sample_pack_library import SamplePackLibrary
+from renardo.lib.TempoClock import TempoClock
+from renardo.lib.Player import Player
+from renardo.lib.TimeVar import TimeVar
+
+NTP_EPOCH = 2208988800  # seconds between 1900 and 1970
+
+# name: (fullname, arguments, order)
+EFFECTS = {
+    "hpf": ("HPF", {"hpf": 0, "hpr": 1}, 2),
+    "lpf": ("LPF", {"lpf": 0, "lpr": 1}, 2),
+    "crush": ("BitCrush", {"crush": 0, "bits": 8}, 1),
+    "shape": ("Shape", {"shape": 0}, 1),
+    "chop": ("Chop", {"chop": 0}, 2),
+    "echo": ("Echo", {"echo": 0, "echotime": 1}, 2),
+    "room": ("Reverb", {"room": 0, "mix": 0.1}, 2),
+    "pan2": ("Pan", {"pan2": 0}, 2),
+}
+
+SAMPLES = "xo*-"
+
+
+class UDPSink:
+    """Receives (and counts) the datagrams sent by the ServerManager.
+
+    For each bundle, records how late it arrived compared to its time tag."""
+
+    def __init__(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.settimeout(0.05)
+        self.port = self.socket.getsockname()[1]
+        self.reset()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def reset(self):
+        self.datagrams = 0
+        self.bytes = 0
+        self.late = 0
+        return
+
+    def run(self):
+        while self.running:
+            try:
+                data = self.socket.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            now = time.time()
+            self.datagrams += 1
+            self.bytes += len(data)
+            if data.startswith(b"#bundle"):
+                secs, fract = struct.unpack(">II", data[8:16])
+                if secs - NTP_EPOCH + fract / 4294967296.0 < now:
+                    self.late += 1
+        return
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        self.socket.close()
+        return
+
+
+def write_sample_pack(root):
+    """ Writes a sample pack with a short silent wav file for each symbol of SAMPLES """
+    from renardo.settings_manager import settings
+    non_alpha = settings.get("samples.NON_ALPHA")
+    for symbol in SAMPLES:
+        if symbol.isalpha():
+            # Letters have a lower case and an upper case directory
+            Path(root, "0_bench", symbol, "upper").mkdir(parents=True, exist_ok=True)
+            directory = Path(root, "0_bench", symbol, "lower")
+        else:
+            directory = Path(root, "0_bench", non_alpha[symbol])
+        directory.mkdir(parents=True, exist_ok=True)
+        with wave.open(str(directory / "sample.wav"), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(44100)
+            f.writeframes(b"\0\0" * 441)
+    return
+
+
+class Session:
+    """A clock, a server sending to a UDPSink and the instruments to play with it."""
+
+    def __init__(self, bpm=120, time_source=None, sink=True):
+        self.sink = UDPSink() if sink else None
+        port = self.sink.port if sink else 0
+        self.server = ServerManager("127.0.0.1", port, port)
+        if sink:
+            self.server.client.connect(("127.0.0.1", port))
+            self.server.sclang.connect(("127.0.0.1", port))
+
+        # Count the messages sent to the server
+        self.sent = 0
+        send = self.server.sendOSC
+
+        def sendOSC(message):
+            self.sent += 1
+            return send(message)
+
+        self.server.sendOSC = sendOSC
+
+        SCEffect.set_server(self.server)
+        self.fx = EffectManager()
+        for name, (fullname, arguments, order) in EFFECTS.items():
+            self.fx.new(SCEffect(name, "", fullname=fullname, arguments=arguments, order=order))
+        self.server.setFx(self.fx)
+
+        self.synths = {}
+        SCInstrument.set_instrument_dict(self.synths)
+        SCInstrument.set_server(self.server)
+        self.instruments = {
+            name: SCInstrument(name, "", auto_load_to_server=False)
+            for name in ("pluck", "blip", "play1", "play2")
+        }
+        self.instruments["play"] = self.instruments["play2"]
+        self.server.update_synthdef_dict(self.synths)
+
+        self._samples_dir = tempfile.TemporaryDirectory()
+        write_sample_pack(self._samples_dir.name)
+        self.buffers = BufferManager(self.server, SamplePackLibrary(Path(self._samples_dir.name)))
+
+        Player.set_effect_manager(self.fx)
+        Player.set_synth_dict(self.synths)
+        Player.set_buffer_manager(self.buffers)
+
+        TempoClock.set_server(self.server)
+        self.clock = TempoClock(bpm=bpm, time_source=time_source)
+        Player.set_clock(self.clock)
+        TimeVar.set_clock(self.clock)
+        self.players = []
+
+    def player(self, name, instrument, *args, **kwargs):
+        """ Returns a new Player named `name` playing `instrument` """
+        player = Player(name)
+        player >> self.instruments[instrument](*args, **kwargs)
+        self.players.append(player)
+        return player
+
+    def close(self):
+        for player in self.players:
+            player.stop()
+        self.players = []
+        self.clock.stop()
+        if self.sink is not None:
+            self.sink.close()
+        self._samples_dir.cleanup()
+        return
@@ -15,6 +15,7 @@ class SamplePackLibrary:
     def __init__(self, root_directory: Path, extra_paths: List[Path]=[]):
         self.root_directory = Path(root_directory)
         self._packs: OrderedDict[int, SamplePack] = OrderedDict()
+        self.version = 0  # Incremented each time the packs are scanned again
         self._load_packs()
         self._extra_paths = [Path(p) for p in extra_paths]
         self._extra_paths = extra_paths + [settings.get_path("LOOP_PATH")]
@@ -40,6 +41,12 @@ class SamplePackLibrary:
             except ValueError as e:
                 print(f"Warning: Skipping invalid pack directory {pack_dir}: {e}")
 
+    def rescan(self):
+        """Scan the root directory again, e.g. after packs or samples were added."""
+        self._packs.clear()
+        self._load_packs()
+        self.version += 1
+
     def get_pack(self, index: int) -> Optional[SamplePack]:
         """Get a sample pack by its index."""
         return self._packs.get(index)
@@ -0,0 +1,159 @@
+"""
+Compiled event plans for Players.
+
+Building a Player's event means evaluating every attribute in `Player.attr`
+(80+ after `reset()` has set every effect attribute) at the current
+`event_n`, but most of them never change from one note to the next. An
+`EventPlan` sorts the attributes once into:
+
+- constants: patterns of a single plain value, stored in a template dict
+  that is copied for each event
+- cyclic: plain `Pattern`s of plain values, evaluated with `data[n % size]`
+- dynamic: everything else (TimeVars, GeneratorPatterns, PlayerKeys, nested
+  patterns, PGroups with a behaviour...) evaluated with `attr_current_value`
+  as before
+
+The plan is kept until the Player's `AttributeDict` changes, i.e. until an
+attribute is set (`p1.lpf = 500`, `p1 >> ...`, `every` methods...).
+
+`structure_key` is used when a line like `p1 >> pluck(...)` is evaluated
+again, to only set the attributes whose values have changed.
+"""
+from renardo.lib.Key import NumberKey
+from renardo.lib.Patterns import metaPattern, Pattern, PGroup, GeneratorPattern
+from renardo.lib.Patterns.PGroups import PGroupPrime
+from renardo.lib.TimeVar import TimeVar
+from renardo.lib.ring import Ring
+
+_plain_types = (int, float, str, bool, type(None))
+
+
+class AttributeDict(dict):
+    """dict of Player attributes counting its modifications in `version`"""
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.version = 0
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.version += 1
+
+    def pop(self, *args):
+        self.version += 1
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self.version += 1
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        self.version += 1
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self.version += 1
+
+    def clear(self):
+        dict.clear(self)
+        self.version += 1
+
+
+def is_static(value):
+    """ Returns True if `Player.unpack` would return `value` unchanged (or an equal
+        copy for PGroups) whenever it is evaluated """
+    if isinstance(value, PGroup):
+        return not value.has_behaviour() and all(map(is_static, value.data))
+    return not isinstance(value, (metaPattern, GeneratorPattern, TimeVar, NumberKey))
+
+
+def is_plain_pattern(pattern):
+    """ Returns True if indexing `pattern` is just `pattern.data[i % len(pattern.data)]` """
+    cls = type(pattern)
+    return (
+        issubclass(cls, Pattern)
+        and cls.__getitem__ is metaPattern.__getitem__
+        and cls.getitem is metaPattern.getitem
+    )
+
+
+def structure_key(value):
+    """ Returns a hashable key that is equal for two values if setting a Player attribute to
+        either has the same effect, or None if it can't be known (PlayerKeys, Rings...).
+        Plain patterns, lists and tuples are compared by value, other objects by identity """
+    cls = type(value)
+    if cls in _plain_types:
+        return (cls, value)
+    if cls is list or cls is tuple:
+        items = tuple(map(structure_key, value))
+        return None if None in items else (cls, items)
+    if issubclass(cls, (NumberKey, Ring)):
+        return None
+    if is_plain_pattern(value) or issubclass(cls, PGroup) and (
+        not issubclass(cls, PGroupPrime) or cls.change_state is PGroupPrime.change_state
+    ):
+        items = tuple(map(structure_key, value.data))
+        meta = tuple(map(structure_key, value.meta))
+        return None if None in items or None in meta else (cls, items, meta)
+    return (cls, id(value))
+
+
+class EventPlan:
+    """Attributes of a Player sorted by how they need to be evaluated for each event."""
+
+    def __init__(self, attr):
+        self.version = attr.version
+        self.template = {}  # every attribute in order, with the value of the constants
+        self.cyclic = []  # (attr, list of values)
+        self.dynamic = []  # attributes evaluated with Player.attr_current_value
+        for key, pattern in attr.items():
+            self.template[key] = None
+            if not is_plain_pattern(pattern) or not all(map(is_static, pattern.data)):
+                self.dynamic.append(key)
+            elif len(pattern) == 0:
+                self.template[key] = 0
+            elif len(pattern.data) == 1:
+                self.template[key] = pattern.data[0]
+            else:
+                self.cyclic.append((key, pattern.data))
+        # Attributes that can hold a PGroup with a behaviour once `_unduplicate_durs` has run
+        self.unknown = self.dynamic + [key for key in ("delay", "blur") if key in attr and key not in self.dynamic]
+        self.effects = None  # (EffectManager version, effects that aren't always 0)
+
+    def __repr__(self):
+        return "<EventPlan {} constant, {} cyclic, {} dynamic>".format(
+            len(self.template) - len(self.cyclic) - len(self.dynamic), len(self.cyclic), len(self.dynamic))
+
+    def evaluate(self, player):
+        """ Returns the event dict of `player` at its current `event_n` """
+        event = self.template.copy()
+        n = player.event_n
+        for key, data in self.cyclic:
+            event[key] = data[n % len(data)]
+        if self.dynamic:
+            value = player.attr_current_value
+            for key in self.dynamic:
+                event[key] = value(key)
+        return event
+
+    def active_effects(self, effect_manager):
+        """ Returns the keywords of the effects of `effect_manager` that aren't constants equal to 0 """
+        if self.effects is None or self.effects[0] != effect_manager.version:
+            varying = set(self.dynamic).union(key for key, data in self.cyclic)
+            self.effects = (effect_manager.version, tuple(
+                fx for fx in effect_manager.kw if fx in self.template and (fx in varying or self.template[fx] != 0)
+            ))
+        return self.effects[1]
+
+    def has_behaviour(self, event):
+        """ Returns True if a dynamic attribute of `event` is a PGroup with a behaviour """
+        for key in self.unknown:
+            value = event[key]
+            if isinstance(value, PGroup) and value.has_behaviour():
+                return True
+        return False
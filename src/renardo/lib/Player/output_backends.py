@@ -0,0 +1,153 @@
+"""
+Output backends for Players.
+
+An output backend sends the messages of a Player's notes to whatever plays
+its instrument: SuperCollider synths, MIDI sent by SuperCollider, a MIDI
+port, REAPER or Ableton Live. A backend factory is registered once per
+instrument proxy class, by class name so that optional backends don't have
+to be imported, and a Player binds a backend when an instrument is assigned
+with `>>`:
+
+    register_output_backend("MyInstrument", MyBackend)
+
+Per note, the Player then only calls `backend.emit(messages, timestamp)`
+with the messages of a whole chord. `messages` are the packets completed
+by `Player._new_message_header` unless the backend sets `needs_header` to
+False, in which case they are the packets as expanded from the event.
+"""
+import sys
+
+from renardo.sc_backend.SpecialSynthDefs import SamplePlayer
+from renardo.settings_manager import settings
+
+_backends = {}
+
+
+def register_output_backend(proxy_class_name, factory):
+    """ Uses `factory(player, instrument)` to create the output backend of Players
+        assigned an instrument proxy of class `proxy_class_name` (or a subclass) """
+    _backends[proxy_class_name] = factory
+    return factory
+
+
+def get_output_backend(player, instrument=None):
+    """ Returns a new output backend for `player` playing `instrument` """
+    for cls in type(instrument).__mro__:
+        factory = _backends.get(cls.__name__)
+        if factory is not None:
+            return factory(player, instrument)
+    return SCBundleBackend(player, instrument)
+
+
+class OutputBackend:
+    """Sends the messages of a Player's notes"""
+
+    name = None
+    # Set to False to receive packets before Player._new_message_header
+    needs_header = True
+
+    def __init__(self, player, instrument=None):
+        self.player = player
+        self.instrument = instrument
+
+    def __repr__(self):
+        return "<{} output for {}>".format(self.name, self.player.id)
+
+    def emit(self, messages, timestamp):
+        """ Sends the messages of the notes of one event, all due at `timestamp` """
+        raise NotImplementedError
+
+
+class SCBundleBackend(OutputBackend):
+    """Adds an OSC bundle playing a SynthDef to the Player's QueueBlock for each note"""
+
+    name = "sc"
+
+    def __init__(self, player, instrument=None):
+        OutputBackend.__init__(self, player, instrument)
+        self.is_sample_player = player.instrument_name == SamplePlayer
+        self.synthdef = str(player.instrument_name)
+
+    def emit(self, messages, timestamp):
+        player = self.player
+        clock = player.main_event_clock
+        server = clock.server
+        for message in messages:
+            # Only send if amp > 0 etc
+            if message["amp"] > 0 and (
+                message["buf"] > 0 if self.is_sample_player else message["freq"] is not None
+            ):
+                # Need to send delay and synthdef separately
+                delay = clock.beat_dur(message.get("delay", 0))
+                # to send to play1 or play2
+                synthdef = player._get_synth_name(message["buf"]) if self.is_sample_player else self.synthdef
+                bundle = server.get_synth_bundle(
+                    synthdef, message, timestamp=timestamp + delay, effects=player.active_effects
+                )
+                player.queue_block.append_osc_message(bundle)
+        return None
+
+
+class SCMidiBackend(SCBundleBackend):
+    """Adds an OSC bundle asking SuperCollider to send a MIDI note to the Player's QueueBlock for each note"""
+
+    name = "sc-midi"
+
+    def emit(self, messages, timestamp):
+        player = self.player
+        clock = player.main_event_clock
+        server = clock.server
+        for message in messages:
+            if message["amp"] > 0 and message["freq"] is not None:
+                delay = clock.beat_dur(message.get("delay", 0))
+                bundle = server.get_midi_message(self.synthdef, message, timestamp + delay)
+                player.queue_block.append_osc_message(bundle)
+        return None
+
+
+class AbletonBackend(SCMidiBackend):
+    """MIDI notes for Ableton Live, whose parameters are set when Player attributes are"""
+
+    name = "ableton"
+
+
+class ReaperFreshBackend(OutputBackend):
+    """Plays the notes on a REAPER track via the OSC of the REAPER extension, not SuperCollider.
+
+    The REAPER backend setting and the project are looked up for every note, as they may be
+    enabled / created after the instrument was assigned: notes go to SuperCollider while the
+    backend is disabled, and are dropped while there is no project."""
+
+    name = "reaper-fresh"
+
+    def __init__(self, player, instrument=None):
+        OutputBackend.__init__(self, player, instrument)
+        self.sc_backend = SCBundleBackend(player, instrument)
+
+    def get_project(self):
+        """ Returns the instrument's project, else the runtime's (if the runtime was started) """
+        project = getattr(self.instrument, "_project", None)
+        if project is None:
+            project = getattr(sys.modules.get("renardo.runtime"), "reaper_fresh_project", None)
+        return project
+
+    def emit(self, messages, timestamp):
+        if not settings.snapshot.reaper_backend.REAPER_BACKEND_ENABLED:
+            return self.sc_backend.emit(messages, timestamp)
+        project = self.get_project()
+        if project is None:
+            return None
+        channel = self.player.attr.get("channel")
+        # channel is stored 0-indexed in Player; Rust expects 1-indexed
+        midi_channel = (int(channel[0]) if channel else 0) + 1
+        for message in messages:
+            if message.get("amp", 0) > 0 and message.get("midinote") is not None:
+                velocity = max(1, min(127, int(message.get("amp", 1.0) * 127)))
+                duration_ms = max(10, int(message.get("sus", 0.5) * 1000))
+                project._osc.play_note(midi_channel, int(message["midinote"]), velocity, duration_ms)
+        return None
+
+
+register_output_backend("MidiInstrumentProxy", SCMidiBackend)  # and ReaperInstrumentProxy
+register_output_backend("AbletonInstrument", AbletonBackend)
+register_output_backend("ReaperFreshInstrument", ReaperFreshBackend)
@@ -1,4 +1,5 @@
 import itertools
+from bisect import bisect_left
 
 from renardo.sc_backend import (
     SamplePlayer, LoopPlayer
@@ -13,7 +14,7 @@ from renardo.lib.Patterns import (
     GeneratorPattern, modulo_index, group_modulo_index,
 )
 from renardo.lib.Root import Root
-from renardo.lib.Scale import Scale, get_freq_and_midi
+from renardo.lib.Scale import Scale, get_freq_and_midi, get_freqs_and_midis
 from renardo.lib.TimeVar import TimeVar
 from renardo.lib.Code import WarningMsg
 from renardo.lib.Utils import get_first_item, get_expanded_len
@@ -29,6 +30,9 @@ from renardo.lib.Utils import get_first_item, get_expanded_len
 
 from .Repeat import Repeatable
 from .rest import rest
+from .event_plan import AttributeDict, EventPlan, is_plain_pattern, is_static, structure_key
+from .output_backends import get_output_backend
+from .profiler import PlayerStats
 
 class PlayerKeyException(Exception):
     pass
@@ -82,6 +86,8 @@ class Player(Repeatable):
     default_scale = Scale.default
     default_root = Root.default()  # TODO//remove callable
     after_update_methods = ["stutter"]
+    # Evaluate events with a compiled EventPlan (see event_plan.py)
+    use_event_plan = True
 
     # Tkinter Window
     ####widget = None
@@ -117,6 +123,12 @@ class Player(Repeatable):
         # Information used in generating OSC messages
         self.buf_delay = []
         self.timestamp = 0
+        self.chord_pitches = None  # (oct, root, scale, {degree: (freq, midinote)}) of the current chord
+        self.active_effects = None  # Effect keywords that may be on in the current event, None for all
+        self.output_backend = None  # bound when an instrument is assigned
+        self.pending_messages = None  # messages of the current event, emitted together
+        # PlayerStats instance when profiling is enabled (see enable_stats)
+        self.profiler = PlayerStats() if settings.get("core.PLAYER_STATS", False) else None
         # self.condition = lambda: True
         # self.sent_messages = []
 
@@ -131,20 +143,27 @@ class Player(Repeatable):
         self.event_index = 0
         self.event_n = 0
         self.notes_played = 0
+        self.rendered_event = (0, 0)  # (event_n, event_index) of the last event sent to the clock
         self.event = {}
         self.accessed_keys = []
 
         # Used for checking clock updates
         self.current_dur = None
         self.old_pattern_dur = None
-        self.old_dur = None
+        self.dur_version = 0  # incremented when current_dur changes
+        self.old_dur_version = -1
+        self.dur_is_static = False
+        self.dur_offsets = None  # (current_dur, durations, prefix sums, total) used by count()
 
         self.isplaying = False
         #self.isAlive = True
 
         # These dicts contain the attribute and modifier values that are sent to SuperCollider     
 
-        self.attr = {}
+        self.attr = AttributeDict()
+        self.event_plan = None  # Rebuilt when self.attr changes
+        self.attr_sources = {}  # attr -> (structure key, value set with >>, pattern stored in self.attr)
+        self.skipped_attributes = 0  # Unchanged attributes not set again by the last >>
 
         # # These dict contains extra attributes of a SynthDef
         # self.extra_attr = {}
@@ -245,6 +264,28 @@ class Player(Repeatable):
             s += "\t{}\t:{}\n".format(attr, val)
         return s
 
+    def enable_stats(self, on=True):
+        """Starts (or stops with on=False) recording the time and output counters returned by `stats()`"""
+        if not on:
+            self.profiler = None
+        elif self.profiler is None:
+            self.profiler = PlayerStats()
+        return self
+
+    def stats(self):
+        """Returns the time spent in each phase of this Player's notes (evaluating the event,
+        building the messages, submitting them), notes/sec and OSC bytes/sec since the last
+        `reset_stats()`. Returns None if stats are not enabled."""
+        if self.profiler is None:
+            return None
+        return self.profiler.summary()
+
+    def reset_stats(self):
+        """Clears the recorded time and output counters"""
+        if self.profiler is not None:
+            self.profiler.reset()
+        return self
+
     def __getattribute__(self, name):
         # This checks for aliases, not the actual keys
         name = Player.alias.get(name, name)
@@ -266,7 +307,7 @@ class Player(Repeatable):
         try:
             # ABLETON INTEGRATION HOOK for param get
             # Get the parameter value from ableton if it exists (only if backend is enabled)
-            if settings.get("ableton_backend.ABLETON_BACKEND_ENABLED"):
+            if settings.snapshot.ableton_backend.ABLETON_BACKEND_ENABLED:
                 if "ableton_track" in self.attr.keys() and "ableton_project_ref" in self.attr.keys():
                     ableton_track = self.attr["ableton_track"][0]
                     ableton_project = self.attr["ableton_project_ref"][0]
@@ -367,6 +408,7 @@ class Player(Repeatable):
             raise TypeError(f"{instrument} is an inappropriate argument type for PlayerObject")
         # Call the update method
         self.update_args_and_start(instrument.name, instrument.degree, **instrument.kwargs)
+        self.bind_output_backend(instrument)
 
         # self.update_pattern_root('sample' if self.synthdef == SamplePlayer else 'degree')
         # Call methods
@@ -377,8 +419,17 @@ class Player(Repeatable):
         # Add the modifier (check if not 0 to stop adding 0 to values)
         if (not isinstance(instrument.mod, (int, float))) or (instrument.mod != 0):
             self + instrument.mod
+
+        # Events the clock already rendered ahead of time use the new attributes
+        if self.main_event_clock.lookahead:
+            self.main_event_clock.rerender(self)
         return self
 
+    def bind_output_backend(self, instrument=None):
+        """Sets the backend that sends this player's notes, depending on the type of `instrument`"""
+        self.output_backend = get_output_backend(self, instrument)
+        return self.output_backend
+
     # Overrides the >> operator to assign an instrument to the player
     def __rshift__(self, other: InstrumentProxy):
         self.assign_instrument(other)
@@ -469,7 +520,7 @@ class Player(Repeatable):
 
                 # ABLETON INTEGRATION HOOK for param set
                 # Apply the parameter in ableton if it exists (only if backend is enabled)
-                if settings.get("ableton_backend.ABLETON_BACKEND_ENABLED"):
+                if settings.snapshot.ableton_backend.ABLETON_BACKEND_ENABLED:
                     if "ableton_track" in self.attr.keys() and "ableton_project_ref" in self.attr.keys():
                         ableton_track = self.attr["ableton_track"][0]
                         ableton_project = self.attr["ableton_project_ref"][0]
@@ -615,6 +666,7 @@ class Player(Repeatable):
                 print("TypeError: Innappropriate argument type for 'dur'")
 
         # Get the current state
+        self.rendered_event = (self.event_n, self.event_index)
         self._get_event()
 
         # Play the note
@@ -646,23 +698,33 @@ class Player(Repeatable):
         self.notes_played += 1
         return
 
+    def rerender(self, queue_block, event_n, event_index):
+        """Compiles the OSC messages of an event already rendered in `queue_block` again,
+        using the current attributes. Used by the clock's look-ahead rendering."""
+        state = self.event_n, self.event_index, self.queue_block, self.event
+        self.event_n, self.event_index, self.queue_block = event_n, event_index, queue_block
+        try:
+            self._get_event()
+            if not isinstance(self.event["dur"], rest):
+                self._send_osc_messages_to_server(verbose=(self.main_event_clock.solo == self))
+        finally:
+            self.event_n, self.event_index, self.queue_block, self.event = state
+        return
+
     def count(self, time=None, event_after=False):
         """Counts the number of events that will have taken place between 0 and `time`. If
         `time` is not specified the function uses self.main_event_clock.now(). Setting `event_after`
         to `True` will find the next event *after* `time`"""
-        n = 0
-        acc = 0
-        dur = 0
         now = time if time is not None else self.main_event_clock.now()
 
         if self.current_dur is None:
             self.current_dur = self.rhythm()
-        durations = list(map(get_first_item, self.current_dur))  # careful here
-        total_dur = float(sum(durations))
+        if self.dur_offsets is None or self.dur_offsets[0] is not self.current_dur:
+            self.dur_offsets = self._get_dur_offsets(self.current_dur)
+        _, durations, offsets, total_dur = self.dur_offsets
         if total_dur == 0:
             WarningMsg("Player object has a total duration of 0. Set to 1")
-            durations = [1]
-            total_dur = 1
+            durations, offsets, total_dur = [1.0], [0.0, 1.0, 2.0], 1.0
             self.dur = 1
         acc = now - (now % total_dur)
 
@@ -674,30 +736,51 @@ class Player(Repeatable):
             return 0, 0
 
         if acc != now:
-            while True:
-                dur = float(modulo_index(durations, n))
-                if acc + dur == now:
-                    acc += dur
-                    n += 1
-                    break
-
-                elif acc + dur > now:
-                    if event_after:
-                        acc += dur
-                        n += 1
-                    break
-                else:
-                    acc += dur
-                    n += 1
+            # offsets covers two cycles so the events from durations[start] onwards
+            # end at acc + offsets[start + k] - offsets[start] for k in 1..len(durations)
+            start = n % len(durations)
+            base = offsets[start]
+            while now - acc >= total_dur:  # only if the modulo above was rounded up
+                acc += total_dur
+                n += len(durations)
+            i = bisect_left(offsets, base + (now - acc), start + 1, start + len(durations))
+            # Check against `now` itself, as the comparisons with the relative time may round differently
+            while acc + (offsets[i] - base) < now and i < start + len(durations):
+                i += 1
+            while i > start + 1 and acc + (offsets[i - 1] - base) >= now:
+                i -= 1
+            end = acc + (offsets[i] - base)
+            if end == now or event_after:
+                n, acc = n + i - start, end
+            else:
+                n, acc = n + i - start - 1, acc + (offsets[i - 1] - base)
 
         # Returns value for self.event_n and self.event_index
         return n, acc
 
+    @staticmethod
+    def _get_dur_offsets(rhythm):
+        """Returns `rhythm`, its durations as floats, the prefix sums of the durations over
+        two cycles and the total duration of one cycle"""
+        durations = list(map(get_first_item, rhythm))  # careful here
+        total_dur = float(sum(durations))  # summed as given, floats and ints may not add up the same
+        durations = list(map(float, durations))
+        offsets = list(itertools.accumulate(durations + durations, initial=0.0))
+        return rhythm, durations, offsets, total_dur
+
     def dur_updated(self):
         """Returns True if the players duration has changed since the last call"""
-        self.current_dur = self.rhythm()
-        if self.current_dur != self.old_dur:
-            self.old_dur = self.current_dur
+        pattern = self.attr["dur"]
+        if pattern is not self.old_pattern_dur or not self.dur_is_static:
+            rhythm = self.rhythm()
+            if rhythm != self.current_dur:
+                self.current_dur = rhythm
+                self.dur_version += 1
+            # Durations made only of plain values can't change until `dur` is set again
+            self.old_pattern_dur = pattern
+            self.dur_is_static = is_plain_pattern(pattern) and all(map(is_static, pattern.data))
+        if self.dur_version != self.old_dur_version:
+            self.old_dur_version = self.dur_version
             return True
         return False
 
@@ -712,9 +795,16 @@ class Player(Repeatable):
 
     def update_args_and_start(self, instrument_name, degree, **kwargs):
         """
-        update arguments values depending of the argument and schedule the starting of the player
+        update arguments values depending of the argument and schedule the starting of the player.
+        When re-evaluating a playing player, attributes set to the same values as the last time
+        are left as they are and counted in `self.skipped_attributes`
         """
         # TODO split and refactor that
+        # Only compare with the last values if they were set the same way
+        compare = self.isplaying and (self.instrument_name == SamplePlayer) == (instrument_name == SamplePlayer) and not (
+            settings.snapshot.ableton_backend.ABLETON_BACKEND_ENABLED and "ableton_track" in self.attr
+        )
+        self.skipped_attributes = 0
         # SynthDef name
         self.instrument_name = instrument_name
         # Make sure all values are reset to start
@@ -745,34 +835,36 @@ class Player(Repeatable):
             else:
                 self.playstring = None
             if degree is not None:
-                setattr(self, "degree", degree if degree != "" else " ")
+                self.update_attr("degree", degree if degree != "" else " ", compare)
         elif degree is not None:
             self.playstring = str(degree)  # this doesn't work for var!
-            setattr(self, "degree", degree)
+            self.update_attr("degree", degree, compare)
         else:
-            setattr(self, "degree", 0)
+            self.update_attr("degree", 0, compare)
 
         # Set special case attributes
-        self.scale = kwargs.get("scale", self.__class__.default_scale)
-        self.root = kwargs.get("root", self.__class__.default_root)
+        self.update_attr("scale", kwargs.get("scale", self.__class__.default_scale), compare)
+        self.update_attr("root", kwargs.get("root", self.__class__.default_root), compare)
 
         # If only duration is specified, set sustain to that value also
         if "dur" in kwargs:
             # If we use tuples / PGroups in setting duration, use it to modify delay using the PDur algorithm
-            setattr(self, "dur", kwargs["dur"])
+            self.update_attr("dur", kwargs["dur"], compare)
             if "sus" not in kwargs:
-                self.sus = self.attr["dur"]
+                self.update_attr("sus", self.attr["dur"], compare)
 
         # Set any other attributes
         for name, value in kwargs.items():
             if name not in special_cases:
-                setattr(self, name, value)
+                self.update_attr(name, value, compare)
 
         # Calculate new position if not already playing
         if self.isplaying is False:
             # Add to clock
             self.isplaying = True
             self.stopping = False
+            if self.main_event_clock.player_stats_enabled:
+                self.enable_stats()
 
             # If we want to update now, set the start point to now
             after = True
@@ -790,6 +882,29 @@ class Player(Repeatable):
 
         return self
 
+    def update_attr(self, name, value, compare=True):
+        """Sets attribute `name` to `value` unless `compare` is True and it was set to an equal
+        value by the last `update_args_and_start` and hasn't changed since. Returns True if set"""
+        attr = self.alias.get(name, name)
+        key = structure_key(value)
+        if compare and key is not None and attr in self.attr_sources:
+            source_key, source, stored = self.attr_sources[attr]
+            patterns = self.previous_patterns.get(attr)
+            if (
+                source_key == key
+                and self.attr.get(attr) is stored
+                and not (patterns and patterns.list_of_methods)
+            ):
+                self.skipped_attributes += 1
+                return False
+        version = self.attr.version
+        setattr(self, name, value)
+        if key is not None and self.attr.version != version:
+            self.attr_sources[attr] = (key, value, self.attr[attr])
+        else:
+            self.attr_sources.pop(attr, None)
+        return True
+
     def get_timestamp(self, beat=None):
         if beat is not None:
             timestamp = self.main_event_clock.osc_message_time() - self.main_event_clock.beat_dur(
@@ -1085,108 +1200,164 @@ class Player(Repeatable):
 
     def _get_event(self):
         """ Returns a dictionary of attr -> now values """
-        self.event = dict(map(lambda attr: (attr, self.attr_current_value(attr)), self.attr.keys()))
-        self.event = self._unduplicate_durs(self.event)
-        self.event = self.get_prime_funcs(self.event)
+        profiler = self.profiler
+        if profiler is not None:
+            started = profiler.start()
+        if self.use_event_plan:
+            plan = self.event_plan
+            if plan is None or plan.version != self.attr.version:
+                plan = self.event_plan = EventPlan(self.attr)
+            self.event = self._unduplicate_durs(plan.evaluate(self))
+            if plan.has_behaviour(self.event):
+                self.event = self.get_prime_funcs(self.event)
+        else:
+            self.event = dict(map(lambda attr: (attr, self.attr_current_value(attr)), self.attr.keys()))
+            self.event = self._unduplicate_durs(self.event)
+            self.event = self.get_prime_funcs(self.event)
 
         # Update internal player keys / schedule future updates
         self._update_all_player_keys()
+        if profiler is not None:
+            profiler.stop("event", started)
         return self
 
     def _send_osc_messages_to_server(self, timestamp=None, verbose=True, **kwargs):
         """ Goes through the current event and compiles osc messages and sends them to server via the tempo clock """
         timestamp = timestamp if timestamp is not None else self.queue_block.time
+        profiler = self.profiler
+        if profiler is not None:
+            started = profiler.start()
+            sent = len(self.queue_block.osc_messages) if self.queue_block is not None else 0
         # self.do_bang = False
-        for i in range(self._get_event_length(**kwargs)):
-            self._send_osc_message(self.event, i, timestamp=timestamp, verbose=verbose, **kwargs)
+        self.chord_pitches = self._get_chord_pitches(**kwargs)
+        self.active_effects = self._get_active_effects(**kwargs)
+        self.pending_messages = []
+        try:
+            for i in range(self._get_event_length(**kwargs)):
+                self._send_osc_message(self.event, i, timestamp=timestamp, verbose=verbose, **kwargs)
+            messages, self.pending_messages = self.pending_messages, None
+            if profiler is not None:
+                started = profiler.stop("messages", started)
+            if messages:
+                self.output_backend.emit(messages, timestamp)
+            if profiler is not None:
+                profiler.stop("submit", started)
+                queue_block = self.queue_block
+                profiler.count(len(messages), queue_block.osc_messages[sent:] if queue_block is not None else ())
+        finally:
+            self.chord_pitches = None
+            self.active_effects = None
+            self.pending_messages = None
         # if self.do_bang:
         #     self.bang()
         return None
 
+    def _get_active_effects(self, **kwargs):
+        """ Returns the effect keywords that aren't always 0 in the current event plan,
+            or None if the current event may not come from it """
+        plan = self.event_plan
+        if kwargs or not self.use_event_plan or plan is None or plan.version != self.attr.version:
+            return None
+        return plan.active_effects(self.effect_manager)
+
+    def _get_chord_pitches(self, **kwargs):
+        """ Returns the frequencies and midinotes of every degree of the current event
+            if it is a chord, calculated in one go for _new_message_header """
+        if self.instrument_name in (SamplePlayer, LoopPlayer):
+            return None
+        degree = kwargs.get("degree", self.event.get("degree"))
+        if not isinstance(degree, PGroup):
+            return None
+        octave = kwargs.get("oct", self.event["oct"])
+        root = kwargs.get("root", self.event["root"])
+        scale = kwargs.get("scale", self.scale)
+        if isinstance(octave, PGroup) or isinstance(root, PGroup):
+            return None
+        def notes(group):
+            for item in group:
+                if isinstance(item, PGroup):
+                    yield from notes(item)
+                else:
+                    yield item
+
+        degrees = list(notes(degree.data))
+        try:
+            freqs, midinotes = get_freqs_and_midis(degrees, octave, root, scale, midi_map=self.midi_map)
+            pitches = dict(zip(degrees, zip(freqs, midinotes)))
+        except (TypeError, ValueError):
+            return None
+        return octave, root, scale, pitches
+
     def _send_osc_message(self, event, index, timestamp=None, verbose=True, **kwargs):
-        """ Compiles and sends an individual OSC message created by recursively unpacking nested PGroups """
-        packet = {}
-        event = event.copy()
-        event.update(kwargs)
-
-        for key, value in event.items():
-            # If we can index a value, trigger a new OSC message to send OSC messages for each
-            # value = kwargs.get(key, value)
-            if isinstance(value, PGroup):
-                new_event = {}
-                for new_key, new_value in event.items():
-                    # new_value = kwargs.get(new_key, new_value)
-                    if isinstance(new_value, PGroup):
-                        new_event[new_key] = new_value[index]
-                    else:
-                        new_event[new_key] = new_value
-                # Recursively unpack and send messages
-                for i in range(self._get_event_length(new_event)):
-                    self._send_osc_message(new_event, i, timestamp, verbose)
-                return None
-            else:
-                # If it is a number, use the numbers (check for kwargs override)
+        """ Compiles and sends the OSC messages for voice `index` of `event`.
+
+            Nested PGroups are expanded without recursion: each level indexes the PGroups
+            of the level above, depth first, and a packet is sent for every combination of
+            indices that leaves no PGroup. Only the values of the keys holding a PGroup are
+            indexed. Every voice gets a packet dict of its own, as the messages of an event
+            are kept until they are emitted together. """
+        if kwargs:
+            event = event.copy()
+            event.update(kwargs)
+
+        groups = [key for key, value in event.items() if isinstance(value, PGroup)]
+
+        if not groups:
+            packet = event.copy()
+            # Special case modulations
+            if ("amp" in packet) and ("amplify" in packet):
+                packet["amp"] = packet["amp"] * packet["amplify"]
+            self._push_osc_to_server(packet, timestamp, verbose, **kwargs)
+            return None
+
+        # Keys that are not PGroups count as one voice
+        floor = 1 if len(event) > len(groups) else 0
+        # Stack of [values of the group keys, next voice, number of voices] for each level
+        stack = [[[event[key] for key in groups], index, index + 1]]
+        while stack:
+            level = stack[-1]
+            values, i, size = level
+            if i >= size:
+                stack.pop()
+                continue
+            level[1] = i + 1
+
+            voice = [value[i] if isinstance(value, PGroup) else value for value in values]
+            size = floor
+            nested = False
+            for value in voice:
+                if isinstance(value, PGroup):
+                    nested = True
+                    if len(value) > size:
+                        size = len(value)
+            if nested:
+                stack.append([voice, 0, size])
+                continue
+
+            packet = dict(event)
+            for key, value in zip(groups, voice):
                 packet[key] = value
-        # Special case modulations
-        if ("amp" in packet) and ("amplify" in packet):
-            packet["amp"] = packet["amp"] * packet["amplify"]
-        # Send compiled messages
-        self._push_osc_to_server(packet, timestamp, verbose, **kwargs)
+            # Special case modulations
+            if ("amp" in packet) and ("amplify" in packet):
+                packet["amp"] = packet["amp"] * packet["amplify"]
+            self._push_osc_to_server(packet, timestamp, verbose)
 
         return None
 
     def _push_osc_to_server(self, packet, timestamp, verbose=True, **kwargs):
-        """ Adds message head, calculating frequency then sends to server if verbose is True and
-            amp/bufnum values meet criteria """
+        """ Adds message head, calculating frequency then passes it to the output backend
+            if verbose is True. Messages of the current event are emitted together by
+            _send_osc_messages_to_server """
+        backend = self.output_backend or self.bind_output_backend()
 
         # Do any calculations e.g. frequency
-        message = self._new_message_header(packet, **kwargs)
-
-        # REAPER FRESH hook — send notes via OSC to Rust extension instead of SC
-        if (settings.get("reaper_backend.REAPER_BACKEND_ENABLED")
-                and self.instrument_name == "ReaperFreshInstrument"):
-            from renardo import runtime as _rt
-            project = getattr(_rt, 'reaper_fresh_project', None)
-            print(f"[REAPER-FRESH hook] instrument={self.instrument_name!r} "
-                  f"project={'found' if project else 'NONE'} "
-                  f"verbose={verbose} amp={message.get('amp')} "
-                  f"midinote={message.get('midinote')}")
-            if (project is not None and verbose
-                    and message.get("amp", 0) > 0
-                    and message.get("midinote") is not None):
-                channel_attr = self.attr.get("channel")
-                # channel is stored 0-indexed in Player; Rust expects 1-indexed
-                raw_ch = int(channel_attr[0]) if channel_attr else 0
-                midi_channel = raw_ch + 1
-                velocity = max(1, min(127, int(message.get("amp", 1.0) * 127)))
-                duration_ms = max(10, int(message.get("sus", 0.5) * 1000))
-                print(f"[REAPER-FRESH hook] → play_note ch={midi_channel} "
-                      f"note={int(message['midinote'])} vel={velocity} dur={duration_ms}ms")
-                project._osc.play_note(midi_channel, int(message["midinote"]), velocity, duration_ms)
+        message = self._new_message_header(packet, **kwargs) if backend.needs_header else packet
+
+        if verbose:
+            if self.pending_messages is not None:
+                self.pending_messages.append(message)
             else:
-                print(f"[REAPER-FRESH hook] ✗ skipped (conditions not met)")
-            return  # never forward to SC
-
-        # Only send if amp > 0 etc
-        if (
-            verbose
-            and (message["amp"] > 0)
-            and (
-                (self.instrument_name != SamplePlayer and message["freq"] != None)
-                or (self.instrument_name == SamplePlayer and message["buf"] > 0)
-            )
-        ):
-            # Need to send delay and synthdef separately
-            delay = self.main_event_clock.beat_dur(message.get("delay", 0))
-            synthdef = self._get_synth_name(
-                message.get("buf", 0)
-            )  # to send to play1 or play2
-            compiled_msg = self.main_event_clock.server.get_bundle(
-                synthdef, message, timestamp=timestamp + delay
-            )
-            # We can set a condition to only send messages
-            self.queue_block.append_osc_message(compiled_msg)
-            # self.do_bang = True
+                backend.emit([message], timestamp)
         return None
 
     def _new_message_header(self, event, **kwargs):
@@ -1209,7 +1380,7 @@ class Player(Repeatable):
                 pos = self.main_event_clock.beat_dur(sus)
             else:
                 pos = 0
-            buf = self.samples.get_buffer_from_symbol(str(degree), spack, sample).bufnum
+            buf = self.samples.resolve(str(degree), spack, sample)[0].bufnum
             message.update({"buf": buf, "pos": pos})
             # Update player key
             if "buf" in self.accessed_keys:
@@ -1248,8 +1419,11 @@ class Player(Repeatable):
             spack = kwargs.get("spack", event["spack"])
             scale = kwargs.get("scale", self.scale)
 
+            chord = self.chord_pitches
             if degree == None:
                 freq, midinote = None, None
+            elif chord is not None and chord[0] is octave and chord[1] is root and chord[2] is scale and degree in chord[3]:
+                freq, midinote = chord[3][degree]
             else:
                 freq, midinote = get_freq_and_midi(degree, octave, root, scale, midi_map=self.midi_map)
             message.update({'freq': freq, 'midinote': midinote})
@@ -1278,11 +1452,7 @@ class Player(Repeatable):
             as there is a play1 and play2 SynthDef for playing audio files with
             one or two channels respectively. """
         if self.instrument_name == SamplePlayer:
-            numChannels = self.samples.get_buffer(buf).channels
-            if numChannels == 1:
-                synthdef = "play1"
-            else:
-                synthdef = "play2"
+            synthdef = self.samples.get_buffer(buf).synthdef
         else:
             synthdef = str(self.instrument_name)
         return synthdef
@@ -77,6 +77,8 @@ def kill(self: Player):
     self.reset()
     if self in self.main_event_clock.playing:
         self.main_event_clock.playing.remove(self)
+    # Don't send the events that were rendered ahead of time
+    self.main_event_clock.cancel_rendered_blocks(self)
     return
 
 @player_method
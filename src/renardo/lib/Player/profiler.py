@@ -0,0 +1,104 @@
+"""
+Per-player profiling counters.
+
+When enabled with `p1.enable_stats()` (or for every Player with the
+`core.PLAYER_STATS` setting or `Clock.enable_player_stats()`), a Player adds
+the wall clock and CPU time it spends in each phase of its notes to a few
+counters:
+
+- event: evaluating its attributes for the current event (`_get_event`)
+- messages: expanding the event into messages and completing their headers
+- submit: building the bundles and adding them to the QueueBlock (output backend)
+
+together with the number of notes, messages, OSC bundles and OSC bytes it
+produced. `p1.stats()` returns a summary, `Clock.top()` prints the players
+sorted by load and `Clock.stats_json()` returns everything as JSON.
+"""
+import time
+
+from renardo.sc_backend.custom_osc_lib import OSCBundle
+
+
+class PlayerStats:
+    """Time and output counters of one Player"""
+
+    phases = ("event", "messages", "submit")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.notes = 0
+        self.messages = 0
+        self.osc_messages = 0
+        self.osc_bytes = 0
+        self.wall = dict.fromkeys(self.phases, 0.0)
+        self.cpu = dict.fromkeys(self.phases, 0.0)
+        return
+
+    @staticmethod
+    def start():
+        """ Returns the wall clock and CPU times to give to `stop` """
+        return time.perf_counter(), time.thread_time()
+
+    def stop(self, phase, started):
+        """ Adds the time since `started` to `phase` and returns the times to start the next phase with """
+        wall, cpu = time.perf_counter(), time.thread_time()
+        self.wall[phase] += wall - started[0]
+        self.cpu[phase] += cpu - started[1]
+        return wall, cpu
+
+    def count(self, messages, osc_messages):
+        """ Counts a note of `messages` messages sent as `osc_messages` """
+        self.notes += 1
+        self.messages += messages
+        self.osc_messages += len(osc_messages)
+        for message in osc_messages:
+            # Bundles keep their encoded messages, don't encode them again
+            if isinstance(message, OSCBundle):
+                self.osc_bytes += 16 + len(message.message)
+            else:
+                self.osc_bytes += len(message.getBinary())
+        return
+
+    def summary(self, elapsed=None):
+        """ Returns the totals, the time per note and the rates over `elapsed` seconds (since
+            the last reset by default) as a dict """
+        if elapsed is None:
+            elapsed = time.perf_counter() - self.started
+        notes = self.notes or 1
+        cpu = sum(self.cpu.values())
+        return {
+            "elapsed": elapsed,
+            "notes": self.notes,
+            "messages": self.messages,
+            "osc_messages": self.osc_messages,
+            "osc_bytes": self.osc_bytes,
+            "notes_per_sec": self.notes / elapsed if elapsed > 0 else 0.0,
+            "osc_bytes_per_sec": self.osc_bytes / elapsed if elapsed > 0 else 0.0,
+            "wall": dict(self.wall),
+            "cpu": dict(self.cpu),
+            "cpu_total": cpu,
+            "cpu_per_note": cpu / notes,
+            "load": cpu / elapsed if elapsed > 0 else 0.0,  # fraction of one CPU
+        }
+
+
+def format_top(rows, n=10, sort="cpu_total"):
+    """ Returns a `top` style table of (player id, summary) rows, sorted by the `sort` summary key """
+    rows = sorted(rows, key=lambda row: row[1][sort], reverse=True)[:n]
+    lines = ["{:<8} {:>7} {:>9} {:>9} {:>9} {:>9} {:>10} {:>10}".format(
+        "PLAYER", "LOAD%", "NOTES/S", "KB/S", "EVENT", "MESSAGES", "SUBMIT", "US/NOTE")]
+    for name, summary in rows:
+        lines.append("{:<8} {:>7.2f} {:>9.1f} {:>9.1f} {:>9.3f} {:>9.3f} {:>10.3f} {:>10.1f}".format(
+            name,
+            summary["load"] * 100,
+            summary["notes_per_sec"],
+            summary["osc_bytes_per_sec"] / 1000,
+            summary["cpu"]["event"],
+            summary["cpu"]["messages"],
+            summary["cpu"]["submit"],
+            summary["cpu_per_note"] * 1e6,
+        ))
+    return "\n".join(lines)
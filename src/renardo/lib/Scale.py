@@ -1,9 +1,11 @@
-from renardo.lib.Patterns import Pattern, PGroup, as_pattern
+from renardo.lib.Patterns import metaPattern, Pattern, PGroup, as_pattern
 from renardo.lib.TimeVar import TimeVar
 
 from random import choice
 from copy import copy
+from collections import OrderedDict
 import math
+import threading
 
 def miditofreq(midinote):
     """ Converts a midi number to frequency """
@@ -61,6 +63,29 @@ def get_freq_and_midi(degree, octave, root, scale, midi_map=None):
     if isinstance(degree, str) and midi_map:
         degree = midi_map[degree] if degree in midi_map.keys() else midi_map["default"]
 
+    return pitch_engine.get(degree, octave, root, scale)
+
+def get_freqs_and_midis(degrees, octave, root, scale, midi_map=None):
+    """ Returns the frequencies and midinotes of every degree in `degrees`, a (nested)
+        PGroup, Pattern or list, as two objects of the same type """
+
+    if midi_map:
+        degrees = _map_degrees(degrees, midi_map)
+
+    return pitch_engine.get_many(degrees, octave, root, scale)
+
+def _map_degrees(degrees, midi_map):
+    if isinstance(degrees, metaPattern):
+        return degrees.new([_map_degrees(degree, midi_map) for degree in degrees.data])
+    elif isinstance(degrees, (list, tuple)):
+        return degrees.__class__(_map_degrees(degree, midi_map) for degree in degrees)
+    elif isinstance(degrees, str):
+        return midi_map[degrees] if degrees in midi_map.keys() else midi_map["default"]
+    return degrees
+
+def _get_freq_and_midi(degree, octave, root, scale):
+    """ Returns the frequency and midinote without using the pitch tables """
+
     # TODO -- make sure it's always a scale
     if hasattr(scale, "now"):
 
@@ -351,6 +376,155 @@ class _DefaultScale(ScaleType):
     def __getattr__(self, attr):
         return self.__getattribute__(attr)
 
+class PitchEngine:
+    """ Memoized `get_freq_and_midi`.
+
+        Results only depend on the values of the scale and its tuning, and on the
+        degree, octave and root as floats. For each scale and root, a table keeps
+        the frequencies and midinotes of the integer degrees and octaves in
+        `degree_range` and `octave_range`, each computed the first time it is
+        played, so that a new scale or root costs no more than uncached notes.
+        Other values (fractional degrees, microtonal roots...) are kept in a least
+        recently used cache of `lru_size` items. Scales that aren't lists of numbers
+        (e.g. Scale.freq) are not cached.
+
+        Used by the clock's block worker threads: the tables and the LRU cache are
+        reordered and evicted, and the hit and miss counters updated, under a lock. """
+
+    degree_range = (-48, 48)
+    octave_range = (-1, 11)
+    max_tables = 64
+    lru_size = 4096
+
+    def __init__(self):
+        self.tables = OrderedDict()  # (scale key, root) -> {(degree, octave): (freq, midinote)}
+        self.lru = OrderedDict()     # (scale key, root, degree, octave) -> (freq, midinote)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return "<PitchEngine {} tables, {} cached pitches>".format(len(self.tables), len(self.lru))
+
+    def clear(self):
+        with self._lock:
+            self.tables.clear()
+            self.lru.clear()
+            self.hits = self.misses = 0
+
+    @staticmethod
+    def resolve(scale):
+        """ Returns the scale actually used by `get_freq_and_midi` and a hashable key of
+            the values its results depend on, or None if it can't be cached """
+
+        # Unwrap Scale.default first, as its attribute lookups are slow
+        if type(scale) is _DefaultScale:
+            scale = scale.scale
+
+        if hasattr(scale, "now"):
+            scale = scale.now()
+
+        cls = type(scale)
+
+        if cls is ScalePattern or cls is PentatonicScalePattern:
+            if isinstance(scale.data, TimeVar):
+                return scale, None
+            values = tuple(scale.data) if cls is ScalePattern else tuple(scale)
+            key = (cls, values, tuple(scale.tuning), scale.steps)
+
+        elif isinstance(scale, ScaleType):
+            return scale, None
+
+        elif isinstance(scale, (list, Pattern)):
+            values = tuple(scale.data if isinstance(scale, Pattern) else scale)
+            key = (list, values)
+
+        else:
+            return scale, None
+
+        if not all(type(value) in (int, float) for value in values):
+            return scale, None
+
+        return scale, key
+
+    def table(self, key, root, scale):
+        """ Returns the table of integer degrees and octaves for a scale key and root,
+            filled by `lookup` """
+        item = (key, root)
+        with self._lock:
+            table = self.tables.get(item)
+            if table is None:
+                table = self.tables[item] = {}
+                if len(self.tables) > self.max_tables:
+                    self.tables.popitem(last=False)
+            else:
+                self.tables.move_to_end(item)
+        return table
+
+    def lookup(self, key, table, degree, octave, root, scale):
+        """ Returns the frequency and midinote of a degree using a table or the LRU cache """
+        degree, octave = float(degree), float(octave)
+        value = table.get((degree, octave))
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+        if (degree.is_integer() and octave.is_integer()
+                and self.degree_range[0] <= degree < self.degree_range[1]
+                and self.octave_range[0] <= octave < self.octave_range[1]):
+            value = table[(degree, octave)] = _get_freq_and_midi(degree, octave, root, scale)
+            with self._lock:
+                self.misses += 1
+            return value
+        item = (key, root, degree, octave)
+        with self._lock:
+            value = self.lru.get(item)
+            if value is not None:
+                self.lru.move_to_end(item)
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = _get_freq_and_midi(degree, octave, root, scale)
+        with self._lock:
+            self.lru[item] = value
+            if len(self.lru) > self.lru_size:
+                self.lru.popitem(last=False)
+        return value
+
+    def get(self, degree, octave, root, scale):
+        """ Returns the frequency and midinote of a degree """
+        scale, key = self.resolve(scale)
+        if key is None:
+            return _get_freq_and_midi(degree, octave, root, scale)
+        try:
+            root = float(root)
+            table = self.table(key, root, scale)
+            return self.lookup(key, table, degree, octave, root, scale)
+        except (TypeError, ValueError):
+            return _get_freq_and_midi(degree, octave, root, scale)
+
+    def get_many(self, degrees, octave, root, scale):
+        """ Returns the frequencies and midinotes of a (nested) PGroup, Pattern or list
+            of degrees as two objects of the same type, resolving the scale once """
+        scale, key = self.resolve(scale)
+        if key is None:
+            get = lambda degree: _get_freq_and_midi(degree, octave, root, scale)
+        else:
+            root = float(root)
+            table = self.table(key, root, scale)
+            get = lambda degree: self.lookup(key, table, degree, octave, root, scale)
+
+        def convert(degrees):
+            if isinstance(degrees, metaPattern):
+                freqs, midinotes = zip(*map(convert, degrees.data)) if degrees.data else ((), ())
+                return degrees.new(list(freqs)), degrees.new(list(midinotes))
+            elif isinstance(degrees, (list, tuple)):
+                freqs, midinotes = zip(*map(convert, degrees)) if degrees else ((), ())
+                return degrees.__class__(freqs), degrees.__class__(midinotes)
+            return get(degrees)
+
+        return convert(degrees)
+
 # Custom made fibonacci tuing
 
 ##fib = [0,1]
@@ -487,6 +661,8 @@ class __scale__:
 
 Scale = __scale__()
 
+pitch_engine = PitchEngine()
+
 
 # class Chord:
 #     def __init__(self):
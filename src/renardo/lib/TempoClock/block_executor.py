@@ -0,0 +1,126 @@
+"""
+Persistent worker pool used by the TempoClock to run QueueBlocks.
+
+The legacy behaviour spawns a new `threading.Thread` for every block popped
+from the SchedulingQueue. BlockExecutor keeps a fixed number of pre-started
+worker threads instead, runs submitted blocks in beat order and keeps track of
+overload: a block still running when the next block is due (an overrun), or a
+block submitted while every worker is busy (the pool is saturated). Blocks
+running at the same time on different workers are not overload.
+"""
+import itertools
+import os
+import queue
+import threading
+
+from renardo.logger import get_logger
+
+logger = get_logger('lib.TempoClock.block_executor')
+
+
+class BlockExecutor:
+    """Fixed-size pool of worker threads calling `run_block(block, beat)`."""
+
+    def __init__(self, run_block, size=None):
+        self.run_block = run_block
+        self.size = int(size) if size else (os.cpu_count() or 2)
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()  # keeps FIFO order between blocks on the same beat
+        self._lock = threading.Lock()
+        self._workers = []
+
+        # Statistics
+        self.submitted = 0
+        self.completed = 0
+        self.running = 0
+        self.overruns = 0
+        self.saturated = 0
+        self.max_depth = 0
+        self.last_overrun = None  # (beat of the late block, beat of the block due before it finished)
+        self._last_beat = None  # beat of the last block submitted
+
+        for i in range(self.size):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name="TempoClock-Worker-{}".format(i),
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def __repr__(self):
+        return "<BlockExecutor size={} pending={} running={}>".format(self.size, self.depth(), self.running)
+
+    def submit(self, block, beat):
+        """Queues `block` (triggered at `beat`) to be run by the next free worker"""
+        with self._lock:
+            if self.running + self._queue.qsize() >= self.size:
+                # No free worker: the block waits for a previous one to finish
+                self.saturated += 1
+                if self.saturated == 1:
+                    logger.warning(f"Block at beat {block.beat} is due while all {self.size} workers are busy")
+            self.submitted += 1
+            index = self.submitted
+            self._last_beat = block.beat
+        self._queue.put((block.beat, next(self._counter), block, beat, index))
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return
+
+    def depth(self):
+        """Returns the number of blocks waiting for a free worker"""
+        return self._queue.qsize()
+
+    def stats(self):
+        """Returns a dict describing the pool state and its overload counters"""
+        return {
+            "size": self.size,
+            "pending": self.depth(),
+            "running": self.running,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "overruns": self.overruns,
+            "saturated": self.saturated,
+            "max_depth": self.max_depth,
+            "last_overrun": self.last_overrun,
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self.submitted = self.completed = self.overruns = self.saturated = self.max_depth = 0
+            self.last_overrun = None
+        return
+
+    def shutdown(self, timeout=1.0):
+        """Stops the workers once the blocks already queued have run"""
+        for _ in self._workers:
+            self._queue.put((float("inf"), next(self._counter), None, None, None))
+        for worker in self._workers:
+            if worker is not threading.current_thread():
+                worker.join(timeout=timeout)
+        self._workers = []
+        return
+
+    def _worker_loop(self):
+        while True:
+            _, _, block, beat, index = self._queue.get()
+            if block is None:
+                return
+            with self._lock:
+                self.running += 1
+            try:
+                self.run_block(block, beat)
+            except Exception as e:
+                logger.error(f"Error running block at beat {block.beat}: {e}")
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    if self.submitted > index:
+                        # A later block was due before this one finished
+                        self.overruns += 1
+                        self.last_overrun = (block.beat, self._last_beat)
+                        if self.overruns == 1:
+                            logger.warning(f"Block at beat {block.beat} finished after the block at beat "
+                                           f"{self._last_beat} was due")
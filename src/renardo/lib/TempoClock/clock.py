@@ -3,13 +3,23 @@ from __future__ import absolute_import, division, print_function
 import time
 from traceback import format_exc as error_stack
 
+import heapq
+import itertools
+import json
+import random
 import sys
 import threading
 
 from .scheduling_queue import SchedulingQueue, SoloPlayer, History, ScheduleError, Wrapper
 from .point_in_time_registry import registry
+from .block_executor import BlockExecutor
+from .weak_registry import WeakRegistry, ScheduledItems
+from .telemetry import ClockStats
+from .offline import OSCScoreWriter, ReplayLogWriter
+from .time_source import SimulatedTimeSource, get_time_source
 
 from renardo.lib.Player import Player
+from renardo.lib.Player.profiler import format_top
 from renardo.lib.TimeVar import TimeVar
 from renardo.sc_backend.Midi import MidiIn, MIDIDeviceNotFound
 from renardo.sc_backend import TempoClient, ServerManager
@@ -596,11 +606,16 @@ class Schedulable:
 
 class TempoClock(object):
 
-    def __init__(self, bpm=120.0, meter=(4,4)):
+    def __init__(self, bpm=120.0, meter=(4,4), time_source=None):
 
         # Flag this when done init
         self.__setup   = False
 
+        # Every time reading goes through the time source (see time_source.py)
+        if time_source is None:
+            time_source = get_time_source(settings.get("core.CLOCK_TIME_SOURCE", "real"))
+        self.time_source = time_source
+
         # debug information
 
         self.largest_sleep_time = 0
@@ -610,14 +625,14 @@ class TempoClock(object):
         self.last_now_call = float(0)
         self.ticking = True
 
-        # Player Objects stored here
-        self.playing = []
+        # Player Objects stored here (held weakly, removed on kill)
+        self.playing = WeakRegistry()
 
         # Store history of osc messages and functions in here
         self.history = History()
 
-        # All other scheduled items go here
-        self.items   = []
+        # All other scheduled items go here, dropped once their last call has run
+        self.items   = ScheduledItems(keep=self.playing)
 
         # General set up
         self.bpm   = bpm
@@ -638,8 +653,9 @@ class TempoClock(object):
         self.nudge      = 0.0  # If you want to synchronise with something external, adjust the nudge
         self.hard_nudge = 0.0
 
-        self.bpm_start_time = time.time()
+        self.bpm_start_time = self.time_source.time()
         self.bpm_start_beat = 0
+        self.start_time = self.bpm_start_time  # Reset by set_time()
 
         # The duration to sleep while continually looping
         self.sleep_values = [0.01, 0.001, 0.0001]
@@ -663,17 +679,19 @@ class TempoClock(object):
 
         # Deprecated network sync attributes (kept for backward compatibility)
         self.waiting_for_sync = False  # Legacy: was used for network sync
+        self.tempo_server = None
+        self.tempo_client = None
 
         # === 2-THREAD ARCHITECTURE STATE ===
         # Thread-safe beat tracking for 2-thread model
         self._beat_lock = threading.RLock()
         self._current_beat = 0.0  # Shared beat state (protected by _beat_lock)
-        self._last_update_time = time.time()  # Last time we updated beat
+        self._last_update_time = self.time_source.time()  # Last time we updated beat
 
         # Link clock caching to reduce sampling errors
         # Only query Link's clock at beat boundaries, interpolate between
         self._link_beat_reference = 0.0  # Last beat queried from Link
-        self._link_time_reference = 0.0  # time.time() when we got _link_beat_reference
+        self._link_time_reference = 0.0  # time source time when we got _link_beat_reference
         self._link_query_interval = 0.5  # Only query Link every 0.5 seconds (every ~60 beats @ 120 BPM)
 
         # BPM state management (protected by _bpm_lock)
@@ -685,6 +703,45 @@ class TempoClock(object):
         self._timing_thread_active = False
         self._scheduling_thread_active = False
 
+        # === EVENT-DRIVEN SCHEDULING MODE ===
+        # "threads": TimingThread updates the beat at ~10kHz and SchedulingThread polls the queue
+        # "event": the beat is computed on demand and SchedulingThread sleeps until the next deadline
+        self.mode = settings.get("core.CLOCK_SCHEDULING_MODE", "threads")
+        self._schedule_condition = threading.Condition()
+        self.spin_time = 0.001  # Busy-wait this long before a deadline for sub-millisecond accuracy
+        self.max_wait_time = 0.5  # Longest sleep before re-checking the queue (in seconds)
+
+        # === BLOCK EXECUTION ===
+        # "pool": blocks are run by a fixed set of pre-started worker threads (see BlockExecutor)
+        # "thread": legacy behaviour, a new thread is started for every block
+        self.block_executor_mode = settings.get("core.CLOCK_BLOCK_EXECUTOR", "pool")
+        self.worker_threads = settings.get("core.CLOCK_WORKER_THREADS", 0) or None  # None = one per CPU
+        self.executor = None
+
+        # === LOOK-AHEAD RENDERING ===
+        # Blocks are evaluated up to `lookahead` ms (or beats, see `lookahead_unit`) before
+        # their beat, stamped with the exact time of the beat and held until it is due
+        self.lookahead = settings.get("core.CLOCK_LOOKAHEAD", 0)
+        self.lookahead_unit = settings.get("core.CLOCK_LOOKAHEAD_UNIT", "ms")
+        # Beat of the block a thread renders ahead of time, which `now` returns in that thread
+        self._rendering = threading.local()
+        self.late_blocks = 0  # Blocks that were not ready when they were due to be sent
+        self._late_blocks_lock = threading.Lock()  # block worker threads count them
+        self._rendered_blocks = []  # Heap of (beat, n, block) rendered but not sent yet
+        self._rendered_counter = itertools.count()
+        self._rendered_lock = threading.RLock()
+
+        # === TELEMETRY ===
+        # ClockStats instance when timing statistics are enabled (see enable_stats)
+        self.telemetry = ClockStats() if settings.get("core.CLOCK_TELEMETRY", False) else None
+        # Players starting to play record their stats when on (see enable_player_stats)
+        self.player_stats_enabled = settings.get("core.PLAYER_STATS", False)
+
+        # === OFFLINE RENDERING ===
+        # Virtual beat and time (seconds from the start of the render) while `render` runs
+        self._offline_beat = None
+        self._offline_time = 0.0
+
         # Beat callback system for external observers (e.g., WebSocket)
         self._beat_callbacks = []
         self._beat_callbacks_lock = threading.Lock()
@@ -885,7 +942,7 @@ class TempoClock(object):
                     print(f"[Link Tempo Sync @beat {int(beat)}] {current_tempo:.2f} → {link_tempo:.2f} BPM (diff: {tempo_diff:.3f})")
                 self.bpm = link_tempo
                 # Reset the BPM start time to now to avoid accumulation
-                self.bpm_start_time = time.time()
+                self.bpm_start_time = self.time_source.time()
                 self.bpm_start_beat = beat
                 # Adjust latency to maintain constant beat-based latency with new BPM
                 self.update_latency_for_bpm(link_tempo)
@@ -926,11 +983,11 @@ class TempoClock(object):
                         self.beat = link_beat
                         # Reset Link cache reference point when we resync
                         self._link_beat_reference = link_beat
-                        self._link_time_reference = time.time()
+                        self._link_time_reference = self.time_source.time()
 
                     # Also reset the beat tracking reference
                     self.bpm_start_beat = link_beat
-                    self.bpm_start_time = time.time()
+                    self.bpm_start_time = self.time_source.time()
 
                 else:
                     # Mid-bar but noticeable drift: use nudge correction
@@ -955,7 +1012,7 @@ class TempoClock(object):
                     print(f"[Link Sync PERIODIC] Full resync at beat {beat_int}")
 
                 link_beat_periodic = self._get_link_beat(session, link_time)
-                current_time = time.time()
+                current_time = self.time_source.time()
                 with self._beat_lock:
                     self._current_beat = link_beat_periodic
                     self.beat = link_beat_periodic
@@ -1038,11 +1095,13 @@ class TempoClock(object):
 
     def update_tempo_now(self, bpm):
         """Emergency override for updating tempo immediately (not at next bar)"""
-        self.last_now_call = self.bpm_start_time = time.time()
+        self.last_now_call = self.bpm_start_time = self.time_source.time()
         self.bpm_start_beat = self.now()
         object.__setattr__(self, "bpm", bpm)
         # Adjust latency to maintain constant beat-based latency
         self.update_latency_for_bpm(bpm)
+        self._restamp_rendered_blocks()
+        self._wake_scheduler()
         return
 
     def set_tempo(self, bpm, override=False):
@@ -1074,6 +1133,8 @@ class TempoClock(object):
             object.__setattr__(self, "bpm", bpm)
             self.last_now_call = self.bpm_start_time = bpm_start_time
             self.bpm_start_beat = bpm_start_beat
+            self._restamp_rendered_blocks()
+            self._wake_scheduler()
 
             # Push tempo to Ableton Link if enabled
             if self.link_enabled and self.link is not None:
@@ -1100,7 +1161,8 @@ class TempoClock(object):
                     if self.debugging:
                         print(f"[Ableton] Error pushing tempo: {e}")
 
-        # Schedule tempo change for next bar
+        # Schedule tempo change for next bar (when its block is sent if it is rendered ahead of time)
+        func.run_when_due = True
         self.schedule(func, next_bar, is_priority=True)
 
         return bpm_start_beat, bpm_start_time
@@ -1196,7 +1258,9 @@ class TempoClock(object):
 
     def get_time(self):
         """ Returns current machine clock time with nudges values added """
-        return time.time() + float(self.nudge) + float(self.hard_nudge)
+        if self._offline_beat is not None:
+            return self._offline_time + float(self.nudge) + float(self.hard_nudge)
+        return self.time_source.time() + float(self.nudge) + float(self.hard_nudge)
 
     def get_time_at_beat(self, beat):
         """ Returns the time that the local computer's clock will be at 'beat' value """
@@ -1226,20 +1290,31 @@ class TempoClock(object):
 
     def set_time(self, beat):
         """ Set the clock time to 'beat' and update players in the clock """
-        self.start_time = time.time()
+        self.start_time = self.time_source.time()
         self.scheduling_queue.clear()
+        self.items.clear()
+        self.cancel_rendered_blocks()
         self.beat = beat
         self.bpm_start_beat = beat
         self.bpm_start_time = self.start_time
         # self.time = time() - self.start_time
         for player in self.playing:
             player(count=True)
+        self._wake_scheduler()
         return
 
     # ===== 2-THREAD ARCHITECTURE METHODS =====
 
     def get_beat(self):
-        """Thread-safe getter for current beat. Called by SchedulingThread and external code."""
+        """Thread-safe getter for current beat. Called by SchedulingThread and external code.
+        In "event" mode there is no TimingThread so the beat is computed on demand."""
+        if self._offline_beat is not None:
+            return self._offline_beat
+        beat = getattr(self._rendering, "beat", None)
+        if beat is not None:
+            return beat
+        if self.mode == "event":
+            return self._update_beat(self.time_source.time())
         with self._beat_lock:
             return self._current_beat
 
@@ -1252,7 +1327,7 @@ class TempoClock(object):
         Uses periodic Link queries + interpolation to avoid sampling jitter.
 
         Args:
-            now: Current time from time.time()
+            now: Current time from the clock's time source
 
         Returns:
             Updated beat value
@@ -1325,7 +1400,7 @@ class TempoClock(object):
 
         try:
             while self.ticking:
-                now = time.time()
+                now = self.time_source.time()
 
                 # Update current beat (thread-safe)
                 beat = self._update_beat(now)
@@ -1373,16 +1448,17 @@ class TempoClock(object):
                     if self._beat_callbacks:
                         self._notify_beat_callbacks(current_beat_int)
 
-                # Check if event should trigger
-                if self.scheduling_queue.after_next_event(beat):
+                # Send the blocks rendered ahead of time that are now due
+                if self._rendered_blocks:
+                    self._send_rendered_blocks(beat)
+
+                # Check if event should trigger (or should be rendered if using look-ahead)
+                if self.scheduling_queue.after_next_event(beat + self.get_lookahead_beats()):
                     self.current_block = self.scheduling_queue.pop()
 
                     # Spawn worker thread for block execution
                     if len(self.current_block):
-                        threading.Thread(
-                            target=self.__run_block,
-                            args=(self.current_block, beat)
-                        ).start()
+                        self._start_block(self.current_block, beat)
 
                 # Normal polling frequency (configurable via CPU_USAGE)
                 if self.sleep_time > 0:
@@ -1391,6 +1467,516 @@ class TempoClock(object):
         finally:
             self._scheduling_thread_active = False
 
+    def _event_scheduling_thread_loop(self):
+        """
+        Scheduling thread used in "event" mode (replaces both TimingThread and
+        the polling SchedulingThread).
+
+        Sleeps on `_schedule_condition` until the wall-clock deadline of the next
+        queued block (or the next integer beat when beat callbacks or Link are
+        used), then spins for the last `spin_time` seconds. The thread is woken
+        early by `_wake_scheduler()` when an earlier event is scheduled or the
+        tempo changes.
+        """
+        self._scheduling_thread_active = True
+        last_beat_sync = -1
+
+        try:
+            while self.ticking:
+                # The deadline is computed holding the condition, so that an event scheduled
+                # meanwhile wakes the thread from the wait below
+                with self._schedule_condition:
+                    deadline = self._get_next_deadline()
+                    remaining = deadline - self.time_source.time()
+                    if remaining > self.spin_time:
+                        # Woken early or timed out: re-compute the deadline
+                        wait = min(remaining - self.spin_time, self.max_wait_time)
+                        self._schedule_condition.wait(self.time_source.real_seconds(wait))
+                        continue
+
+                # Final short spin for sub-millisecond accuracy
+                while self.time_source.time() < deadline:
+                    pass
+
+                beat = self.get_beat()
+
+                current_beat_int = int(beat)
+                if self.link_enabled and self.link is not None and current_beat_int > last_beat_sync:
+                    last_beat_sync = current_beat_int
+                    self._link_sync_at_beat(beat)
+
+                if current_beat_int != self._last_callback_beat:
+                    self._last_callback_beat = current_beat_int
+                    if self._beat_callbacks:
+                        self._notify_beat_callbacks(current_beat_int)
+
+                if self._rendered_blocks:
+                    self._send_rendered_blocks(beat)
+
+                # Trigger every block that is due (or within the look-ahead horizon)
+                horizon = beat + self.get_lookahead_beats()
+                while self.scheduling_queue.after_next_event(horizon):
+                    self.current_block = self.scheduling_queue.pop()
+                    if len(self.current_block):
+                        self._start_block(self.current_block, beat)
+
+        finally:
+            self._scheduling_thread_active = False
+
+    def _get_next_deadline(self):
+        """Returns the wall-clock time (on the clock's time source) at which the event mode
+        scheduling thread should next wake up."""
+        now = self.time_source.time()
+        deadline = now + self.max_wait_time
+        next_beat = self.scheduling_queue.next()
+        if next_beat != sys.maxsize:
+            horizon = self.beat_dur(self.get_lookahead_beats())
+            deadline = min(deadline, self._get_deadline_at_beat(next_beat) - horizon)
+        if self._rendered_blocks:
+            deadline = min(deadline, self._get_deadline_at_beat(self._rendered_blocks[0][0]))
+        if self._beat_callbacks or self.link_enabled:
+            deadline = min(deadline, self._get_deadline_at_beat(int(self.get_beat()) + 1))
+        return deadline
+
+    def _get_deadline_at_beat(self, beat):
+        """Returns the time source value for `beat`, using Link's timeline when enabled."""
+        if self.link_enabled and self.link is not None:
+            try:
+                return self._get_link_time_at_beat(beat)
+            except Exception:
+                pass
+        return self.get_time_at_beat(beat)
+
+    def _get_link_time_at_beat(self, beat):
+        """Converts a beat on the Link timeline into a time source value."""
+        quantum = self.link_quantum if self.link_quantum is not None else self.bar_length()
+        session = self.link.captureSessionState()
+        link_now = self.link.clock().micros()
+        now = self.time_source.time()
+        link_time = session.timeAtBeat(beat - self.link_phase_offset, quantum)
+        return now + (link_time - link_now) / 1_000_000
+
+    def _wake_scheduler(self):
+        """Wakes the event mode scheduling thread so that it re-computes its deadline."""
+        with self._schedule_condition:
+            self._schedule_condition.notify_all()
+
+    # ===== TELEMETRY =====
+
+    def enable_stats(self, on=True):
+        """Starts (or stops with on=False) recording the timing statistics returned by `stats()`"""
+        if not on:
+            self.telemetry = None
+        elif self.telemetry is None:
+            self.telemetry = ClockStats()
+        return
+
+    def stats(self, top=10):
+        """Returns the block lateness (in beats), processing duration (in seconds), OSC
+        messages per block and per-item cost recorded since the last `reset_stats()`,
+        including the `top` slowest items. Returns None if stats are not enabled."""
+        if self.telemetry is None:
+            return None
+        summary = self.telemetry.summary(top)
+        summary["late_blocks"] = self.late_blocks
+        if self.executor is not None:
+            summary["executor"] = self.executor.stats()
+        return summary
+
+    def reset_stats(self):
+        """Clears the recorded timing statistics"""
+        with self._late_blocks_lock:
+            self.late_blocks = 0
+        if self.telemetry is not None:
+            self.telemetry.reset()
+        if self.executor is not None:
+            self.executor.reset_stats()
+        return
+
+    def enable_player_stats(self, on=True):
+        """Starts (or stops with on=False) recording the time and output counters of every
+        playing Player and of the Players starting to play afterwards (see `Player.stats()`)"""
+        self.player_stats_enabled = on
+        for player in list(self.playing):
+            player.enable_stats(on)
+        return
+
+    def player_stats(self):
+        """Returns {player id: stats} for the playing Players that record stats"""
+        return {player.id: summary for player, summary in
+                ((player, player.stats()) for player in list(self.playing)) if summary is not None}
+
+    def top(self, n=10, sort="cpu_total"):
+        """Prints the `n` playing Players with the highest `sort` stat (CPU time by default),
+        like `top`. Players record stats once enabled with `enable_player_stats()`"""
+        rows = self.player_stats()
+        if not rows:
+            print("No player stats, enable them with Clock.enable_player_stats()")
+            return
+        print(format_top(rows.items(), n, sort))
+        return
+
+    def stats_json(self, path=None, top=10):
+        """Returns the clock stats and the stats of every Player as a JSON string, also
+        written to `path` if given"""
+        snapshot = json.dumps({
+            "time": time.time(),
+            "bpm": float(self.get_bpm()),
+            "beat": self.now(),
+            "clock": self.stats(top),
+            "players": self.player_stats(),
+        }, indent=2, default=str)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(snapshot)
+        return snapshot
+
+    # ===== TIME SOURCE =====
+
+    def set_time_source(self, source):
+        """Replaces the clock's time source (see time_source.py), carrying on
+        from the current beat"""
+        beat = self.now()
+        self.time_source = source
+        now = source.time()
+        with self._beat_lock:
+            self._current_beat = self.beat = beat
+            self._last_update_time = now
+        self.bpm_start_beat, self.bpm_start_time = beat, now
+        self.last_now_call = now
+        self._restamp_rendered_blocks()
+        self._wake_scheduler()
+        return
+
+    def step(self, beats=1):
+        """Moves a clock driven by a SimulatedTimeSource forward by `beats` beats and
+        returns the number of blocks run. The time source is moved to the exact
+        time of each block, which is run in the calling thread, so measuring the
+        CPU time of `step` gives the cost of the events in those beats."""
+        if not isinstance(self.time_source, SimulatedTimeSource):
+            raise TypeError("Clock.step() needs a SimulatedTimeSource, not {!r}".format(self.time_source))
+        end = self.now() + beats
+        blocks = 0
+        while True:
+            beat = self.scheduling_queue.next() - self.get_lookahead_beats()
+            if self._rendered_blocks:
+                beat = min(beat, self._rendered_blocks[0][0])
+            if beat > end:
+                break
+            beat = self._step_to(beat)
+            if self._rendered_blocks:
+                self._send_rendered_blocks(beat)
+            while self.scheduling_queue.after_next_event(beat + self.get_lookahead_beats()):
+                self.current_block = self.scheduling_queue.pop()
+                if len(self.current_block):
+                    self.__run_block(self.current_block, beat)
+                    blocks += 1
+        self._step_to(end)
+        return blocks
+
+    def _step_to(self, beat):
+        """Moves the simulated time forward to the time of `beat` and returns the current beat"""
+        source = self.time_source
+        source.set(max(self.get_time_at_beat(beat), source.time()))
+        now = self._update_beat(source.time())
+        if now < beat:
+            # Float rounding: make sure the blocks at `beat` are due
+            with self._beat_lock:
+                self._current_beat = self.beat = now = beat
+        return now
+
+    # ===== OFFLINE RENDERING =====
+
+    def render(self, beats, path=None, format="score", seed=None, start=None):
+        """Runs the next `beats` beats of the session as fast as possible instead of in
+        real time and returns a dict of statistics, including events per second.
+
+        Args:
+            beats: number of beats to render
+            path: file to write the bundles to (nothing is written if None)
+            format: "score" for a binary OSC score that `scsynth -N` can render
+                    (times in seconds from the start of the render) or "log" for
+                    one line of JSON per bundle
+            seed: seeds the `random` module used by the random patterns so that
+                  two renders of the same session are identical
+            start: beat to start from (default: now)
+
+        The clock threads are stopped while rendering. Afterwards the clock
+        carries on in real time from the last rendered beat."""
+        if format not in ("score", "log"):
+            raise ValueError("Render format must be 'score' or 'log', not {!r}".format(format))
+
+        was_running = self._timing_thread is not None or self._scheduling_thread is not None
+        if was_running:
+            self._join_threads()
+
+        if seed is not None:
+            random.seed(seed)
+
+        start = self.now() if start is None else float(start)
+        end = start + beats
+        writer = None
+        if path is not None:
+            writer = OSCScoreWriter(path) if format == "score" else ReplayLogWriter(path)
+
+        # Time in seconds is counted from the start of the render
+        self._offline_beat, self._offline_time = start, 0.0
+        self.bpm_start_beat, self.bpm_start_time = start, 0.0
+        ticking, self.ticking = self.ticking, True  # stops `schedule` from starting the threads
+
+        blocks = events = bundles = 0
+        started = time.perf_counter()
+        try:
+            while self.scheduling_queue.next() < end:
+                block = self.scheduling_queue.pop()
+                beat = max(block.beat, self._offline_beat)
+                self._offline_time += self.beat_dur(beat - self._offline_beat)
+                self._offline_beat = beat
+                events += self._render_block(block)
+                blocks += 1
+                for message in block.osc_messages:
+                    bundles += 1
+                    if writer is not None:
+                        seconds = getattr(message, "timetag", 0) or block.time
+                        writer.write(seconds - self.latency, block.beat, message)
+            self._offline_time += self.beat_dur(end - self._offline_beat)
+        finally:
+            elapsed = time.perf_counter() - started
+            if writer is not None:
+                writer.close(self._offline_time)
+            duration = self._offline_time
+            self._offline_beat = None
+            # Carry on in real time from the end of the render
+            now = self.time_source.time()
+            with self._beat_lock:
+                self._current_beat = self.beat = end
+                self._last_update_time = now
+            self.bpm_start_beat, self.bpm_start_time = end, now
+            self.last_now_call = now
+            self.ticking = ticking
+            if was_running:
+                self.start()
+
+        stats = {
+            "beats": beats,
+            "seconds": duration,
+            "blocks": blocks,
+            "events": events,
+            "bundles": bundles,
+            "elapsed": elapsed,
+            "events_per_second": events / elapsed if elapsed > 0 else float("inf"),
+            "bundles_per_second": bundles / elapsed if elapsed > 0 else float("inf"),
+            "speed": duration / elapsed if elapsed > 0 else float("inf"),
+        }
+        logger.info("Rendered {beats} beats ({events} events, {bundles} bundles) in {elapsed:.3f}s: "
+                    "{events_per_second:.0f} events/s".format(**stats))
+        return stats
+
+    def _render_block(self, block):
+        """Calls the items of a block during `render` and returns how many were called. With
+        look-ahead, the items to run when due are called last, as when the block is sent live"""
+        block.time = self._offline_time + self.latency
+        lookahead = self.lookahead > 0
+        called = 0
+        for item in block:
+            if lookahead and getattr(item.obj, "run_when_due", False):
+                block.on_send.append(item)
+            elif item.called is False:
+                try:
+                    item.__call__()
+                except SystemExit:
+                    sys.exit()
+                except:
+                    print(error_stack())
+                called += 1
+            self.items.release(item.obj)
+        called += len(block.on_send)
+        self._call_on_send(block)
+        return called
+
+    # ===== LOOK-AHEAD RENDERING =====
+
+    def set_lookahead(self, value, unit="ms"):
+        """Renders QueueBlocks `value` milliseconds (unit="ms") or beats (unit="beats")
+        before they are due. Their OSC bundles are stamped with the exact time of
+        the block's beat plus `latency` and sent when the beat is reached, so the
+        latency only needs to cover the network. Use 0 to disable look-ahead."""
+        if unit not in ("ms", "beats"):
+            raise ValueError("Look-ahead unit must be 'ms' or 'beats', not {!r}".format(unit))
+        if value < 0:
+            raise ValueError("Look-ahead must be a positive number")
+        self.lookahead = value
+        self.lookahead_unit = unit
+        if not value:
+            self.flush_rendered_blocks()
+        self._wake_scheduler()
+        return
+
+    def get_lookahead_beats(self):
+        """Returns the look-ahead horizon in beats at the current tempo"""
+        if not self.lookahead:
+            return 0
+        if self.lookahead_unit == "beats":
+            return float(self.lookahead)
+        return self.seconds_to_beats(self.lookahead / 1000.0)
+
+    def rendered_blocks(self):
+        """Returns the blocks rendered ahead of time that have not been sent yet"""
+        with self._rendered_lock:
+            return [block for _, _, block in sorted(self._rendered_blocks, key=lambda x: x[:2])]
+
+    def _hold_rendered_block(self, block):
+        """Keeps a rendered block until its beat, or sends it now if it is already due"""
+        with self._rendered_lock:
+            if self.time_source.time() < self._get_deadline_at_beat(block.beat):
+                heapq.heappush(self._rendered_blocks, (block.beat, next(self._rendered_counter), block))
+                block = None
+        if block is None:
+            self._wake_scheduler()
+        else:
+            self._count_late_block()
+            self._send_block(block)
+        return
+
+    def _count_late_block(self):
+        with self._late_blocks_lock:
+            self.late_blocks += 1
+        return
+
+    def _send_rendered_blocks(self, beat):
+        """Sends the rendered blocks whose beat is <= `beat`"""
+        while True:
+            with self._rendered_lock:
+                if not self._rendered_blocks or self._rendered_blocks[0][0] > beat:
+                    return
+                block = heapq.heappop(self._rendered_blocks)[2]
+            self._send_block(block)
+
+    def _send_block(self, block):
+        """Calls the items deferred until the block is due, then sends its messages"""
+        self._call_on_send(block)
+        block.send_osc_messages()
+        return
+
+    def _call_on_send(self, block):
+        """Calls the items of a block deferred until it is due"""
+        for item in block.on_send:
+            try:
+                item.__call__()
+            except SystemExit:
+                sys.exit()
+            except:
+                print(error_stack())
+        return
+
+    def flush_rendered_blocks(self):
+        """Sends every rendered block now"""
+        with self._rendered_lock:
+            blocks, self._rendered_blocks = self._rendered_blocks, []
+        for _, _, block in sorted(blocks, key=lambda x: x[:2]):
+            self._send_block(block)
+        return
+
+    def cancel_rendered_blocks(self, player=None):
+        """Drops the messages rendered ahead of time for `player`, or every
+        rendered block if `player` is None"""
+        with self._rendered_lock:
+            if player is None:
+                self._rendered_blocks = []
+            else:
+                for _, _, block in self._rendered_blocks:
+                    block.cancel(player)
+        return
+
+    def rerender(self, player):
+        """Re-compiles the messages already rendered for `player` e.g. after it is updated"""
+        with self._rendered_lock:
+            for _, _, block in sorted(self._rendered_blocks, key=lambda x: x[:2]):
+                if player in block.rendered:
+                    self._rendering.beat = block.beat
+                    try:
+                        block.rerender(player)
+                    except Exception:
+                        print(error_stack())
+                    finally:
+                        self._rendering.beat = None
+        return
+
+    def _restamp_rendered_blocks(self):
+        """Moves the time tags of the rendered blocks after a tempo change"""
+        with self._rendered_lock:
+            for beat, _, block in self._rendered_blocks:
+                block.restamp(self._get_deadline_at_beat(beat) + self.latency)
+        return
+
+    def _start_block(self, block, beat):
+        """Runs a popped QueueBlock in a worker thread."""
+        if self.executor is not None:
+            self.executor.submit(block, beat)
+        else:
+            threading.Thread(
+                target=self.__run_block,
+                args=(block, beat)
+            ).start()
+
+    def _start_executor(self):
+        """Creates the worker pool if blocks are run in "pool" mode"""
+        if self.block_executor_mode == "pool" and self.executor is None:
+            self.executor = BlockExecutor(self.__run_block, self.worker_threads)
+        return
+
+    def _stop_executor(self):
+        if self.executor is not None:
+            executor, self.executor = self.executor, None
+            executor.shutdown()
+        return
+
+    def set_block_executor(self, mode, size=None):
+        """Selects how QueueBlocks are run.
+
+        Args:
+            mode: "pool" (fixed set of pre-started worker threads) or
+                  "thread" (legacy, a new thread for every block)
+            size: number of worker threads in "pool" mode (default: one per CPU)
+
+        Example:
+            Clock.set_block_executor("pool", size=4)
+            Clock.executor.stats()
+        """
+        if mode not in ("pool", "thread"):
+            raise ValueError("Block executor must be 'pool' or 'thread', not {!r}".format(mode))
+        self.block_executor_mode = mode
+        self.worker_threads = size
+        self._stop_executor()
+        if self._scheduling_thread is not None:
+            self._start_executor()
+        return
+
+    def set_mode(self, mode):
+        """Selects the scheduling architecture of the clock.
+
+        Args:
+            mode: "threads" (TimingThread + polling SchedulingThread) or
+                  "event" (on-demand beat, scheduling thread sleeps until the next event)
+
+        Example:
+            Clock.set_mode("event")
+        """
+        if mode not in ("threads", "event"):
+            raise ValueError("Clock mode must be 'threads' or 'event', not {!r}".format(mode))
+        if mode == self.mode:
+            return
+        running = self._scheduling_thread is not None
+        if running:
+            # Sync the beat reference so that the new mode starts where we are
+            beat = self.now()
+            self._join_threads()
+            self._current_beat = beat
+        self.mode = mode
+        if running:
+            self.start()
+        return
+
     # ===== Core Clock Methods =====
 
     def _now(self):
@@ -1421,8 +2007,9 @@ class TempoClock(object):
 
         In the 2-thread architecture, this retrieves the beat from TimingThread's shared state.
         When the clock is not ticking, it falls back to manual calculation.
+        While a block is rendered ahead of time, returns the block's beat in the rendering thread.
         """
-        if self.ticking:
+        if self.ticking or getattr(self._rendering, "beat", None) is not None:
             # Clock is running - get beat from thread-safe getter
             return float(self.get_beat())
         else:
@@ -1436,7 +2023,9 @@ class TempoClock(object):
 
     def osc_message_time(self):
         """ Returns the true time that an osc message should be run i.e. now + latency """
-        return time.time() + self.latency
+        if self._offline_beat is not None:
+            return self._offline_time + self.latency
+        return self.time_source.time() + self.latency
         
     def start(self):
         """
@@ -1454,12 +2043,31 @@ class TempoClock(object):
 
         This replaces the old single-thread run() loop.
         """
-        if self._timing_thread is not None:
+        if self._timing_thread is not None or self._scheduling_thread is not None:
             # Threads already started
             return
 
+        if isinstance(self.time_source, SimulatedTimeSource):
+            # Simulated time only moves with Clock.step(), there is nothing to wait for
+            self.ticking = True
+            return
+
         self.ticking = True
-        self._last_update_time = time.time()
+        self._last_update_time = self.time_source.time()
+        self._start_executor()
+
+        if self.mode == "event":
+            # Single scheduling thread, the beat is computed on demand
+            self._scheduling_thread = threading.Thread(
+                target=self._event_scheduling_thread_loop,
+                name="TempoClock-Scheduling",
+                daemon=True
+            )
+            self._scheduling_thread.start()
+            if self.debugging:
+                print(f"TempoClock started in event mode")
+                print(f"  - SchedulingThread: {self._scheduling_thread.name}")
+            return
 
         # Start timing thread (high priority for precision)
         self._timing_thread = threading.Thread(
@@ -1518,8 +2126,19 @@ class TempoClock(object):
         # Using absolute time + latency prevents accumulation of timing errors
         # that occur when trying to compensate for late block triggering
 
-        now_real_time = time.time()
-        block.time = now_real_time + self.latency
+        stats = self.telemetry
+        if stats is not None:
+            perf_counter = time.perf_counter
+            started = t = perf_counter()
+            item_costs = []
+
+        now_real_time = self.time_source.time()
+        lookahead = self.lookahead > 0
+        if lookahead:
+            # Rendered ahead of time: stamp with the exact time of the block's beat
+            block.time = self._get_deadline_at_beat(block.beat) + self.latency
+        else:
+            block.time = now_real_time + self.latency
 
         # Log block execution timing
         if self.debugging:
@@ -1553,22 +2172,52 @@ class TempoClock(object):
                 print(f"           Link NOW: {link_beat_now:.3f} (drift:{link_drift_now:+.3f}) | "
                       f"Link THEORETICAL @OSC: {link_beat_theoretical:.3f} (drift:{link_drift_theoretical:+.3f})")
 
-        for item in block:
-            # The item might get called by another item in the queue block
-            output = None
-            if item.called is False:
-                try:
-                    output = item.__call__()
-                except SystemExit:
-                    sys.exit()
-                except:
-                    print(error_stack())
-                # TODO: Get OSC message from the call, and add to list?
-        # Send all the message to supercollider together
-        block.send_osc_messages()
+        if lookahead:
+            # Players and TimeVars read the clock at the block's beat, not the current one
+            self._rendering.beat = block.beat
+        try:
+            for item in block:
+                # The item might get called by another item in the queue block
+                output = None
+                if lookahead and getattr(item.obj, "run_when_due", False):
+                    # e.g. tempo changes: called when the block is sent
+                    block.on_send.append(item)
+                elif item.called is False:
+                    start = len(block.osc_messages)
+                    try:
+                        output = item.__call__()
+                    except SystemExit:
+                        sys.exit()
+                    except:
+                        print(error_stack())
+                    # TODO: Get OSC message from the call, and add to list?
+                    if lookahead and isinstance(item.obj, Player):
+                        block.set_rendered(item.obj, item.obj.rendered_event, block.osc_messages[start:])
+                    if stats is not None:
+                        now = perf_counter()
+                        item_costs.append((item.obj, now - t))
+                        t = now
+                self.items.release(item.obj)
+        finally:
+            self._rendering.beat = None
+
+        messages = len(block.osc_messages)
+
+        if lookahead:
+            # Hold the messages until the block's beat
+            self._hold_rendered_block(block)
+        else:
+            if self.time_source.time() > block.time:
+                self._count_late_block()
+            # Send all the message to supercollider together
+            block.send_osc_messages()
         # Store the osc messages -- future idea
         # self.history.add(block.beat, block.osc_messages)
 
+        if stats is not None:
+            lateness = beat - block.beat + (self.get_lookahead_beats() if lookahead else 0)
+            stats.record_block(lateness, time.perf_counter() - started, messages, item_costs)
+
         return
 
     def run(self):
@@ -1623,18 +2272,22 @@ class TempoClock(object):
 
         # Keep track of objects in the Clock
 
-        if obj not in self.playing and isinstance(obj, Player):
+        if isinstance(obj, Player):
 
-            self.playing.append(obj)
+            self.playing.add(obj)
 
-        if obj not in self.items:
+        self.items.add(obj)
 
-            self.items.append(obj)
+        # Add to the queue, waking the event mode scheduler if this is the new next event
 
-        # Add to the queue
+        wake = self.mode == "event" and self.scheduling_queue.before_next_event(beat)
 
         self.scheduling_queue.add(obj, beat, args, kwargs, is_priority)
 
+        if wake:
+
+            self._wake_scheduler()
+
         # block.time = self.osc_message_accum
 
         return
@@ -1694,17 +2347,8 @@ class TempoClock(object):
         2. Waits for both threads to finish (with timeout)
         3. Clears the queue and stops all players
         """
-        self.ticking = False
-
-        # Wait for timing thread to stop
-        if self._timing_thread is not None and self._timing_thread.is_alive():
-            self._timing_thread.join(timeout=1.0)
-            self._timing_thread = None
-
-        # Wait for scheduling thread to stop
-        if self._scheduling_thread is not None and self._scheduling_thread.is_alive():
-            self._scheduling_thread.join(timeout=1.0)
-            self._scheduling_thread = None
+        self._join_threads()
+        self._stop_executor()
 
         # Clean up
         self.kill_tempo_server()
@@ -1716,6 +2360,22 @@ class TempoClock(object):
 
         return
 
+    def _join_threads(self):
+        """Sets ticking=False and waits for the clock threads to finish"""
+        self.ticking = False
+        self._wake_scheduler()
+
+        # Wait for timing thread to stop
+        if self._timing_thread is not None and self._timing_thread.is_alive():
+            self._timing_thread.join(timeout=1.0)
+        self._timing_thread = None
+
+        # Wait for scheduling thread to stop
+        if self._scheduling_thread is not None and self._scheduling_thread.is_alive():
+            self._scheduling_thread.join(timeout=1.0)
+        self._scheduling_thread = None
+        return
+
     def shift(self, n):
         """ Offset the clock time """
         self.beat += n
@@ -1724,13 +2384,15 @@ class TempoClock(object):
     def clear(self):
         """ Remove players from clock """
 
-        self.items = []
+        self.items.clear()
         self.scheduling_queue.clear()
+        self.cancel_rendered_blocks()
         self.solo.reset()
 
         # Stop all Ableton clips before killing players
         try:
-            from renardo import runtime
+            # Only look at the runtime if it is loaded (importing it would boot the whole environment)
+            runtime = sys.modules.get("renardo.runtime")
             # Use the global ableton_project instance if available
             if getattr(runtime, "ableton_project", None) is not None and hasattr(getattr(runtime, "ableton_project", None), 'stop_all_clips'):
                 getattr(runtime, "ableton_project", None).stop_all_clips()
@@ -1747,6 +2409,6 @@ class TempoClock(object):
 
         #         item.stop()
 
-        self.playing = []
+        self.playing.clear()
 
         return
@@ -0,0 +1,104 @@
+"""
+Writers used by `TempoClock.render` to store the bundles of an offline render.
+
+`OSCScoreWriter` writes the binary score format read by scsynth in
+non-realtime mode (`scsynth -N score.osc ...`): a sequence of OSC bundles,
+each prefixed by its size as a big-endian int32, sorted by time tag and with
+time tags counted in seconds from the start of the score.
+
+`ReplayLogWriter` writes one JSON object per bundle (time, beat and decoded
+messages), handy to diff two renders of the same session.
+"""
+import json
+import math
+import struct
+
+from renardo.sc_backend.custom_osc_lib import OSCBundle, OSCMessage, OSCBlob, decodeOSC
+
+
+def score_time_tag(seconds):
+    """ Encodes `seconds` from the start of the score as a 64 bit fixed point OSC time tag """
+    fract, secs = math.modf(max(seconds, 0.0))
+    return struct.pack(">II", int(secs), int(fract * 4294967296.0))
+
+
+def score_bundle(seconds, message):
+    """ Returns the binary bundle of `message` (an OSCBundle or OSCMessage) at `seconds` """
+    if isinstance(message, OSCBundle):
+        body = message.message
+    else:
+        body = OSCBlob(message.getBinary())
+    return b"#bundle\0" + score_time_tag(seconds) + body
+
+
+class OSCScoreWriter:
+    """Collects bundles and writes them as an scsynth NRT score on `close`."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+        # NRT servers start without the default group that the bundles add their nodes to
+        group = OSCMessage("/g_new")
+        group.append([1, 0, 0])
+        self.write(0.0, None, group)
+
+    def write(self, seconds, beat, message):
+        self.entries.append((seconds, len(self.entries), message))
+        return
+
+    def close(self, end_time):
+        """ Writes the score, ending with a dummy command at `end_time` so that the
+            render includes everything until then """
+        end = OSCMessage("/c_set")
+        end.append([0, 0])
+        self.write(end_time, None, end)
+        self.entries.sort(key=lambda entry: entry[:2])
+        with open(self.path, "wb") as f:
+            for seconds, _, message in self.entries:
+                data = score_bundle(seconds, message)
+                f.write(struct.pack(">i", len(data)))
+                f.write(data)
+        return
+
+
+class ReplayLogWriter:
+    """Writes every bundle as a line of JSON as soon as it is rendered."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w")
+
+    def write(self, seconds, beat, message):
+        messages = decodeOSC(message.getBinary())
+        if isinstance(message, OSCBundle):
+            messages = messages[2:]  # drop "#bundle" and the time tag
+        else:
+            messages = [messages]
+        self.file.write(json.dumps({"time": round(seconds, 9), "beat": beat, "messages": messages}))
+        self.file.write("\n")
+        return
+
+    def close(self, end_time):
+        self.file.close()
+        return
+
+
+def read_score(path):
+    """ Returns the (seconds, decoded messages) of each bundle in a score written by OSCScoreWriter """
+    score = []
+    with open(path, "rb") as f:
+        data = f.read()
+    i = 0
+    while i < len(data):
+        size, = struct.unpack(">i", data[i:i + 4])
+        bundle = data[i + 4:i + 4 + size]
+        secs, fract = struct.unpack(">II", bundle[8:16])
+        messages = []
+        j = 16
+        while j < len(bundle):
+            length, = struct.unpack(">i", bundle[j:j + 4])
+            messages.append(decodeOSC(bundle[j + 4:j + 4 + length]))
+            j += 4 + length
+        score.append((secs + fract / 4294967296.0, messages))
+        i += 4 + size
+    return score
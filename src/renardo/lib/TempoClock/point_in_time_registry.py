@@ -2,7 +2,12 @@
 Global registry for managing relationships between PointInTime objects.
 This module provides a central mechanism to track dependencies between different
 PointInTime instances, allowing for more reliable time-based scheduling.
+
+Source points are only weakly referenced: once a source point is garbage
+collected, its entry and the derived points it kept alive are dropped.
 """
+import weakref
+
 
 class PointInTimeRegistry:
     """
@@ -11,12 +16,30 @@ class PointInTimeRegistry:
     This registry maintains persistent connections between source points and their
     derived points, ensuring that operations like (point + 16) remain connected
     even after the original point has been triggered.
+
+    Derived points are held strongly for as long as their source point is
+    alive; source points are held weakly and forgotten when collected.
     """
     
     def __init__(self):
         """Initialize the registry."""
         self._registry = {}  # Maps source_id -> {derived_id: (derived_point, operation)}
         self._reverse_lookup = {}  # Maps derived_id -> [source_ids]
+        self._sources = {}  # Maps source_id -> weak reference to the source point
+    
+    def __len__(self):
+        """Number of source points with registered derived points."""
+        return len(self._registry)
+    
+    def _source(self, source_id):
+        """Returns the source point registered under source_id, or None if it was collected."""
+        ref = self._sources.get(source_id)
+        return ref() if ref is not None else None
+    
+    def _forget_source(self, source_id, ref):
+        """Weak reference callback: drops the entries of a collected source point."""
+        if self._sources.get(source_id) is ref:
+            self._clear_source(source_id)
     
     def register_derived_point(self, source_point, derived_point, operation=None):
         """
@@ -30,8 +53,12 @@ class PointInTimeRegistry:
         source_id = id(source_point)
         derived_id = id(derived_point)
         
-        # Create entry for source if it doesn't exist
-        if source_id not in self._registry:
+        # Create entry for source if it doesn't exist (or if its id was reused)
+        if self._source(source_id) is not source_point:
+            self._clear_source(source_id)
+            self._sources[source_id] = weakref.ref(
+                source_point, lambda ref, source_id=source_id: self._forget_source(source_id, ref)
+            )
             self._registry[source_id] = {}
         
         # Add derived point to source's registry
@@ -55,7 +82,7 @@ class PointInTimeRegistry:
             List of (derived_point, operation) tuples
         """
         source_id = id(source_point)
-        if source_id in self._registry:
+        if self._source(source_id) is source_point:
             return list(self._registry[source_id].values())
         return []
     
@@ -72,12 +99,11 @@ class PointInTimeRegistry:
         derived_id = id(derived_point)
         result = []
         
-        if derived_id in self._reverse_lookup:
-            for source_id in self._reverse_lookup[derived_id]:
-                for registry_dict in self._registry.values():
-                    for registered_id, (point, _) in registry_dict.items():
-                        if registered_id == source_id:
-                            result.append(point)
+        for source_id in self._reverse_lookup.get(derived_id, []):
+            if self._registry.get(source_id, {}).get(derived_id, (None,))[0] is derived_point:
+                source_point = self._source(source_id)
+                if source_point is not None:
+                    result.append(source_point)
         
         return result
     
@@ -96,7 +122,7 @@ class PointInTimeRegistry:
         source_id = id(source_point)
         notified_count = 0
         
-        if source_id in self._registry:
+        if self._source(source_id) is source_point:
             for derived_id, (derived_point, _) in list(self._registry[source_id].items()):
                 if not derived_point.is_defined:
                     try:
@@ -115,7 +141,12 @@ class PointInTimeRegistry:
         Args:
             source_point: The source PointInTime to clear derived points for
         """
-        source_id = id(source_point)
+        if self._source(id(source_point)) is source_point:
+            self._clear_source(id(source_point))
+    
+    def _clear_source(self, source_id):
+        """Removes the entry of source_id and its reverse lookups."""
+        self._sources.pop(source_id, None)
         
         if source_id in self._registry:
             # Get all derived IDs to update reverse lookup
@@ -138,6 +169,7 @@ class PointInTimeRegistry:
         """Clear the entire registry."""
         self._registry.clear()
         self._reverse_lookup.clear()
+        self._sources.clear()
     
     def remove_point(self, point):
         """
@@ -149,8 +181,7 @@ class PointInTimeRegistry:
         point_id = id(point)
         
         # Remove as source
-        if point_id in self._registry:
-            self.clear_derived_points(point)
+        self.clear_derived_points(point)
         
         # Remove as derived
         if point_id in self._reverse_lookup:
@@ -162,6 +193,7 @@ class PointInTimeRegistry:
                     # Clean up empty entries
                     if not self._registry[source_id]:
                         del self._registry[source_id]
+                        self._sources.pop(source_id, None)
             
             del self._reverse_lookup[point_id]
 
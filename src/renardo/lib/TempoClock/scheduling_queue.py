@@ -1,5 +1,8 @@
+import heapq
 import inspect
 import sys
+import threading
+import weakref
 
 from types import FunctionType, MethodType
 
@@ -10,95 +13,193 @@ from renardo.lib.Utils import modulo_index
 from renardo.lib import Code
 
 
+class CallableSignatureCache(object):
+    """ Caches the keyword arguments accepted by scheduled callables so that
+        `SchedulingQueue.add` doesn't call `inspect.getfullargspec` for every event.
+
+        Functions and bound methods are keyed by their code object, so every lambda
+        created from the same line of code shares an entry, and other callable
+        objects by their type. Both are weak references, and clock-native types
+        (Player, MethodCall) that accept any keyword skip introspection entirely.
+        Events are scheduled from several threads, so the cache and its counters
+        are updated under a lock.
+    """
+    native_types = (Player, MethodCall)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_code = weakref.WeakKeyDictionary()
+        self._by_type = weakref.WeakKeyDictionary()
+        self._native = {cls: (frozenset(), True) for cls in self.native_types}
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.fast_path = 0
+            self.uncached = 0
+
+    def __len__(self):
+        return len(self._by_code) + len(self._by_type)
+
+    def clear(self):
+        with self._lock:
+            self._by_code.clear()
+            self._by_type.clear()
+
+    def stats(self):
+        """ Returns the cache counters and hit rate (fast path lookups count as hits) """
+        with self._lock:
+            hits, misses, fast_path, uncached = self.hits, self.misses, self.fast_path, self.uncached
+        lookups = hits + misses + fast_path + uncached
+        return {
+            "hits": hits,
+            "misses": misses,
+            "fast_path": fast_path,
+            "uncached": uncached,
+            "size": len(self),
+            "hit_rate": ((hits + fast_path) / lookups) if lookups else 0.0,
+        }
+
+    @staticmethod
+    def introspect(item):
+        """ Returns (accepted keyword names, accepts **kwargs) using `inspect` """
+        try:
+            function = inspect.getfullargspec(item)
+        except TypeError:
+            function = inspect.getfullargspec(item.__call__)
+        return frozenset(function.args), function.varkw is not None
+
+    def get(self, item):
+        """ Returns (accepted keyword names, accepts **kwargs) for a callable """
+        item_type = type(item)
+        signature = self._native.get(item_type)
+        if signature is not None:
+            with self._lock:
+                self.fast_path += 1
+            return signature
+        if item_type is FunctionType or item_type is MethodType:
+            cache, key = self._by_code, getattr(item, "__code__", None)
+        else:
+            # Only cache instances whose __call__ is plain Python code (not e.g. functools.partial)
+            call = getattr(item_type, "__call__", None)
+            cache, key = self._by_type, (item_type if hasattr(call, "__code__") else None)
+        if key is None:
+            with self._lock:
+                self.uncached += 1
+            return self.introspect(item)
+        with self._lock:
+            signature = cache.get(key)
+            if signature is not None:
+                self.hits += 1
+                return signature
+            self.misses += 1
+        signature = self.introspect(item)
+        with self._lock:
+            cache[key] = signature
+        return signature
+
+
 class SchedulingQueue(object):
-    """Queue to store the event blocks to send to SuperCollider"""
+    """Queue to store the event blocks to send to SuperCollider
+
+    Blocks are kept in a binary heap ordered by beat, with a `beat -> QueueBlock`
+    index so that events scheduled on an existing beat are coalesced in O(1)
+    and insertion / removal of the next block is O(log n). The sorted view
+    used to iterate over the blocks is only rebuilt after blocks were added
+    or removed.
+    """
+
     def __init__(self, clock):
-        self.data = []
+        self._heap = []    # (beat, block) pairs, one per scheduled beat
+        self._blocks = {}  # beat -> QueueBlock
+        self._sorted = None  # blocks sorted with the next block last, None when outdated
+        self._lock = threading.Lock()
         self.clock = clock
+        self.signature_cache = CallableSignatureCache()
+
+    def _sorted_blocks(self):
+        with self._lock:
+            blocks = self._sorted
+            if blocks is None:
+                blocks = self._sorted = [block for _, block in sorted(self._heap, key=lambda x: x[0], reverse=True)]
+            return blocks
+
+    @property
+    def data(self):
+        """ Returns the queue blocks as a list sorted with the next block last
+            (the layout of the legacy list based queue) """
+        return list(self._sorted_blocks())
 
     def __repr__(self):
-        return "\n".join([str(item) for item in self.data]
-                        ) if len(self.data) > 0 else "[]"
+        data = self._sorted_blocks()
+        return "\n".join([str(item) for item in data]) if len(data) > 0 else "[]"
 
     def __iter__(self):
-        for x in self.data:
-            yield x
+        return iter(self._sorted_blocks())
 
     def __len__(self):
-        return len(self.data)
+        return len(self._heap)
 
     def add(self, item, beat, args=(), kwargs={}, is_priority=False):
         """ Adds a callable object to the queue at a specified beat, args and kwargs for the
             callable object must be in a list and dict.
         """
         # item must be callable to be schedule, so check args and kwargs are appropriate for it
-        try:
-            function = inspect.getfullargspec(item)
-        except TypeError:
-            function = inspect.getfullargspec(item.__call__)
-        # If the item can't take arbitrary keywords, check any kwargs are valid
-        if function.varkw is None:
-            for key in list(kwargs.keys()):
-                if key not in function.args:
-                    del kwargs[key]
-        # If the new event is before the next scheduled event,
-        # move it to the 'front' of the queue
-        if self.before_next_event(beat):
-            self.data.append(
-                QueueBlock(self, item, beat, args, kwargs, is_priority)
-            )
-            block = self.data[-1]
-        else:
-            # If the event is after the next scheduled event, work
-            # out its position in the queue
-            # need to be careful in case self.data changes size
-            for block in self.data:
+        if kwargs:
+            accepted, varkw = self.signature_cache.get(item)
+            # If the item can't take arbitrary keywords, check any kwargs are valid
+            if not varkw:
+                for key in list(kwargs.keys()):
+                    if key not in accepted:
+                        del kwargs[key]
+        with self._lock:
+            block = self._blocks.get(beat)
+            if block is not None:
                 # If another event is happening at the same time, schedule together
-                if beat == block.beat:
-                    block.add(item, args, kwargs, is_priority)
-                    break
-                # If the event is later than the next event, schedule it here
-                if beat > block.beat:
-                    try:
-                        i = self.data.index(block)
-                    except ValueError:
-                        i = 0
-                    self.data.insert(
-                        i,
-                        QueueBlock(self, item, beat, args, kwargs, is_priority)
-                    )
-                    block = self.data[i]
-                    break
+                block.add(item, args, kwargs, is_priority)
+            else:
+                block = QueueBlock(self, item, beat, args, kwargs, is_priority)
+                self._blocks[beat] = block
+                heapq.heappush(self._heap, (beat, block))
+                self._sorted = None
         # Tell any players about what queue item they are in
         if isinstance(item, Player):
             item.set_queue_block(block)
         return
 
     def clear(self):
-        while len(self.data):
-            del self.data[-1]
+        with self._lock:
+            self._heap = []
+            self._blocks = {}
+            self._sorted = None
         return
 
     def pop(self):
-        return self.data.pop() if len(self.data) > 0 else list()
+        with self._lock:
+            if len(self._heap) == 0:
+                return list()
+            beat, block = heapq.heappop(self._heap)
+            del self._blocks[beat]
+            self._sorted = None
+            return block
 
     def next(self):
-        if len(self.data) > 0:
-            try:
-                return self.data[-1].beat
-            except IndexError:
-                pass
-        return sys.maxsize
+        try:
+            return self._heap[0][0]
+        except IndexError:
+            return sys.maxsize
 
     def before_next_event(self, beat):
         try:
-            return beat < self.data[-1].beat
+            return beat < self._heap[0][0]
         except IndexError:
             return True
 
     def after_next_event(self, beat):
         try:
-            return beat >= self.data[-1].beat
+            return beat >= self._heap[0][0]
         except IndexError:
             return False
 
@@ -140,6 +241,10 @@ class QueueBlock(object):
         self.metro = self.clock.get_clock()
         self.beat = t
         self.time = 0
+        # Look-ahead rendering: Player -> ((event_n, event_index), [messages]) and
+        # items called when the block is sent rather than when it is rendered
+        self.rendered = {}
+        self.on_send = []
         self.add(obj, args, kwargs, is_priority)
 
     @classmethod
@@ -179,8 +284,43 @@ class QueueBlock(object):
         return
 
     def send_osc_messages(self):
-        """ Sends all compiled osc messages to the SuperCollider server """
-        return list(map(self.server.sendOSC, self.osc_messages))
+        """ Sends all compiled osc messages to the SuperCollider server (see
+            `ServerManager.send_osc_messages`) """
+        return self.server.send_osc_messages(self.osc_messages)
+
+    def set_rendered(self, player, event, messages):
+        """ Stores the event (event_n, event_index) rendered ahead of time by `player` and its messages """
+        self.rendered[player] = (event, messages)
+        return
+
+    def cancel(self, player):
+        """ Removes the messages rendered by `player` from this block """
+        try:
+            event, messages = self.rendered.pop(player)
+        except KeyError:
+            return None
+        cancelled = set(map(id, messages))
+        self.osc_messages = [msg for msg in self.osc_messages if id(msg) not in cancelled]
+        return event
+
+    def rerender(self, player):
+        """ Replaces the messages rendered by `player` with ones using its current attributes """
+        event = self.cancel(player)
+        if event is not None:
+            start = len(self.osc_messages)
+            player.rerender(self, *event)
+            self.set_rendered(player, event, self.osc_messages[start:])
+        return
+
+    def restamp(self, time):
+        """ Moves the time tag of every rendered message when the block's time changes """
+        delta = time - self.time
+        if delta:
+            for msg in self.osc_messages:
+                if hasattr(msg, "timetag"):
+                    msg.timetag += delta
+        self.time = time
+        return
 
     def players(self):
         return [item for level in self.events[1:3] for item in level]
@@ -0,0 +1,196 @@
+"""
+Timing telemetry for the TempoClock.
+
+When enabled with `Clock.enable_stats()`, every QueueBlock run by the clock
+records how late it was triggered, how long it took to process, how many OSC
+messages it produced and how long each of its items took. Values go into
+HDR-style histograms (log-linear buckets with a fixed relative precision) and
+into a short window of recent values for rolling percentiles. `Clock.stats()`
+returns a summary and `Clock.reset_stats()` starts again from scratch.
+"""
+import collections
+import itertools
+import threading
+
+from operator import attrgetter, itemgetter
+from types import CodeType, FunctionType, MethodType
+
+
+class Histogram:
+    """HDR-style histogram of non-negative values.
+
+    Values are stored as integer multiples of `unit`. Below 2**bits they are
+    counted exactly, above that each power of two is split into 2**(bits-1)
+    buckets so the relative error stays below 2**-(bits-1)."""
+
+    def __init__(self, unit=1e-6, bits=7, window=1024):
+        self.unit = unit
+        self.bits = bits
+        self.size = 64 << bits
+        self.recent = collections.deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * self.size
+        self.recent.clear()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        return
+
+    def record(self, value):
+        self.record_many((value,))
+        return
+
+    def record_many(self, values):
+        counts, bits = self.counts, self.bits
+        # Count the raw integer values first: there are far fewer distinct values than samples
+        for n, count in collections.Counter(map(int, map((1.0 / self.unit).__mul__, values))).items():
+            if n < 0:
+                n = 0
+            shift = n.bit_length() - bits
+            if shift > 0:
+                n = (shift << bits) + (n >> shift)
+            counts[n] += count
+        self.count += len(values)
+        self.total += sum(values)
+        self.max = max(self.max, max(values, default=0.0))
+        self.recent.extend(values)
+        return
+
+    def bucket_value(self, index):
+        """ Returns the value at the middle of bucket `index` """
+        shift = index >> self.bits
+        if shift == 0:
+            return index * self.unit
+        n = (index & ((1 << self.bits) - 1)) << shift
+        return (n + (1 << (shift - 1))) * self.unit
+
+    def percentile(self, p):
+        """ Returns the value below which `p` percent of all recorded values fall """
+        if self.count == 0:
+            return None
+        target = max(1, int(round(p / 100.0 * self.count)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count:
+                seen += count
+                if seen >= target:
+                    return min(self.bucket_value(index), self.max)
+        return self.max
+
+    def rolling_percentile(self, p):
+        """ Returns the `p`th percentile of the most recent values """
+        values = sorted(self.recent)
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "max": self.max if self.count else None,
+            "percentiles": {p: self.percentile(p) for p in percentiles},
+            "rolling": {p: self.rolling_percentile(p) for p in percentiles},
+        }
+
+
+class ClockStats:
+    """Timing statistics of the blocks run by a TempoClock.
+
+    `record_block` only appends to a list: the values are added to the
+    histograms in batches, every `flush_size` blocks or when `summary` is
+    called."""
+
+    flush_size = 256
+
+    def __init__(self, window=1024):
+        self._lock = threading.Lock()
+        self.lateness = Histogram(unit=1e-6, window=window)  # beats
+        self.duration = Histogram(unit=1e-7, window=window)  # seconds
+        self.messages = Histogram(unit=1, window=window)  # OSC messages per block
+        self.item_cost = Histogram(unit=1e-7, window=window)  # seconds
+        self._pending = []
+        self._by_code = {FunctionType: attrgetter("__code__"), MethodType: attrgetter("__func__.__code__")}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._pending = []
+            self.blocks = 0
+            self.osc_messages = 0
+            self.items = {}  # item name -> [calls, total seconds]
+            for histogram in (self.lateness, self.duration, self.messages, self.item_cost):
+                histogram.reset()
+        return
+
+    def record_block(self, lateness, duration, messages, item_costs):
+        """ Adds a block: lateness in beats, duration in seconds, number of OSC messages
+            and a list of (item, seconds) """
+        with self._lock:
+            self._pending.append((lateness, duration, messages, item_costs))
+            full = len(self._pending) >= self.flush_size
+        if full:
+            self.flush()
+        return
+
+    def flush(self):
+        """ Adds the pending blocks to the histograms """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            lateness, duration, messages, item_costs = zip(*pending)
+            self.blocks += len(pending)
+            self.osc_messages += sum(messages)
+            self.lateness.record_many(lateness)
+            self.duration.record_many(duration)
+            self.messages.record_many(messages)
+            pairs = list(itertools.chain.from_iterable(item_costs))
+            objects = list(map(itemgetter(0), pairs))
+            costs = list(map(itemgetter(1), pairs))
+            totals = {}
+            for obj, cost in zip(objects, costs):
+                totals[obj] = totals.get(obj, 0.0) + cost
+            # Items are kept by name, so that stopped Players and lambdas are not kept alive,
+            # functions being named after their code object
+            items, by_code = self.items, self._by_code
+            for obj, calls in collections.Counter(objects).items():
+                code = by_code.get(type(obj))
+                key = item_name(obj if code is None else code(obj))
+                entry = items.get(key)
+                if entry is None:
+                    items[key] = [calls, totals[obj]]
+                else:
+                    entry[0] += calls
+                    entry[1] += totals[obj]
+            self.item_cost.record_many(costs)
+        return
+
+    def summary(self, top=10):
+        self.flush()
+        with self._lock:
+            slowest = sorted(self.items.items(), key=lambda x: x[1][1], reverse=True)[:top]
+            return {
+                "blocks": self.blocks,
+                "osc_messages": self.osc_messages,
+                "lateness_beats": self.lateness.summary(),
+                "block_duration": self.duration.summary(),
+                "messages_per_block": self.messages.summary(),
+                "item_cost": self.item_cost.summary(),
+                "items": {
+                    name: {"calls": calls, "total": total, "mean": total / calls}
+                    for name, (calls, total) in slowest
+                },
+            }
+
+
+def item_name(item):
+    """ Returns a short name for a scheduled object (or code object) e.g. 'Player(p1)' """
+    if isinstance(item, CodeType):
+        return getattr(item, "co_qualname", item.co_name)
+    name = item.__dict__.get("id") if hasattr(item, "__dict__") else None
+    if name is not None:
+        return "{}({})".format(type(item).__name__, name)
+    return getattr(item, "__qualname__", None) or type(item).__name__
@@ -0,0 +1,134 @@
+"""
+Time sources used by the TempoClock.
+
+Every time reading made by the clock (and by TimeVars, QueueBlocks and Players
+through it) goes through a time source, which has three methods:
+
+- `time()` returns seconds on the wall-clock timeline used for OSC time tags
+- `sleep(seconds)` waits for `seconds` on that timeline
+- `real_seconds(seconds)` converts a duration on that timeline into real seconds,
+  used to bound the waits of the scheduling thread
+
+`RealTimeSource` is the default: it reads the monotonic clock and adds a single
+wall-clock anchor taken when it is created, so that OSC time tags stay
+consistent even if the system clock is adjusted while playing.
+
+`SimulatedTimeSource` only moves when told to (`advance` / `set`), which lets
+tests and benchmarks step the clock exactly with `Clock.step(beats)`.
+
+`ScaledTimeSource` runs another time source `rate` times faster or slower.
+"""
+import threading
+import time
+
+
+class TimeSource:
+    """Base class: the system clock."""
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+        return
+
+    def real_seconds(self, seconds):
+        """ Returns the number of real seconds elapsed while `seconds` pass on this source """
+        return seconds
+
+    def __repr__(self):
+        return "<{}>".format(type(self).__name__)
+
+
+class RealTimeSource(TimeSource):
+    """Monotonic clock anchored to the wall clock once."""
+
+    def __init__(self):
+        self.resync()
+
+    def resync(self):
+        """ Takes a new wall-clock anchor e.g. after the system clock was corrected """
+        self.anchor = time.time() - time.monotonic()
+        return
+
+    def time(self):
+        return self.anchor + time.monotonic()
+
+
+class SimulatedTimeSource(TimeSource):
+    """Time that only moves when `advance` or `set` is called.
+
+    `sleep` advances the time instead of waiting, so code sleeping on this
+    source runs as fast as possible."""
+
+    def __init__(self, start=0.0):
+        self._lock = threading.Lock()
+        self._now = float(start)
+
+    def time(self):
+        return self._now
+
+    def advance(self, seconds):
+        """ Moves the time forward by `seconds` and returns the new time """
+        if seconds < 0:
+            raise ValueError("Cannot move a SimulatedTimeSource backwards")
+        with self._lock:
+            self._now += seconds
+            return self._now
+
+    def set(self, now):
+        """ Moves the time forward to `now` """
+        with self._lock:
+            if now < self._now:
+                raise ValueError("Cannot move a SimulatedTimeSource backwards")
+            self._now = float(now)
+        return
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.advance(seconds)
+        return
+
+    def real_seconds(self, seconds):
+        return 0.0
+
+
+class ScaledTimeSource(TimeSource):
+    """Runs `source` (a RealTimeSource by default) `rate` times faster."""
+
+    def __init__(self, rate=1.0, source=None):
+        self.source = source if source is not None else RealTimeSource()
+        self._origin = self.source.time()
+        self._scaled_origin = self._origin
+        self.rate = 1.0
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        """ Changes the rate without making the time jump """
+        if rate <= 0:
+            raise ValueError("ScaledTimeSource rate must be positive")
+        now = self.time()
+        self._origin = self.source.time()
+        self._scaled_origin = now
+        self.rate = float(rate)
+        return
+
+    def time(self):
+        return self._scaled_origin + (self.source.time() - self._origin) * self.rate
+
+    def sleep(self, seconds):
+        self.source.sleep(seconds / self.rate)
+        return
+
+    def real_seconds(self, seconds):
+        return self.source.real_seconds(seconds / self.rate)
+
+
+def get_time_source(name, **kwargs):
+    """ Returns a new time source from its settings name: 'real', 'simulated' or 'scaled' """
+    sources = {"real": RealTimeSource, "simulated": SimulatedTimeSource, "scaled": ScaledTimeSource}
+    try:
+        return sources[name](**kwargs)
+    except KeyError:
+        raise ValueError("Unknown time source {!r}, use one of {}".format(name, ", ".join(sources)))
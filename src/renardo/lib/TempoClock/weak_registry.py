@@ -0,0 +1,137 @@
+"""
+Hashed registries used by the TempoClock to keep track of scheduled objects.
+
+The clock used to store every scheduled object in plain lists (`Clock.items`,
+`Clock.playing`), checked with linear `in` tests and never emptied: one-shot
+callables scheduled with `Clock.future` stayed referenced for the whole
+session. These registries are keyed by `id()` and only hold weak references,
+so an object is dropped as soon as nothing else (e.g. the SchedulingQueue)
+keeps it alive. `ScheduledItems` also counts the pending calls of each object
+so that the clock can forget it once its last call has run.
+"""
+import threading
+import weakref
+
+
+class WeakRegistry:
+    """Insertion ordered set of objects compared by identity and held weakly.
+
+    Objects that cannot be weakly referenced (e.g. method-wrappers) are kept
+    with a strong reference until they are removed explicitly."""
+
+    def __init__(self, iterable=()):
+        self._refs = weakref.WeakValueDictionary()  # id -> object
+        self._strong = {}  # id -> object that does not support weak references
+        self._lock = threading.RLock()
+        for obj in iterable:
+            self.add(obj)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def _get(self, key):
+        obj = self._refs.get(key)
+        return obj if obj is not None else self._strong.get(key)
+
+    def add(self, obj):
+        with self._lock:
+            key = id(obj)
+            if self._get(key) is obj:
+                return
+            try:
+                self._refs[key] = obj
+            except TypeError:
+                self._strong[key] = obj
+        return
+
+    def discard(self, obj):
+        with self._lock:
+            key = id(obj)
+            if self._refs.get(key) is obj:
+                del self._refs[key]
+            elif self._strong.get(key) is obj:
+                del self._strong[key]
+        return
+
+    def remove(self, obj):
+        """ Like `list.remove`, raises ValueError if `obj` is not registered """
+        if obj not in self:
+            raise ValueError("{!r} is not in the registry".format(obj))
+        self.discard(obj)
+        return
+
+    def clear(self):
+        with self._lock:
+            self._refs.clear()
+            self._strong.clear()
+        return
+
+    def __contains__(self, obj):
+        return self._get(id(obj)) is obj
+
+    def __iter__(self):
+        with self._lock:
+            items = list(self._refs.values()) + list(self._strong.values())
+        return iter(items)
+
+    def __len__(self):
+        return len(self._refs) + len(self._strong)
+
+    def __bool__(self):
+        return len(self) > 0
+
+
+class ScheduledItems(WeakRegistry):
+    """WeakRegistry of the objects waiting in the clock's SchedulingQueue.
+
+    `add` is called for each `TempoClock.schedule` and `release` once the
+    matching QueueObj has been run: an object is removed when it has no call
+    left in the queue, unless it is listed in `keep` (e.g. `Clock.playing`)."""
+
+    def __init__(self, keep=()):
+        WeakRegistry.__init__(self)
+        self.keep = keep
+        self._pending = {}  # id -> number of calls in the queue
+
+    def add(self, obj):
+        with self._lock:
+            key = id(obj)
+            if self._get(key) is not obj:
+                # New object, or a dead object's id reused by this one
+                self._pending[key] = 0
+                WeakRegistry.add(self, obj)
+            self._pending[key] = self._pending.get(key, 0) + 1
+        return
+
+    def release(self, obj):
+        """ Called after one scheduled call of `obj` was run """
+        with self._lock:
+            key = id(obj)
+            if self._get(key) is not obj:
+                return
+            count = self._pending.get(key, 1) - 1
+            if count > 0:
+                self._pending[key] = count
+                return
+            self._pending.pop(key, None)
+            if obj not in self.keep:
+                WeakRegistry.discard(self, obj)
+        return
+
+    def pending(self, obj):
+        """ Returns the number of calls of `obj` waiting in the queue """
+        key = id(obj)
+        return self._pending.get(key, 0) if self._get(key) is obj else 0
+
+    def discard(self, obj):
+        with self._lock:
+            if obj in self:
+                self._pending.pop(id(obj), None)
+            WeakRegistry.discard(self, obj)
+        return
+
+    def clear(self):
+        with self._lock:
+            WeakRegistry.clear(self)
+            self._pending.clear()
+        return
@@ -222,7 +222,7 @@ class TimeVar(object):
         """ Returns the current beat value """
         # Return elapsed time in seconds if get_seconds flag is True
         if self.get_seconds is True:
-            return float(self.metro.time)
+            return float(self.metro.get_time() - self.metro.start_time)
         # Else return the beat
         if beat is None:
             beat = self.metro.now()
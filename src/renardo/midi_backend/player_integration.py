@@ -10,61 +10,98 @@ import mido
 from typing import Dict, Any, Optional, List, Union
 
 from renardo.lib.Player.player import Player
+from renardo.lib.Player.output_backends import OutputBackend, register_output_backend
 from renardo.lib.Patterns import Pattern, PGroup
 from renardo.midi_backend.midi_instrument import MidiInstrument, MidiProxy
 from renardo.midi_backend.midi_scheduler import midi_clock
 
-# Function to add to Player class
-def player_midi_methods():
+def _midi_note_from_degree(degree, octave=4):
     """
-    Add MIDI-specific methods to the Player class.
-    This allows Player objects to handle MIDI instruments.
+    Convert a degree value to a MIDI note number.
     
+    Args:
+        degree: Degree value (can be int, note name, etc.)
+        octave: Default octave if not specified in degree
+        
     Returns:
-        dict: Dictionary of method name to function mappings
+        int: MIDI note number (0-127)
     """
-    # Function to handle note-to-midi-note conversion
-    def _midi_note_from_degree(degree, octave=4):
-        """
-        Convert a degree value to a MIDI note number.
+    # If it's already a MIDI note number
+    if isinstance(degree, (int, float)) and 0 <= degree <= 127:
+        return int(degree)
         
-        Args:
-            degree: Degree value (can be int, note name, etc.)
-            octave: Default octave if not specified in degree
+    # If it's a note name like 'C4'
+    if isinstance(degree, str):
+        try:
+            # Extract note name and octave
+            note_name = ''.join(c for c in degree if not c.isdigit())
+            octave_part = ''.join(c for c in degree if c.isdigit())
+            if octave_part:
+                octave = int(octave_part)
             
-        Returns:
-            int: MIDI note number (0-127)
-        """
-        # If it's already a MIDI note number
-        if isinstance(degree, (int, float)) and 0 <= degree <= 127:
-            return int(degree)
+            # Note values in semitones from C
+            note_values = {'C': 0, 'C#': 1, 'Db': 1, 'D': 2, 'D#': 3, 'Eb': 3,
+                           'E': 4, 'F': 5, 'F#': 6, 'Gb': 6, 'G': 7, 'G#': 8,
+                           'Ab': 8, 'A': 9, 'A#': 10, 'Bb': 10, 'B': 11}
             
-        # If it's a note name like 'C4'
-        if isinstance(degree, str):
-            try:
-                # Extract note name and octave
-                note_name = ''.join(c for c in degree if not c.isdigit())
-                octave_part = ''.join(c for c in degree if c.isdigit())
-                if octave_part:
-                    octave = int(octave_part)
-                
-                # Note values in semitones from C
-                note_values = {'C': 0, 'C#': 1, 'Db': 1, 'D': 2, 'D#': 3, 'Eb': 3,
-                               'E': 4, 'F': 5, 'F#': 6, 'Gb': 6, 'G': 7, 'G#': 8,
-                               'Ab': 8, 'A': 9, 'A#': 10, 'Bb': 10, 'B': 11}
-                
-                if note_name in note_values:
-                    return note_values[note_name] + (octave + 1) * 12
-            except:
-                pass
-                
-        # If it's a scale degree, map to MIDI note in the specified octave
-        if isinstance(degree, (int, float)):
-            return int(degree) + (octave + 1) * 12
+            if note_name in note_values:
+                return note_values[note_name] + (octave + 1) * 12
+        except:
+            pass
             
-        # Default to middle C if conversion fails
-        return 60
+    # If it's a scale degree, map to MIDI note in the specified octave
+    if isinstance(degree, (int, float)):
+        return int(degree) + (octave + 1) * 12
+        
+    # Default to middle C if conversion fails
+    return 60
+
+
+class MidiBackend(OutputBackend):
+    """Schedules a Player's notes on the output port of its MidiInstrument with the MIDI clock"""
+
+    name = "midi"
+    # Degrees are MIDI notes or note names, not degrees of the Player's scale
+    needs_header = False
+
+    def __init__(self, player, instrument=None):
+        OutputBackend.__init__(self, player, instrument)
+        self.midi_instrument = instrument.instrument
+
+    def emit(self, packets, timestamp):
+        player = self.player
+        beat = player.main_event_clock.now()
+        for i, packet in enumerate(packets):
+            degree = packet.get('degree')
+
+            # Skip rest notes (None values)
+            if degree is None:
+                continue
+
+            midi_clock.schedule_note(
+                self.midi_instrument.output,
+                note=_midi_note_from_degree(degree, packet.get('oct', 4)),
+                velocity=int(packet.get('amp', 0.8) * 127),
+                channel=packet.get('channel', self.midi_instrument.channel),
+                beat=beat,
+                duration=packet.get('sus', 1.0),
+                note_id=f"{player.id}_{player.event_n}_{i}" if len(packets) > 1 else f"{player.id}_{player.event_n}"
+            )
+        return None
+
+
+register_output_backend("MidiProxy", MidiBackend)
+
+
+# Function to add to Player class
+def player_midi_methods():
+    """
+    Add MIDI-specific methods to the Player class.
+    This allows Player objects to handle MIDI instruments.
     
+    Returns:
+        dict: Dictionary of method name to function mappings
+    """
     # Original Player.__rshift__ method
     original_rshift = Player.__rshift__
     
@@ -90,6 +127,7 @@ def player_midi_methods():
             
             # Standard Player update with the degree and kwargs
             self.update_args_and_start(other.name, other.degree, **other.kwargs)
+            self.bind_output_backend(other)
             
             # Call any attached methods
             for method, args in other.methods:
@@ -124,48 +162,8 @@ def player_midi_methods():
         Returns:
             None
         """
-        # Check if this player has a MIDI instrument
-        if hasattr(self, 'midi_instrument') and isinstance(self.midi_instrument, MidiInstrument):
-            # Get the note to play
-            degree = event.get('degree')
-            
-            # Skip rest notes (None values)
-            if degree is None:
-                return None
-                
-            # Convert to MIDI note number
-            octave = event.get('oct', 4)
-            
-            # Handle pattern groups
-            if isinstance(degree, PGroup):
-                # Schedule each note in the group
-                for i, note in enumerate(degree):
-                    midi_note = _midi_note_from_degree(note, octave)
-                    # Schedule the note
-                    midi_clock.schedule_note(
-                        self.midi_instrument.output,
-                        note=midi_note,
-                        velocity=int(event.get('amp', 0.8) * 127),
-                        channel=event.get('channel', self.midi_instrument.channel),
-                        beat=self.main_event_clock.now(),
-                        duration=event.get('sus', 1.0),
-                        note_id=f"{self.id}_{self.event_n}_{i}"
-                    )
-            else:
-                # Schedule a single note
-                midi_note = _midi_note_from_degree(degree, octave)
-                midi_clock.schedule_note(
-                    self.midi_instrument.output,
-                    note=midi_note,
-                    velocity=int(event.get('amp', 0.8) * 127),
-                    channel=event.get('channel', self.midi_instrument.channel),
-                    beat=self.main_event_clock.now(),
-                    duration=event.get('sus', 1.0),
-                    note_id=f"{self.id}_{self.event_n}"
-                )
-                
-            return None
-        else:
+        # MIDI instruments are played by the MidiBackend bound in midi_rshift
+        if not (hasattr(self, 'midi_instrument') and isinstance(self.midi_instrument, MidiInstrument)):
             # Before falling back to the original method, handle special cases
 
             # Check if this is a MIDI instrument name that we know about
@@ -175,8 +173,7 @@ def player_midi_methods():
                 # This is a MIDI instrument name - skip the OSC message
                 return None
 
-            # Fall back to original method for regular SC instruments
-            return original_send_osc(self, event, index, timestamp, verbose, **kwargs)
+        return original_send_osc(self, event, index, timestamp, verbose, **kwargs)
     
     # Original Player.stop method
     original_stop = Player.stop
@@ -319,6 +319,7 @@ def set_main_clock(clock):
     assert isinstance(clock, TempoClock)
     for item in (TimeVar, Player, MidiIn):
         item.set_clock(clock)
+    TempoClock.server.set_clock(clock)
     # clock.add_method(_convert_json_bpm)
     return
 
@@ -328,6 +329,8 @@ def set_server_manager(serv):
     """
     assert isinstance(serv, ServerManager)
     TempoClock.set_server(serv)
+    if Player.main_event_clock is not None:
+        serv.set_clock(Player.main_event_clock)
     serv.update_synthdef_dict(SynthDefs)
 
     return
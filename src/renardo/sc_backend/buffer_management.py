@@ -24,6 +24,7 @@ class Buffer:
         self.bufnum = int(buffer_num)  # Keep bufnum for backward compatibility
         self.buffer_num = int(buffer_num)  # New style naming
         self.channels = channels
+        self.synthdef = "play1" if channels == 1 else "play2"  # SynthDef playing the buffer
         self.fn = str(sample_file.path) if sample_file else ""  # Keep fn for backward compatibility
 
     def __repr__(self):
@@ -46,6 +47,9 @@ class Buffer:
 nil = Buffer(None, 0)
 
 class BufferManager:
+    # Maximum number of (symbol, spack, index) resolutions cached
+    max_resolved = 4096
+
     def __init__(self, server, sample_library, paths=None):
         self._server = server
         self._max_buffers = server.max_buffers
@@ -59,6 +63,10 @@ class BufferManager:
         self._buffers: Dict[int, Buffer] = {}  # number -> Buffer
         self._path_to_buffer: Dict[str, Buffer] = {}  # path -> Buffer
 
+        # (symbol, spack, index) -> (Buffer, synthdef name), nil for samples not found
+        self._resolved: Dict[tuple, tuple] = {}
+        self._resolved_versions = None  # (sample library version, settings version)
+
         # Set up sample pack library paths
         self._sample_library = sample_library
         if paths:
@@ -73,15 +81,50 @@ class BufferManager:
 
     def get_buffer_from_symbol(self, symbol: str, spack: int = 0, index: int = 0) -> Buffer:
         """Get a buffer by its symbol representation."""
+        return self.resolve(symbol, spack, index)[0]
+
+    def resolve(self, symbol: str, spack: int = 0, index: int = 0) -> tuple:
+        """
+        Get the buffer of a symbol and the name of the SynthDef playing it.
+
+        Results, including symbols without a sample, are cached until the
+        sample library is rescanned, the settings change or a buffer is freed.
+
+        Returns:
+            (Buffer, synthdef name) tuple, with the nil buffer if no sample is found
+        """
+        key = (symbol, spack, index)
+        versions = self._resolved_versions
+        if versions is None or versions[0] != self._sample_library.version or versions[1] != settings.version:
+            self.clear_cache()
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+        except TypeError:  # Unhashable index
+            return self._resolve(symbol, index)
+        if len(self._resolved) >= self.max_resolved:
+            self._resolved.clear()
+        resolved = self._resolved[key] = self._resolve(symbol, index)
+        return resolved
+
+    def _resolve(self, symbol: str, index: int) -> tuple:
+        """Find and allocate the buffer of a symbol without using the cache."""
         if symbol.isspace() or symbol=='.':
-            return nil
+            return nil, nil.synthdef
 
         # Find the sample using SamplePackLibrary
         found_sample = self._sample_library._find_sample(symbol, index)
         if found_sample is None:
-            return nil
+            return nil, nil.synthdef
+
+        buffer = self._allocate(found_sample)
+        return buffer, buffer.synthdef
 
-        return self._allocate(found_sample)
+    def clear_cache(self):
+        """Forget the buffers found for symbols, e.g. after adding samples to the loop paths."""
+        self._resolved.clear()
+        self._resolved_versions = (self._sample_library.version, settings.version)
 
     def _allocate(self, sample_file, force=False) -> Buffer:
         """Allocate and load a sample file into a SuperCollider buffer."""
@@ -119,6 +162,7 @@ class BufferManager:
         del self._buffers[buffer_num]
         if path_str in self._path_to_buffer:
             del self._path_to_buffer[path_str]
+        self.clear_cache()
 
         # Free on server
         self._server.bufferFree(buffer_num)
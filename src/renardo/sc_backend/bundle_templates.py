@@ -0,0 +1,108 @@
+"""
+Compiled bundles of notes.
+
+The notes of a Player have bundles with the same structure: the same
+messages, SynthDef, effect and argument names, differing only in node IDs,
+bus, time tag and the values of the arguments. A `BundleTemplate` keeps the
+bytes of one of these bundles with the offsets of the values that change,
+and makes the bundle of another note with the same structure by writing its
+values at these offsets with `struct.pack_into`, into a copy of the bytes.
+
+`ServerManager.get_synth_bundle` records a template while it encodes the
+first bundle of each structure (see `ServerManager.bundle_templates`).
+"""
+import struct
+
+from renardo.sc_backend.osc_encoder import BUNDLE_HEADER_SIZE, EncodedBundle, argument_offsets
+
+_pack_int = struct.Struct(">i").pack_into
+_pack_float = struct.Struct(">f").pack_into
+
+# The node, group and bus arguments of /s_new messages
+S_NEW_SLOTS = ((1, "node"), (3, "group"), (5, "bus"))
+
+
+class BundleTemplate:
+    """The encoded messages of a note's bundle and where to write its variable values.
+
+    Slots are given to `record` as (argument index, slot) tuples, the slot being:
+
+    - "node", "group" or "bus": a node ID (got in order), the note's group or bus
+    - ("key", key): `float(packet[key])`
+    - ("default", key, default): `float(packet.get(key, default))`
+    - ("max_sus", key): `float(packet[key] * 8)`
+    """
+
+    def __init__(self):
+        self.body = b""  # the encoded messages, without the bundle header
+        self.count = 0
+        self.nodes = []
+        self.groups = []
+        self.buses = []
+        self.keys = []
+        self.defaults = []
+        self.max_sus = []
+        # False if a message couldn't be recorded, e.g. an argument of an unexpected type
+        self.valid = True
+
+    def record(self, start, address, args, slots=()):
+        """ Records the slots of a message added at `start` in the encoder's buffer """
+        if any(type(arg) not in (str, int, float) for arg in args):
+            self.valid = False
+            return
+        offsets = argument_offsets(address, args)
+        start += BUNDLE_HEADER_SIZE
+        for index, slot in slots:
+            offset = start + offsets[index]
+            if slot in ("node", "group", "bus"):
+                if type(args[index]) is not int:
+                    self.valid = False
+                {"node": self.nodes, "group": self.groups, "bus": self.buses}[slot].append(offset)
+            else:
+                if type(args[index]) is not float:
+                    self.valid = False
+                kind, key = slot[0], slot[1]
+                if kind == "default":
+                    self.defaults.append((offset, key, slot[2]))
+                elif kind == "max_sus":
+                    self.max_sus.append((offset, key))
+                else:
+                    self.keys.append((offset, key))
+        self.count += 1
+        return
+
+    def compile(self, bundle):
+        """ Keeps the bytes of the recorded messages, encoded in `bundle`. Returns self if
+            every message could be recorded, else None """
+        if not self.valid or bundle.count != self.count:
+            return None
+        self.body = bytes(bundle.data[BUNDLE_HEADER_SIZE:])
+        self.nodes, self.groups, self.buses = tuple(self.nodes), tuple(self.groups), tuple(self.buses)
+        self.keys, self.defaults, self.max_sus = tuple(self.keys), tuple(self.defaults), tuple(self.max_sus)
+        return self
+
+    def render(self, server, packet, timestamp):
+        """ Returns the bundle of `packet`, getting its group, bus and node IDs from `server`.
+            Returns None, without getting any ID, if a value can't be converted to float """
+        bundle = EncodedBundle(time=timestamp)
+        data = bundle.data
+        data += self.body
+        try:
+            for offset, key in self.keys:
+                _pack_float(data, offset, float(packet[key]))
+            for offset, key, default in self.defaults:
+                _pack_float(data, offset, float(packet.get(key, default)))
+            for offset, key in self.max_sus:
+                _pack_float(data, offset, float(packet[key] * 8))
+        except (TypeError, ValueError):
+            return None
+        group = server.nextnodeID()
+        for offset in self.groups:
+            _pack_int(data, offset, group)
+        bus = server.nextbusID(timestamp, packet["sus"], group)
+        for offset in self.buses:
+            _pack_int(data, offset, bus)
+        for offset in self.nodes:
+            _pack_int(data, offset, server.nextnodeID())
+        bundle.count = self.count
+        return bundle
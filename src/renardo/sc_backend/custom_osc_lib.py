@@ -311,6 +311,12 @@ class OSCMessage(object):
         
         return binary
 
+    def getBuffer(self):
+        """Returns the binary representation of the message as an object
+        supporting the buffer protocol, to be sent as it is
+        """
+        return self.getBinary()
+
     def __repr__(self):
         """Returns a string containing the decode Message
         """
@@ -1194,7 +1200,7 @@ class OSCClient(object):
         
         try:
             self._ensureConnected(address)
-            self.socket.sendall(msg.getBinary())
+            self.socket.sendall(msg.getBuffer())
             
             if self.client_address:
                 self.socket.connect(self.client_address)
@@ -1228,7 +1234,7 @@ class OSCClient(object):
             raise OSCClientError("Timed out waiting for file descriptor")
         
         try:
-            self.socket.sendall(msg.getBinary())
+            self.socket.sendall(msg.getBuffer())
         except socket.error as e:
             raise OSCClientError("while sending: %s" % str(e))
 
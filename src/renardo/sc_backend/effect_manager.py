@@ -9,6 +9,7 @@ class EffectManager(dict):
         self.all_kw = []
         self.defaults = {}
         self.order = {N: [] for N in range(3)}
+        self.version = 0  # Incremented when effects are added or reloaded
 
     def __repr__(self):
         return "\n".join([repr(value) for value in self.values()])
@@ -36,6 +37,7 @@ class EffectManager(dict):
                 self.all_kw.append(arg)
             # Store the default value
             self.defaults[arg] = sceffect.arguments[arg]
+        self.version += 1
         return self[sceffect.shortname]
 
     def kwargs(self):
@@ -56,6 +58,7 @@ class EffectManager(dict):
             effect.load_in_server_from_tempfile()
         StartSoundEffect()
         MakeSoundEffect()
+        self.version += 1
         return
 
 
@@ -0,0 +1,209 @@
+"""
+Node IDs and private buses of the notes sent to scsynth.
+
+The bundles of notes are made concurrently by the clock's block worker
+threads, each note getting a group, a node per SynthDef and effect, and a
+private 2-channel bus its nodes read from and write to.
+
+- A `NodeIDAllocator` hands out node IDs from ranges reserved by each
+  thread, so getting an ID only touches thread-local state and two threads
+  never get the same ID. The IDs a thread didn't use are given to the next
+  thread reserving a range once it ends, as blocks run in threads of their
+  own in the clock's "thread" executor mode.
+- A `BusPool` knows until when each bus is used: a note's group is freed by
+  its 'makeSound' node at its release time at the latest (see
+  `ServerManager.get_release_time`), or earlier when scsynth reports the end
+  of the group with /n_end (see `ServerManager.watch_node_ends`). Notes are
+  not given buses in the order they start (Player delays, look-ahead, block
+  workers), so a bus is only free once released before the clock's time
+  plus its latency, the earliest time a note still to come can start. A bus
+  is only given to another note once free, unless they are all in use: the
+  bus released first is then shared and `BusPool.exhausted` is incremented.
+"""
+import heapq
+import threading
+import time
+import weakref
+
+from collections import deque
+
+
+class _Holder:
+    """Lives as long as the thread-local state of a thread"""
+
+
+class NodeIDAllocator:
+    """Hands out scsynth node IDs from ranges of `range_size` IDs reserved by each thread"""
+
+    def __init__(self, start=1000, range_size=1024, max_id=2 ** 31 - 1):
+        self._lock = threading.Lock()
+        self.range_size = range_size
+        self.max_id = max_id
+        self.reset(start)
+
+    def reset(self, start=1000):
+        """ Drops the ranges of every thread. The next ID handed out is `start` + 1 """
+        with self._lock:
+            self.start = start
+            self._next_range = start + 1
+            self.ranges = 0  # ranges reserved since the reset
+            self._generation = getattr(self, "_generation", 0) + 1
+            self._spare = deque()  # (IDs iterator, end) left by the threads that ended
+            self._local = threading.local()
+        return
+
+    def next(self):
+        """ Returns a node ID that no other thread got since the last reset """
+        try:
+            return next(self._local.ids)
+        except (AttributeError, StopIteration):
+            return self._reserve()
+
+    def _reserve(self):
+        """ Gives the current thread the IDs left by a thread that ended, or reserves a new
+            range of IDs for it, and returns its first ID """
+        local = self._local
+        try:
+            ids, end = self._spare.popleft()
+        except IndexError:
+            with self._lock:
+                node = self._next_range
+                if node + self.range_size > self.max_id:
+                    node = self.start + 1
+                self._next_range = node + self.range_size
+                self.ranges += 1
+            end = node + self.range_size
+            ids = iter(range(node + 1, end))
+        else:
+            node = next(ids)
+        if getattr(local, "holder", None) is None:
+            local.holder = _Holder()
+        else:
+            local.finalizer.detach()
+        local.end, local.ids = end, ids
+        local.finalizer = weakref.finalize(local.holder, self._give_back, self._generation, ids, end)
+        local.finalizer.atexit = False
+        return node
+
+    def _give_back(self, generation, ids, end):
+        """ Keeps the IDs a thread didn't use once it ended, for the next thread reserving IDs.
+            Called when the thread-local state is dropped, so without taking the lock """
+        if generation == self._generation and ids.__length_hint__() > 0:
+            self._spare.append((ids, end))
+        return
+
+    @property
+    def last(self):
+        """ The last ID handed out to the current thread, or the start if none """
+        local = self._local
+        if not hasattr(local, "ids"):
+            return self.start
+        return local.end - local.ids.__length_hint__() - 1
+
+    def stats(self):
+        return {"reserved_to": self._next_range - 1, "ranges": self.ranges, "range_size": self.range_size,
+                "spare": len(self._spare)}
+
+
+class BusPool:
+    """The private buses of notes, from `first` to `end` in steps of `channels`, each used
+    by a note until its release time or until `release` is called with its group. `time`
+    returns the time of the clock the notes are played by"""
+
+    def __init__(self, first=4, end=100, channels=2, time=time.time):
+        self._lock = threading.Lock()
+        self.channels = channels
+        self.time = time
+        self.reset(first, end)
+
+    def reset(self, first=None, end=None, last=None):
+        """ Frees every bus. Buses are handed out in order, starting after `last` if given """
+        with self._lock:
+            if first is not None:
+                self.first = first
+            if end is not None:
+                self.end = end
+            buses = list(range(self.first, self.end - 1, self.channels))
+            if last is not None:
+                after = [bus for bus in buses if bus > last]
+                buses = after + buses[:len(buses) - len(after)]
+            self.free = deque(buses)
+            self.size = len(buses)
+            self.busy = []  # (release time, bus, allocation) heap, including released buses
+            self.holders = {}  # bus -> (allocation, group) of the buses in use
+            self.groups = {}  # group -> bus
+            self.last = self.first if last is None else last
+            self.allocated = 0
+            self.released = 0  # buses released by `release`, before their release time
+            self.exhausted = 0  # buses given to a note while still used by another one
+            self.peak = 0
+        return
+
+    def _pop(self):
+        """ Removes the first entry of the heap, returns its bus if still in use by the entry's note """
+        _, bus, allocation = heapq.heappop(self.busy)
+        holder = self.holders.get(bus)
+        if holder is None or holder[0] != allocation:
+            return None
+        del self.holders[bus]
+        self.groups.pop(holder[1], None)
+        return bus
+
+    def allocate(self, start, release, group=None, horizon=None):
+        """ Returns a bus free from the time `start` until the time `release`, used by `group`.
+            `horizon` is the earliest time a note still to be given a bus can start, the
+            clock's time by default """
+        if horizon is None:
+            horizon = self.time()
+        horizon = min(start, horizon)
+        with self._lock:
+            busy = self.busy
+            while busy and busy[0][0] <= horizon:
+                bus = self._pop()
+                if bus is not None:
+                    self.free.append(bus)
+            if self.free:
+                bus = self.free.popleft()
+            else:
+                # Every bus is in use: share the one released first
+                bus = None
+                while bus is None and busy:
+                    bus = self._pop()
+                if bus is None:
+                    raise RuntimeError("No private bus to allocate: the pool from bus {} to {} is empty".format(
+                        self.first, self.end))
+                self.exhausted += 1
+            self.allocated += 1
+            self.holders[bus] = (self.allocated, group)
+            if group is not None:
+                self.groups[group] = bus
+            heapq.heappush(busy, (release, bus, self.allocated))
+            self.peak = max(self.peak, len(self.holders))
+            self.last = bus
+        return bus
+
+    def release(self, group):
+        """ Frees the bus of `group`, e.g. when scsynth reports its end. Returns the bus or None """
+        with self._lock:
+            bus = self.groups.pop(group, None)
+            if bus is not None:
+                del self.holders[bus]
+                self.free.append(bus)
+                self.released += 1
+        return bus
+
+    def stats(self, now=None):
+        """ Returns the occupancy of the pool at the time `now` (defaults to the clock's time) """
+        now = self.time() if now is None else now
+        with self._lock:
+            in_use = sum(1 for release, bus, allocation in self.busy
+                         if release > now and self.holders.get(bus, (None,))[0] == allocation)
+            return {
+                "buses": self.size,
+                "in_use": in_use,
+                "reserved": len(self.holders),
+                "peak": self.peak,
+                "allocated": self.allocated,
+                "released": self.released,
+                "exhausted": self.exhausted,
+            }
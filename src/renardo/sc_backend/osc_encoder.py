@@ -0,0 +1,252 @@
+"""
+Encodes the OSC bundles of notes without intermediate objects.
+
+`OSCMessage.append` grows the message's bytes and typetags one argument at a
+time, and `OSCBundle.append` copies each message into the bundle again, so
+building a note's bundle (a dozen `/s_new` messages with tens of arguments)
+is quadratic in its size. An `OSCEncoder` writes the messages of a bundle
+straight into a reusable bytearray with `struct.pack_into` instead, using
+the cached padded encoding of strings (addresses, SynthDef and argument
+names), then copies them once into an `EncodedBundle`.
+
+An `EncodedBundle` is an `OSCBundle` holding its binary representation in
+its own bytearray: `getBuffer()` returns a memoryview of it that
+`OSCClient.send` gives to the socket without copying. The bytes are the
+same as those of an `OSCBundle` built from the same messages.
+
+`coalesce_bundles` nests the bundles sharing a time tag into outer bundles
+that fit in a datagram, so a clock block sends one datagram per time tag
+instead of one per note when `sc_backend.OSC_COALESCE_BUNDLES` is set.
+"""
+import struct
+import threading
+
+from renardo.sc_backend.custom_osc_lib import OSCArgument, OSCBundle, OSCString, OSCTimeTag
+
+BUNDLE_HEADER = OSCString("#bundle")
+BUNDLE_HEADER_SIZE = len(BUNDLE_HEADER) + 8  # "#bundle" and the time tag
+IP_UDP_HEADER_SIZE = 28  # IPv4 and UDP headers of a datagram
+
+_pack_int = struct.Struct(">i").pack_into
+_pack_float = struct.Struct(">f").pack_into
+_pack_size = struct.Struct(">i").pack
+
+_ZEROS = bytes(256)
+
+# Padded encodings of the strings sent so far, cleared when full
+_padded_strings = {}
+max_padded_strings = 4096
+
+
+def padded_string(value):
+    """ Returns the OSC encoding of the string `value` (zero padded to a multiple of 4 bytes) """
+    binary = _padded_strings.get(value)
+    if binary is None:
+        if len(_padded_strings) >= max_padded_strings:
+            _padded_strings.clear()
+        binary = _padded_strings[value] = OSCString(value)
+    return binary
+
+
+def argument_offsets(address, args):
+    """ Returns the offset of each argument of a message written by `OSCEncoder.add_message`
+        from the start of the message, for arguments that are str, int or float """
+    pos = 4 + len(padded_string(address)) + ((len(args) + 5) & ~3)
+    offsets = []
+    for arg in args:
+        offsets.append(pos)
+        pos += len(padded_string(arg)) if type(arg) is str else 4
+    return offsets
+
+
+class EncodedBundle(OSCBundle):
+    """An OSCBundle whose binary representation is kept in the `data` bytearray"""
+
+    def __init__(self, address="", time=0):
+        self.data = bytearray(BUNDLE_HEADER_SIZE)
+        self.data[:len(BUNDLE_HEADER)] = BUNDLE_HEADER
+        self.count = 0
+        self._timetag = 0
+        OSCBundle.__init__(self, address, time)
+
+    @property
+    def timetag(self):
+        return self._timetag
+
+    @timetag.setter
+    def timetag(self, time):
+        self._timetag = time
+        self.data[len(BUNDLE_HEADER):BUNDLE_HEADER_SIZE] = OSCTimeTag(time)
+
+    @property
+    def message(self):
+        """ The encoded messages of the bundle """
+        with memoryview(self.data) as view:
+            return bytes(view[BUNDLE_HEADER_SIZE:])
+
+    @message.setter
+    def message(self, binary):
+        self.data[BUNDLE_HEADER_SIZE:] = binary
+
+    @property
+    def typetags(self):
+        return "," + "b" * self.count
+
+    @typetags.setter
+    def typetags(self, typetags):
+        self.count = len(typetags) - 1
+
+    def __eq__(self, other):
+        """ Equal to the OSCBundles with the same timetag & content, encoded or not """
+        if not isinstance(other, OSCBundle):
+            return False
+        return (self.timetag == other.timetag) and (self.typetags == other.typetags) and (self.message == other.message)
+
+    def getBinary(self):
+        return bytes(self.data)
+
+    def getBuffer(self):
+        """ Returns a memoryview of the binary representation, valid until the bundle changes """
+        return memoryview(self.data)
+
+
+def nest_bundles(bundles, max_size):
+    """ Returns the datagrams sending `bundles`, which share a time tag: EncodedBundles nesting
+        as many of them as fit in `max_size` bytes, in order. A bundle too large to be nested
+        with another, or left alone in a datagram, is returned as it is """
+    chunks = []
+    chunk, size = None, 0
+    for bundle in bundles:
+        binary = bundle.getBuffer()
+        if BUNDLE_HEADER_SIZE + 4 + len(binary) > max_size:
+            chunks.append([(bundle, binary)])
+            chunk = None
+            continue
+        if chunk is None or size + 4 + len(binary) > max_size:
+            chunk, size = [], BUNDLE_HEADER_SIZE
+            chunks.append(chunk)
+        chunk.append((bundle, binary))
+        size += 4 + len(binary)
+    datagrams = []
+    for chunk in chunks:
+        if len(chunk) == 1:
+            datagrams.append(chunk[0][0])
+            continue
+        outer = EncodedBundle(time=chunk[0][0].timetag)
+        for bundle, binary in chunk:
+            outer.data += _pack_size(len(binary))
+            outer.data += binary
+        outer.count = len(chunk)
+        datagrams.append(outer)
+    return datagrams
+
+
+def coalesce_bundles(messages, max_size):
+    """ Returns the messages to send instead of `messages`, bundles sharing a time tag being
+        nested (see `nest_bundles`) and sent where the first of them was. Messages other than
+        bundles, and bundles with an address (e.g. MIDI), are returned as they are """
+    groups = {}
+    items = []
+    for message in messages:
+        if isinstance(message, OSCBundle) and not message.address:
+            group = groups.get(message.timetag)
+            if group is None:
+                group = groups[message.timetag] = []
+                items.append(group)
+            group.append(message)
+        else:
+            items.append(message)
+    datagrams = []
+    for item in items:
+        if type(item) is not list:
+            datagrams.append(item)
+        elif len(item) == 1:
+            datagrams.append(item[0])
+        else:
+            datagrams.extend(nest_bundles(item, max_size))
+    return datagrams
+
+
+class OSCEncoder:
+    """Writes OSC messages into a reusable bytearray. Not thread-safe: use `get_encoder()`"""
+
+    def __init__(self, size=4096):
+        self.buffer = bytearray(size)
+        self.size = 0  # bytes written
+        self.count = 0  # messages written
+
+    def reset(self):
+        self.size = 0
+        self.count = 0
+        return
+
+    def _reserve(self, size):
+        """ Makes sure that `size` more bytes can be written """
+        end = self.size + size
+        if end > len(self.buffer):
+            self.buffer.extend(bytes(max(end, 2 * len(self.buffer)) - len(self.buffer)))
+        return
+
+    def add_message(self, address, args):
+        """ Writes a message with `address` and the arguments `args` as an element of a bundle,
+            i.e. prefixed by its size. Arguments are encoded like `OSCMessage.append` does """
+        address = padded_string(address)
+        count = len(args)
+        tags_size = (count + 5) & ~3  # "," then a tag per argument, zero padded
+        self._reserve(4 + len(address) + tags_size + 4 * count)
+        buffer = self.buffer
+        start = self.size
+        pos = start + 4
+        buffer[pos:pos + len(address)] = address
+        pos += len(address)
+        tag = pos
+        buffer[pos:pos + tags_size] = _ZEROS[:tags_size] if tags_size <= len(_ZEROS) else bytes(tags_size)
+        buffer[pos] = 44  # ","
+        pos += tags_size
+        for i, arg in enumerate(args, 1):
+            kind = type(arg)
+            if kind is float:
+                _pack_float(buffer, pos, arg)
+                buffer[tag + i] = 102  # "f"
+                pos += 4
+            elif kind is int:
+                _pack_int(buffer, pos, arg)
+                buffer[tag + i] = 105  # "i"
+                pos += 4
+            else:
+                if kind is str:
+                    binary, code = padded_string(arg), 115  # "s"
+                else:
+                    code, binary = OSCArgument(arg)
+                    code = ord(code)
+                # Keep room for the remaining arguments
+                self.size = pos
+                self._reserve(len(binary) + 4 * (count - i))
+                buffer = self.buffer
+                buffer[pos:pos + len(binary)] = binary
+                buffer[tag + i] = code
+                pos += len(binary)
+        _pack_int(buffer, start, pos - start - 4)
+        self.size = pos
+        self.count += 1
+        return
+
+    def bundle(self, time=0):
+        """ Returns the messages written since the last reset as an EncodedBundle and resets """
+        bundle = EncodedBundle(time=time)
+        with memoryview(self.buffer) as view:
+            bundle.data += view[:self.size]
+        bundle.count = self.count
+        self.reset()
+        return bundle
+
+
+_encoders = threading.local()
+
+
+def get_encoder():
+    """ Returns the OSCEncoder of the current thread """
+    encoder = getattr(_encoders, "encoder", None)
+    if encoder is None:
+        encoder = _encoders.encoder = OSCEncoder()
+    return encoder
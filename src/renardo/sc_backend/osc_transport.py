@@ -0,0 +1,223 @@
+"""
+Asyncio transport for the queries sent to scsynth and sclang.
+
+`BidirectionalOSCServer.receive` waits for the reply of a query in the
+calling thread and discards the other messages it gets meanwhile, so
+queries are made one at a time. An `AsyncOSCTransport` sends messages from
+an asyncio datagram endpoint and gives each reply to the query waiting for
+it: queries are correlated by the address the reply comes from, its OSC
+address and, for replies carrying one (e.g. /synced), a token given as
+their first argument. Messages that no query waits for go to the handlers
+added with `add_handler` (e.g. /n_end notifications), or are dropped.
+
+`OSCTransport` runs an AsyncOSCTransport in an event loop of its own thread,
+with blocking calls for synchronous code (`call`) and awaitables usable from
+any other event loop (`run`).
+"""
+import asyncio
+import itertools
+import logging
+import socket
+import threading
+
+from collections import deque, namedtuple
+
+from renardo.sc_backend.custom_osc_lib import OSCMessage, decodeOSC
+
+_logger = logging.getLogger('renardo.main')
+
+# Arguments of scsynth's /status.reply, after the first one (unused)
+ServerStatus = namedtuple(
+    'ServerStatus',
+    ('num_ugens', 'num_synths', 'num_groups', 'num_synth_defs',
+     'avg_cpu', 'peak_cpu', 'nominal_sample_rate', 'actual_sample_rate'))
+
+
+class RequestTimeout(Exception):
+    """ Raised if expecting a response from the server but received none """
+
+
+class _OSCProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def datagram_received(self, data, addr):
+        self.owner.dispatch(data, addr)
+
+    def error_received(self, exc):
+        # e.g. ICMP port unreachable when nothing listens: the query times out
+        _logger.debug(f"OSC transport error: {exc}")
+
+
+class AsyncOSCTransport:
+    """Sends OSC messages and awaits their replies. Must be used from the loop it was opened in"""
+
+    def __init__(self):
+        self.endpoint = None
+        self.pending = {}  # (remote address, reply address) -> deque of (token, future)
+        self.handlers = {}  # OSC address -> callback(address, args, remote address)
+        self._tokens = itertools.count(1)
+        self._hosts = {}
+
+    async def open(self, local_addr=("127.0.0.1", 0)):
+        loop = asyncio.get_running_loop()
+        self.endpoint, _ = await loop.create_datagram_endpoint(lambda: _OSCProtocol(self), local_addr=local_addr)
+        return self
+
+    @property
+    def address(self):
+        """ The (host, port) the transport receives replies on """
+        return self.endpoint.get_extra_info("sockname")[:2]
+
+    def close(self):
+        if self.endpoint is not None:
+            self.endpoint.close()
+        for waiting in self.pending.values():
+            for _, future in waiting:
+                future.cancel()
+        self.pending = {}
+        return
+
+    def resolve(self, address):
+        """ Returns `address` with an IP address, as replies come from """
+        host, port = address
+        ip = self._hosts.get(host)
+        if ip is None:
+            ip = self._hosts[host] = socket.gethostbyname(host)
+        return ip, port
+
+    def next_token(self):
+        return next(self._tokens)
+
+    def add_handler(self, address, callback):
+        """ Calls `callback(address, args, remote address)` for the messages with the OSC
+            address `address` that no query waits for """
+        self.handlers[address] = callback
+        return
+
+    def send(self, message, address):
+        self.endpoint.sendto(message.getBuffer(), self.resolve(address))
+        return
+
+    async def request(self, message, address, reply, token=None, timeout=2.0):
+        """ Sends `message` to `address` and returns the arguments of the first `reply` message
+            coming from it, with `token` as first argument if not None """
+        address = self.resolve(address)
+        key = (address, reply)
+        entry = (token, asyncio.get_running_loop().create_future())
+        waiting = self.pending.setdefault(key, deque())
+        waiting.append(entry)
+        try:
+            self.endpoint.sendto(message.getBuffer(), address)
+            return await asyncio.wait_for(entry[1], timeout)
+        except asyncio.TimeoutError:
+            raise RequestTimeout("No {} reply from {}:{}".format(reply, *address)) from None
+        finally:
+            if entry in waiting:
+                waiting.remove(entry)
+            if not waiting and self.pending.get(key) is waiting:
+                del self.pending[key]
+
+    def dispatch(self, data, remote):
+        """ Gives the messages of a datagram received from `remote` to the queries waiting for them """
+        try:
+            decoded = decodeOSC(data)
+        except Exception as e:
+            _logger.debug(f"Could not decode OSC datagram from {remote}: {e}")
+            return
+        if decoded and decoded[0] == "#bundle":
+            messages = decoded[2:]
+        else:
+            messages = [decoded]
+        for message in messages:
+            if message:
+                self.dispatch_message(message[0], message[2:], remote[:2])
+        return
+
+    def dispatch_message(self, address, args, remote):
+        if type(address) is bytes:
+            address = address.decode()
+        waiting = self.pending.get((remote, address))
+        if waiting:
+            entry = None
+            if args:
+                entry = next((item for item in waiting if item[0] is not None and item[0] == args[0]), None)
+            if entry is None:
+                entry = next((item for item in waiting if item[0] is None), None)
+            if entry is not None:
+                waiting.remove(entry)
+                if not entry[1].done():
+                    entry[1].set_result(args)
+                return
+        handler = self.handlers.get(address)
+        if handler is not None:
+            handler(address, args, remote)
+        return
+
+    async def query_status(self, address, timeout=2.0):
+        """ Returns the ServerStatus of the scsynth server at `address` """
+        args = await self.request(OSCMessage("/status"), address, "/status.reply", timeout=timeout)
+        return ServerStatus(*args[1:9])
+
+    async def sync(self, address, timeout=2.0):
+        """ Returns once the scsynth server at `address` has processed the messages sent before """
+        token = self.next_token()
+        message = OSCMessage("/sync")
+        message.append(token)
+        await self.request(message, address, "/synced", token, timeout)
+        return token
+
+
+class OSCTransport:
+    """An AsyncOSCTransport running in an event loop of its own daemon thread"""
+
+    def __init__(self, local_addr=("127.0.0.1", 0)):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="OSCTransport", daemon=True)
+        self.thread.start()
+        self.osc = AsyncOSCTransport()
+        self.call(self.osc.open(local_addr))
+
+    @property
+    def address(self):
+        return self.osc.address
+
+    def call(self, coroutine, timeout=None):
+        """ Runs `coroutine` in the transport's loop and returns its result, blocking until done """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def run(self, coroutine):
+        """ Returns an awaitable running `coroutine` in the transport's loop, for another loop """
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, self.loop))
+
+    def send(self, message, address):
+        self.loop.call_soon_threadsafe(self.osc.send, message, address)
+        return
+
+    def add_handler(self, address, callback):
+        """ Calls `callback(address, args, remote address)`, in the transport's thread, for the
+            messages with the OSC address `address` that no query waits for """
+        self.loop.call_soon_threadsafe(self.osc.add_handler, address, callback)
+        return
+
+    def request(self, message, address, reply, token=None, timeout=2.0):
+        """ Synchronous AsyncOSCTransport.request """
+        return self.call(self.osc.request(message, address, reply, token, timeout))
+
+    def query_status(self, address, timeout=2.0):
+        """ Synchronous AsyncOSCTransport.query_status """
+        return self.call(self.osc.query_status(address, timeout))
+
+    def sync(self, address, timeout=2.0):
+        """ Synchronous AsyncOSCTransport.sync """
+        return self.call(self.osc.sync(address, timeout))
+
+    def close(self):
+        if not self.loop.is_running():
+            return
+        self.loop.call_soon_threadsafe(self.osc.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        return
@@ -18,6 +18,10 @@ from renardo.settings_manager import settings
 
 from renardo.sc_backend.SpecialSynthDefs import SamplePlayer, LoopPlayer
 from renardo.sc_backend.custom_osc_lib import *
+from renardo.sc_backend.osc_encoder import IP_UDP_HEADER_SIZE, coalesce_bundles, get_encoder
+from renardo.sc_backend.bundle_templates import BundleTemplate, S_NEW_SLOTS
+from renardo.sc_backend.node_allocator import BusPool, NodeIDAllocator
+from renardo.sc_backend.osc_transport import OSCTransport, RequestTimeout
 
 
 def get_timestamp():
@@ -55,10 +59,6 @@ class OSCConnect(OSCClientWrapper):
         self.connect(address)
 
 
-class RequestTimeout(Exception):
-    """ Raised if expecting a response from the server but received none """
-
-
 class BidirectionalOSCServer(OSCServer):
     """
     This is a combination client/server
@@ -130,6 +130,14 @@ class BidirectionalOSCServer(OSCServer):
 class ServerManager:
 
     fxlist = None
+    # Maximum number of effect chains cached by get_effect_chain
+    max_effect_chains = 1024
+    # Maximum number of bundle templates cached by get_synth_bundle, and whether to use them
+    max_bundle_templates = 1024
+    use_bundle_templates = True
+    # Size of the datagrams the bundles of a clock block are nested into, None to send them
+    # one by one (see update_osc_options)
+    coalesce_size = None
     #synthdefs = None
     synthdefs = {}
 
@@ -148,15 +156,21 @@ class ServerManager:
         # Assign a valid OSC Client
         self.forward = None
 
-        self.node = 1000
+        # The clock playing the notes, see set_clock
+        self.clock = None
+
+        self.nodes = NodeIDAllocator(1000)
         self.num_input_busses = 2
         self.num_output_busses = 2
-        self.bus = self.num_input_busses + self.num_output_busses
         self.max_busses = 100
+        self.buses = BusPool(self.num_input_busses + self.num_output_busses, self.max_busses)
         self.max_buffers = 1024
 
         self.fx_setup_done = False
         self.fx_names = {}
+        self.effect_chains = {}  # active effect keywords -> effects to add to a bundle, by order
+        self.effect_chains_version = None
+        self.bundle_templates = {}  # note structure -> BundleTemplate, or None to use the generic path
 
         # General SuperCollider OSC connection on PORT 1
         self.client = OSCClientWrapper()
@@ -164,6 +178,9 @@ class ServerManager:
         # self.sclang is the OSC Connection for custom OSCFunc in SuperCollider
         self.sclang = BidirectionalOSCServer() if settings.get("sc_backend.GET_SC_INFO") else OSCClientWrapper()
 
+        # Queries to scsynth and sclang and their replies, started on first use (see get_transport)
+        self.transport = None
+
 
     def test_connection(self):
         self.sclang.connect((self.addr, self.SCLang_port))
@@ -195,7 +212,9 @@ class ServerManager:
                 self.num_input_busses = info.num_input_bus_channels
                 self.num_output_busses = info.num_output_bus_channels
                 self.max_busses = info.num_audio_bus_channels
-                self.bus = self.num_input_busses + self.num_output_busses
+                self.buses.reset(self.num_input_busses + self.num_output_busses, self.max_busses)
+        if settings.get("sc_backend.NOTIFY_NODE_ENDS", False):
+            self.watch_node_ends()
         # Clear SuperCollider nodes if any left over from other session etc
         self.freeAllNodes()
         # Load recorder OSCFunc
@@ -209,27 +228,99 @@ class ServerManager:
     def __repr__(self):
         return str(self)
 
+    @property
+    def node(self):
+        """ The last node ID got by the current thread. Setting it resets the node IDs """
+        return self.nodes.last
+
+    @node.setter
+    def node(self, value):
+        self.nodes.reset(value)
+
+    @property
+    def bus(self):
+        """ The last bus got. Setting it frees every bus, the next bus got being the one after it """
+        return self.buses.last
+
+    @bus.setter
+    def bus(self, value):
+        self.buses.reset(last=value)
+
     def nextnodeID(self):
         """ Gets the next node ID to use in SuperCollider """
-        self.node += 1
-        return self.node
+        return self.nodes.next()
 
     def query(self):
         """ Prints debug status to SuperCollider console """
         self.client.send(OSCMessage("/status"))
         return
 
-    def nextbusID(self):
-        """ Gets the next SuperCollider bus to use """
-        self.bus += 2
-        # Make sure we still have 2 audio channels available
-        if self.bus + 1 >= self.max_busses:
-            self.bus = self.num_input_busses + self.num_output_busses
-        return self.bus
+    def set_clock(self, clock):
+        """ Uses the time of `clock` for the buses of the notes it plays """
+        self.clock = clock
+        self.buses.time = clock.get_time
+        return
+
+    def get_time(self):
+        return time.time() if self.clock is None else self.clock.get_time()
+
+    def nextbusID(self, timestamp=0, sus=0, group=None):
+        """ Gets a SuperCollider bus (2 audio channels) that no other note uses while the
+            note of `group`, played at `timestamp` for `sus` seconds, may be playing """
+        now = self.get_time()
+        start = timestamp or now
+        # Notes still to come are sent at least `latency` seconds ahead of the clock
+        horizon = now if self.clock is None else now + self.clock.latency
+        return self.buses.allocate(start, self.get_release_time(start, sus), group, horizon)
+
+    @staticmethod
+    def get_release_time(timestamp, sus):
+        """ Returns the time at which the group of a note played at `timestamp` is freed at the
+            latest: its 'makeSound' node frees it after `sus` * 8 + 0.1 seconds (see makeSound.scd) """
+        return timestamp + float(sus) * 8 + 0.1
+
+    def watch_node_ends(self):
+        """ Asks scsynth to notify the end of nodes to the query transport, so that the bus of a
+            note is free as soon as its group ends (e.g. after silence) """
+        transport = self.get_transport()
+        transport.add_handler("/n_end", self._handle_node_end)
+        msg = OSCMessage("/notify")
+        msg.append(1)
+        transport.send(msg, (self.addr, self.port))
+        return
+
+    def _handle_node_end(self, address, args, remote):
+        if args:
+            self.buses.release(args[0])
+        return
+
+    def allocation_stats(self):
+        """ Returns the node ID ranges reserved and the occupancy of the bus pool, including the
+            number of times a bus was given to a note while still used ('exhausted') """
+        return {"nodes": self.nodes.stats(), "buses": self.buses.stats(self.get_time())}
+
+    @classmethod
+    def update_osc_options(cls, snapshot):
+        """ Reads the sc_backend.OSC_COALESCE_BUNDLES and OSC_MTU settings, on every change """
+        options = snapshot.sc_backend
+        if options.get("OSC_COALESCE_BUNDLES", False):
+            cls.coalesce_size = options.get("OSC_MTU", 1500) - IP_UDP_HEADER_SIZE
+        else:
+            cls.coalesce_size = None
+        return
+
+    def send_osc_messages(self, messages):
+        """ Sends the messages of a clock block. With the sc_backend.OSC_COALESCE_BUNDLES
+            setting, the bundles sharing a time tag are nested into as few datagrams of
+            OSC_MTU bytes as they fit in """
+        size = self.coalesce_size
+        if size is not None and len(messages) > 1:
+            messages = coalesce_bundles(messages, size)
+        return list(map(self.sendOSC, messages))
 
     def sendOSC(self, osc_message):
         """ Sends an OSC message to the server. Checks for midi messages """
-        if osc_message.address == settings.get("sc_backend.OSC_MIDI_ADDRESS"):
+        if osc_message.address == settings.snapshot.sc_backend.OSC_MIDI_ADDRESS:
             self.sclang.send(osc_message)
         else:
             self.client.send(osc_message)
@@ -248,6 +339,9 @@ class ServerManager:
     def setFx(self, fx_list):
         self.fxlist = fx_list
         self.fx_names = {name: fx.fullname for name, fx in fx_list.items()}
+        self.effect_chains = {}
+        self.effect_chains_version = fx_list.version
+        self.bundle_templates = {}
         return
 
     def set_midi_nudge(self, value):
@@ -256,6 +350,7 @@ class ServerManager:
 
     def update_synthdef_dict(self, synthdef_dict):
         self.synthdefs = synthdef_dict
+        self.bundle_templates = {}
 
     @staticmethod
     def create_osc_msg(dictionary):
@@ -268,10 +363,12 @@ class ServerManager:
     def get_midi_message(self, synthdef, packet, timestamp):
         """ Prepares an OSC message to trigger midi sent from SuperCollider """
 
+        midi_address = settings.snapshot.sc_backend.OSC_MIDI_ADDRESS
+
         bundle = OSCBundle(time=timestamp)
-        bundle.setAddress(settings.get("sc_backend.OSC_MIDI_ADDRESS"))  # these need to be variable names at least
+        bundle.setAddress(midi_address)  # these need to be variable names at least
 
-        msg = OSCMessage(settings.get("sc_backend.OSC_MIDI_ADDRESS"))
+        msg = OSCMessage(midi_address)
 
         note = packet.get("midinote", 60)
         vel = min(127, (packet.get("amp", 1) * 128) - 1)
@@ -286,8 +383,12 @@ class ServerManager:
         return bundle
 
     def get_init_node(self, node, bus, group_id, synthdef, packet):
-
         msg = OSCMessage("/s_new")
+        msg.append(self.get_init_args(node, bus, group_id, synthdef, packet))
+        return msg, node
+
+    def get_init_args(self, node, bus, group_id, synthdef, packet):
+        """ Returns the arguments of the /s_new message of the first node of a note's group """
         # Make sure messages release themselves after 8 * the duration at max (temp)
         max_sus = float(packet["sus"] * 8)  # might be able to get rid of this
         key = "rate" if synthdef.name in (SamplePlayer, LoopPlayer) else "freq"
@@ -295,30 +396,71 @@ class ServerManager:
             value = ["rate", packet[key]]
         else:
             value = []
-        osc_packet = ["startSound", node, 0, group_id, 'bus', bus, "sus", max_sus] + value
-        msg.append(osc_packet)
+        return ["startSound", node, 0, group_id, 'bus', bus, "sus", max_sus] + value
+
+    def get_active_effects(self, packet, effects=None):
+        """ Returns the effect keywords of `effects` (all of them if None) that are on (not 0) in packet """
+        if effects is None:
+            effects = self.fxlist.kw
+        return tuple(fx for fx in effects if fx in packet and packet[fx] != 0)
+
+    def get_effect_chain(self, packet, effects=None, active=None):
+        """ Returns the effects that are on (not 0) in packet as a list for each order of
+            (SynthDef name, ((argument, default), ...)) tuples. `effects` are the effect keywords
+            that may be on, all of them if None, and `active` those that are on if already known.
+            Cached until the EffectManager changes """
+        if active is None:
+            active = self.get_active_effects(packet, effects)
+        if self.effect_chains_version != self.fxlist.version:
+            self.effect_chains = {}
+            self.effect_chains_version = self.fxlist.version
+            self.bundle_templates = {}
+        chain = self.effect_chains.get(active)
+        if chain is None:
+            if len(self.effect_chains) >= self.max_effect_chains:
+                self.effect_chains.clear()
+            chain = self.effect_chains[active] = tuple(
+                [
+                    (self.fxlist[fx].fullname, tuple((key, self.fxlist[fx].defaults[key]) for key in self.fxlist[fx].args))
+                    for fx in self.fxlist.order[order] if fx in active
+                ]
+                for order in range(3)
+            )
+        return chain
+
+    def get_effect_nodes(self, effects, node, bus, group_id, packet):
+        """ Returns the messages adding `effects`, part of an effect chain, to a note's group """
+        pkg = []
+        for osc_packet in self.get_effect_args(effects, bus, group_id, packet):
+            msg = OSCMessage("/s_new")
+            msg.append(osc_packet)
+            pkg.append(msg)
+            node = osc_packet[1]
+        return pkg, node
 
-        return msg, node
+    def get_effect_args(self, effects, bus, group_id, packet):
+        """ Yields the arguments of the /s_new message of each effect of `effects`, getting
+            their node IDs one after the other """
+        for name, arguments in effects:
+            osc_packet = [name, 0, 1, group_id, 'bus', bus]
+            for key, default in arguments:
+                osc_packet.append(key)
+                osc_packet.append(float(packet.get(key, default)))
+            # Get next node ID
+            osc_packet[1] = self.nextnodeID()
+            yield osc_packet
 
     def get_control_effect_nodes(self, node, bus, group_id, packet):
-        pkg = []
-        # Go through effects and put together with child attributes
-        for fx in self.fxlist.order[0]:
-
-            if fx in packet and packet[fx] != 0:
-                # this_effect = effects[fx] # old pre-prepared
-                # prepare each effect here
-                this_effect = self.prepare_effect(fx, packet)
-                # Get next node ID
-                node, last_node = self.nextnodeID(), node
-                msg = OSCMessage("/s_new")
-                osc_packet = [self.fx_names[fx], node, 1, group_id, 'bus', bus] + this_effect
-                msg.append(osc_packet)
-                pkg.append(msg)
-        return pkg, node
+        return self.get_effect_nodes(self.get_effect_chain(packet)[0], node, bus, group_id, packet)
 
     def get_synth_node(self, node, bus, group_id, synthdef, packet):
         msg = OSCMessage("/s_new")
+        osc_packet, node = self.get_synth_args(node, bus, group_id, synthdef, packet)
+        msg.append(osc_packet)
+        return msg, node
+
+    def get_synth_args(self, node, bus, group_id, synthdef, packet):
+        """ Returns the arguments of the /s_new message of the SynthDef node of a note, and its node ID """
         new_message = {}
         for key in packet:
             if key not in ("env", "degree"):  # skip some attr
@@ -331,22 +473,10 @@ class ServerManager:
         node, last_node = self.nextnodeID(), node
         osc_packet = [synthdef.name, node, 1, group_id, synthdef.bus_name, bus] \
                      + self.create_osc_msg(new_message)
-        msg.append(osc_packet)
-        return msg, node
+        return osc_packet, node
 
     def get_pre_env_effect_nodes(self, node, bus, group_id, packet):
-        pkg = []
-        for fx in self.fxlist.order[1]:
-            if fx in packet and packet[fx] != 0:
-                this_effect = self.prepare_effect(fx, packet)
-                # Get next node ID
-                node, last_node = self.nextnodeID(), node
-                msg = OSCMessage("/s_new")
-                osc_packet = [self.fx_names[fx], node, 1, group_id, 'bus', bus] + this_effect
-                msg.append(osc_packet)
-                pkg.append(msg)
-
-        return pkg, node
+        return self.get_effect_nodes(self.get_effect_chain(packet)[1], node, bus, group_id, packet)
 
     def get_synth_envelope(self, node, bus, group_id, synthdef, packet):
         env_packet = {"sus": packet["sus"],
@@ -375,17 +505,7 @@ class ServerManager:
         return msg, node
 
     def get_post_env_effect_nodes(self, node, bus, group_id, packet):
-        pkg = []
-        for fx in self.fxlist.order[2]:
-            if fx in packet and packet[fx] != 0:
-                this_effect = self.prepare_effect(fx, packet)
-                # Get next node ID
-                node, last_node = self.nextnodeID(), node
-                msg = OSCMessage("/s_new")
-                osc_packet = [self.fx_names[fx], node, 1, group_id, 'bus', bus] + this_effect
-                msg.append(osc_packet)
-                pkg.append(msg)
-        return pkg, node
+        return self.get_effect_nodes(self.get_effect_chain(packet)[2], node, bus, group_id, packet)
 
     def prepare_effect(self, name, packet):
         """ Finds the child attributes in packet and returns an OSC style list """
@@ -398,12 +518,16 @@ class ServerManager:
 
     def get_exit_node(self, node, bus, group_id, packet):
         msg = OSCMessage("/s_new")
-        node, last_node = self.nextnodeID(), node
-        osc_packet = ['makeSound', node, 1, group_id, 'bus', bus, 'sus', float(packet["sus"])]
+        osc_packet, node = self.get_exit_args(node, bus, group_id, packet)
         msg.append(osc_packet)
 
         return msg, node
 
+    def get_exit_args(self, node, bus, group_id, packet):
+        """ Returns the arguments of the /s_new message of the last node of a note's group, and its node ID """
+        node, last_node = self.nextnodeID(), node
+        return ['makeSound', node, 1, group_id, 'bus', bus, 'sus', float(packet["sus"])], node
+
     def get_bundle(self, synthdef, packet, timestamp=0):
         """ Returns the OSC Bundle for a notew based on a Player's SynthDef, and event and effects dictionaries """
         # Create a specific message for midi
@@ -411,54 +535,95 @@ class ServerManager:
         if synthdef in ["MidiInstrumentProxy", "ReaperInstrumentProxy", "AbletonInstrument"]:  # this should be in a dict of synthdef to functions maybe? we need a "nudge to sync"
             return self.get_midi_message(synthdef, packet, timestamp)
 
-        # Create a bundle
-        bundle = OSCBundle(time=timestamp)
+        return self.get_synth_bundle(synthdef, packet, timestamp)
 
-        # Get the actual synthdef object
+    def get_synth_bundle(self, synthdef, packet, timestamp=0, effects=None):
+        """ Returns the OSC Bundle playing a note with a SuperCollider SynthDef and the effects in packet.
+            Used by Players' output backends, which already know it isn't a midi message, and which
+            can give the only `effects` keywords that may be on (see `get_effect_chain`).
+            Bundles with the structure of an earlier one are made from its BundleTemplate """
         synthdef = self.synthdefs[synthdef]
+        active = self.get_active_effects(packet, effects)
+        chain = self.get_effect_chain(packet, active=active)
+        if not self.use_bundle_templates:
+            return self.encode_synth_bundle(synthdef, packet, timestamp, chain)
+
+        rate = packet.get("rate" if synthdef.name in (SamplePlayer, LoopPlayer) else "freq")
+        key = (synthdef.name, synthdef.bus_name, active, tuple(packet), type(rate))
+        template = self.bundle_templates.get(key)
+        if template is not None:
+            bundle = template.render(self, packet, timestamp)
+            if bundle is not None:
+                return bundle
+        elif key not in self.bundle_templates:
+            template = BundleTemplate()
+            bundle = self.encode_synth_bundle(synthdef, packet, timestamp, chain, template)
+            if len(self.bundle_templates) >= self.max_bundle_templates:
+                self.bundle_templates.clear()
+            self.bundle_templates[key] = template.compile(bundle)
+            return bundle
+        return self.encode_synth_bundle(synthdef, packet, timestamp, chain)
+
+    def encode_synth_bundle(self, synthdef, packet, timestamp, chain, template=None):
+        """ Returns the OSC Bundle playing a note with the SynthDef object `synthdef` and the effect
+            `chain`, encoding its messages one by one into an EncodedBundle (see osc_encoder.py).
+            The messages and their variable values are recorded by `template` if given """
+        encoder = get_encoder()
+        encoder.reset()
 
         # Create a group for the note
         group_id = self.nextnodeID()
-        msg = OSCMessage("/g_new")
-        msg.append([group_id, 1, 1])
-        bundle.append(msg)
+        self._add_message(encoder, template, "/g_new", [group_id, 1, 1], ((0, "group"),))
 
         # Get the bus and SynthDef nodes
-        this_bus = self.nextbusID()
+        this_bus = self.nextbusID(timestamp, packet["sus"], group_id)
         this_node = self.nextnodeID()
 
         # synthdef.preprocess_osc(packet) # so far, just "balance" to multiply amp by 1
         # First node of the group (control rate)
-        msg, this_node = self.get_init_node(this_node, this_bus, group_id, synthdef, packet)
+        osc_packet = self.get_init_args(this_node, this_bus, group_id, synthdef, packet)
+        slots = S_NEW_SLOTS + ((7, ("max_sus", "sus")),)
+        if len(osc_packet) > 8:
+            slots += ((9, ("key", "rate" if synthdef.name in (SamplePlayer, LoopPlayer) else "freq")),)
+        self._add_message(encoder, template, "/s_new", osc_packet, slots)
 
         # Add effects to control rate e.g. vibrato
-        bundle.append(msg)
-        pkg, this_node = self.get_control_effect_nodes(this_node, this_bus, group_id, packet)
-        for msg in pkg:
-            bundle.append(msg)
+        self._add_effect_messages(encoder, template, chain[0], this_bus, group_id, packet)
 
         # trigger synth
-        msg, this_node = self.get_synth_node(this_node, this_bus, group_id, synthdef, packet)
-        bundle.append(msg)
+        osc_packet, this_node = self.get_synth_args(this_node, this_bus, group_id, synthdef, packet)
+        slots = S_NEW_SLOTS + tuple((i + 1, ("key", osc_packet[i])) for i in range(6, len(osc_packet), 2))
+        self._add_message(encoder, template, "/s_new", osc_packet, slots)
 
         # ORDER 1
-        pkg, this_node = self.get_pre_env_effect_nodes(this_node, this_bus, group_id, packet)
-        for msg in pkg:
-            bundle.append(msg)
+        self._add_effect_messages(encoder, template, chain[1], this_bus, group_id, packet)
 
         # ENVELOPE
         # msg, this_node = self.get_synth_envelope(this_node, this_bus, group_id, synthdef, packet)
         # bundle.append( msg )
         # ORDER 2 (AUDIO EFFECTS)
-        pkg, this_node = self.get_post_env_effect_nodes(this_node, this_bus, group_id, packet)
-        for msg in pkg:
-            bundle.append(msg)
+        self._add_effect_messages(encoder, template, chain[2], this_bus, group_id, packet)
 
         # OUT
-        msg, _ = self.get_exit_node(this_node, this_bus, group_id, packet)
+        osc_packet, _ = self.get_exit_args(this_node, this_bus, group_id, packet)
+        self._add_message(encoder, template, "/s_new", osc_packet, S_NEW_SLOTS + ((7, ("key", "sus")),))
 
-        bundle.append(msg)
-        return bundle
+        return encoder.bundle(timestamp)
+
+    @staticmethod
+    def _add_message(encoder, template, address, args, slots):
+        if template is not None:
+            template.record(encoder.size, address, args, slots)
+        encoder.add_message(address, args)
+        return
+
+    def _add_effect_messages(self, encoder, template, effects, bus, group_id, packet):
+        for (name, arguments), osc_packet in zip(effects, self.get_effect_args(effects, bus, group_id, packet)):
+            slots = S_NEW_SLOTS + tuple(
+                (7 + 2 * i, ("default", key, default)) for i, (key, default) in enumerate(arguments)
+            )
+            self._add_message(encoder, template, "/s_new", osc_packet, slots)
+        return
 
     def send(self, address, message):
         """ Sends message (a list) to SuperCollider """
@@ -504,6 +669,8 @@ class ServerManager:
         msg.setAddress(osc_path)
         msg.append(synthdef_filename)
         self.sclang.send(msg)
+        # SynthDefs might be loaded again with other arguments
+        self.bundle_templates = {}
         return
 
     def loadRecorder(self):
@@ -559,13 +726,35 @@ class ServerManager:
         msg.append([group_id, flag])
         self.client.send(msg)
 
-    def getInfo(self):
-        """ Fetch info about the SynthDefManagement server """
-        msg = OSCMessage()
-        msg.setAddress('/foxdot/info')
-        self.sclang.send(msg)
-        info = ServerInfo(*self.sclang.receive('/foxdot/info'))
-        return info
+    def get_transport(self):
+        """ Returns the OSCTransport sending the queries to scsynth and sclang """
+        if self.transport is None:
+            # Replies from another machine can't reach a socket bound to the loopback interface
+            host = socket.gethostbyname(self.addr)
+            self.transport = OSCTransport(("127.0.0.1" if host.startswith("127.") else "0.0.0.0", 0))
+        return self.transport
+
+    async def query_status(self, timeout=2.0):
+        """ Returns the ServerStatus of scsynth (number of synths, CPU...). Can be awaited from any
+            event loop, queries being made in the transport's loop """
+        transport = self.get_transport()
+        return await transport.run(transport.osc.query_status((self.addr, self.port), timeout))
+
+    async def query_info(self, timeout=2.0):
+        """ Returns the ServerInfo given by sclang (see Info.scd), like query_status """
+        transport = self.get_transport()
+        args = await transport.run(transport.osc.request(OSCMessage('/foxdot/info'), (self.addr, self.SCLang_port),
+                                                         '/foxdot/info', timeout=timeout))
+        return ServerInfo(*args)
+
+    def getStatus(self, timeout=2.0):
+        """ Fetch the status of the SuperCollider server (synchronous query_status) """
+        return self.get_transport().query_status((self.addr, self.port), timeout)
+
+    def getInfo(self, timeout=2.0):
+        """ Fetch info about the SynthDefManagement server (synchronous query_info) """
+        return ServerInfo(*self.get_transport().request(
+            OSCMessage('/foxdot/info'), (self.addr, self.SCLang_port), '/foxdot/info', timeout=timeout))
 
     #def makeStartupFile(self):
     #    ''' Boot SuperCollider and connect over OSC '''
@@ -591,6 +780,9 @@ class ServerManager:
     #    return
 
     def quit(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
         if self.booted:
             self.client.send(OSCMessage("/quit"))
             sleep(1)
@@ -604,6 +796,10 @@ class ServerManager:
         self.forward.connect((addr, port))
 
 
+ServerManager.update_osc_options(settings.snapshot)
+settings.subscribe(ServerManager.update_osc_options)
+
+
 try:
 
     import socketserver
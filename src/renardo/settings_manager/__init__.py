@@ -1,5 +1,5 @@
 
-from .settings_manager import SettingsManager, settings
+from .settings_manager import SettingsManager, SettingsSnapshot, settings
 
 from .renardo_core_settings import get_tutorial_files
 from .foxdot_editor_settings import Colours, conf
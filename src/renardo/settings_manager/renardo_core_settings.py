@@ -18,6 +18,22 @@ settings.set_defaults_from_dict({
     "core": {
         "CPU_USAGE" : 2,
         "CLOCK_LATENCY" : 0,
+        # "threads" (beat counting thread + polling scheduler) or "event" (sleep until next event)
+        "CLOCK_SCHEDULING_MODE": "threads",
+        # "pool" (pre-started worker threads) or "thread" (a new thread for every block)
+        "CLOCK_BLOCK_EXECUTOR": "pool",
+        # Number of worker threads in "pool" mode, 0 means one per CPU
+        "CLOCK_WORKER_THREADS": 0,
+        # Render QueueBlocks this far ahead of their beat (0 disables look-ahead), in CLOCK_LOOKAHEAD_UNIT
+        "CLOCK_LOOKAHEAD": 0,
+        # "ms" or "beats"
+        "CLOCK_LOOKAHEAD_UNIT": "ms",
+        # Record block lateness / duration statistics (see Clock.stats())
+        "CLOCK_TELEMETRY": False,
+        # Record per-player time and output counters (see Player.stats() and Clock.top())
+        "PLAYER_STATS": False,
+        # "real" (monotonic clock), "simulated" (moved by Clock.step()) or "scaled"
+        "CLOCK_TIME_SOURCE": "real",
         "PERFORMANCE_EXCEPTIONS_CATCHING" : True,
         "COLLECTIONS_DOWNLOAD_SERVER": 'https://collections.renardo.org',
     }
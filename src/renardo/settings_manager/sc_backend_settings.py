@@ -14,6 +14,14 @@ settings.set_defaults_from_dict({
         # Audio output device index for SuperCollider audio server
         # -1 means use system default, 0+ selects specific device by index
         "AUDIO_OUTPUT_DEVICE_INDEX": -1,
+        # Nest the note bundles of a clock block that share a time tag into one OSC bundle
+        # sent in as few UDP datagrams as fit OSC_MTU bytes (fewer packets to scsynth).
+        # The loopback interface takes up to 65535 bytes when scsynth runs on this machine
+        "OSC_COALESCE_BUNDLES": False,
+        "OSC_MTU": 1500,
+        # Ask scsynth for /n_end notifications so that the private bus
+        # of a note is reused as soon as it ends rather than at its latest release time
+        "NOTIFY_NODE_ENDS": False,
     }
 },
 )
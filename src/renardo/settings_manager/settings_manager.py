@@ -1,7 +1,7 @@
 from pathlib import Path
 import tomli
 import tomli_w
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 import copy
 import os
 import pathlib
@@ -10,6 +10,47 @@ from renardo.logger import get_logger
 
 
 
+class SettingsSnapshot:
+    """Read-only copy of the settings at a given version, for code run for every note.
+
+    Sections and settings are attributes (``snapshot.sc_backend.OSC_MIDI_ADDRESS``)
+    and dotted keys can be looked up with ``get`` without walking nested dicts.
+    """
+
+    def __init__(self, settings: Dict[str, Any], version: int = 0):
+        flat = {}
+        for key, value in settings.items():
+            if isinstance(value, dict):
+                value = SettingsSnapshot(value, version)
+                flat.update((f"{key}.{name}", item) for name, item in value._flat.items())
+            flat[key] = value
+            object.__setattr__(self, key, value)
+        object.__setattr__(self, "_flat", flat)
+        object.__setattr__(self, "version", version)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Settings snapshots are read-only, use settings.set()")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Settings snapshots are read-only, use settings.set()")
+
+    def __repr__(self) -> str:
+        return f"<SettingsSnapshot version {self.version}: {len(self._flat)} keys>"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a setting value.
+
+        Args:
+            key: Setting key (dot notation, relative to this section)
+            default: Value to return if key doesn't exist
+
+        Returns:
+            Setting value or default if not found
+        """
+        return self._flat.get(key, default)
+
+
 class SettingsManager:
     """Manages application settings with separate public and internal TOML files."""
 
@@ -39,6 +80,11 @@ class SettingsManager:
         self._public_settings = copy.deepcopy(public_defaults)
         self._internal_settings = copy.deepcopy(internal_defaults)
 
+        # Incremented on every change, the snapshot is compiled again when needed
+        self.version = 0
+        self._snapshot: Optional[SettingsSnapshot] = None
+        self._subscribers = []
+
         # Load both settings files
         self.load_from_file()
 
@@ -62,6 +108,48 @@ class SettingsManager:
         except Exception as e:
             print(f"Error loading internal settings: {e}")
 
+        self._changed()
+
+    @property
+    def snapshot(self) -> SettingsSnapshot:
+        """Read-only snapshot of the current settings, public values taking precedence"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            merged = copy.deepcopy(self._internal_settings)
+            self._recursive_update(merged, copy.deepcopy(self._public_settings))
+            snapshot = self._snapshot = SettingsSnapshot(merged, self.version)
+        return snapshot
+
+    def subscribe(self, callback: Callable[[SettingsSnapshot], None]) -> Callable[[SettingsSnapshot], None]:
+        """
+        Call `callback` with the new snapshot whenever the settings change.
+
+        Args:
+            callback: Function taking a SettingsSnapshot
+
+        Returns:
+            The callback, so this can be used as a decorator
+        """
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable[[SettingsSnapshot], None]) -> None:
+        """Stop calling `callback` when the settings change."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _changed(self) -> None:
+        """Invalidates the snapshot and notifies the subscribers"""
+        self.version += 1
+        self._snapshot = None
+        if self._subscribers:
+            snapshot = self.snapshot
+            for callback in list(self._subscribers):
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    self.logger.error(f"Error in settings subscriber {callback!r}: {e}")
+
     def save_to_file(self, save_internal: bool = True) -> bool:
         """
         Save current settings to TOML files.
@@ -105,6 +193,7 @@ class SettingsManager:
         """
         target = self._internal_settings if internal else self._public_settings
         self._recursive_update(target, settings_dict)
+        self._changed()
 
     def set_defaults_from_dict(self, defaults_dict: Dict[str, Any], internal: bool = False) -> None:
         """
@@ -121,6 +210,7 @@ class SettingsManager:
         # Then add to settings only if keys don't exist
         settings = self._internal_settings if internal else self._public_settings
         self._recursive_update_if_not_exists(settings, defaults_dict)
+        self._changed()
 
     def _recursive_update_if_not_exists(self, target: Dict, source: Dict) -> None:
         """Recursively update nested dictionaries, but only for keys that don't exist in target."""
@@ -188,6 +278,7 @@ class SettingsManager:
 
         # Set the value
         current[keys[-1]] = value
+        self._changed()
 
     def reset(self, key: Optional[str] = None, internal: bool = False) -> None:
         """
@@ -205,6 +296,7 @@ class SettingsManager:
                 self._internal_settings = copy.deepcopy(self._internal_defaults)
             else:
                 self._public_settings = copy.deepcopy(self._public_defaults)
+            self._changed()
         else:
             try:
                 value = defaults
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Shared fixtures for renardo.lib tests (no SuperCollider needed)."""
+
+import os
+import sys
+
+import pytest
+
+# Add src to path to import renardo modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+
+class StubClock:
+    """Minimal stand-in for the TempoClock used by SchedulingQueue / QueueBlock."""
+    server = None
+
+
+@pytest.fixture
+def stub_clock():
+    return StubClock()
+
+
+@pytest.fixture
+def clock():
+    """A TempoClock attached to a ServerManager that is never connected."""
+    from renardo.sc_backend import ServerManager
+    from renardo.lib.TempoClock import TempoClock
+    TempoClock.set_server(ServerManager("127.0.0.1", 0, 0))
+    clock = TempoClock(bpm=240)
+    yield clock
+    clock.stop()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Tests for the TempoClock worker pool."""
+
+import threading
+import time
+
+from renardo.lib.TempoClock.block_executor import BlockExecutor
+
+
+class Block:
+    def __init__(self, beat):
+        self.beat = beat
+
+
+def test_blocks_run_in_beat_order():
+    order = []
+    release = threading.Event()
+    done = threading.Event()
+
+    def run_block(block, beat):
+        if block.beat == 0:
+            release.wait(2)
+        order.append(block.beat)
+        if len(order) == 4:
+            done.set()
+
+    executor = BlockExecutor(run_block, size=1)
+    executor.submit(Block(0), 0)
+    for beat in (3, 1, 2):
+        executor.submit(Block(beat), beat)
+    assert executor.depth() >= 2
+    release.set()
+    assert done.wait(2)
+    assert order == [0, 1, 2, 3]
+    executor.shutdown()
+
+
+def test_overrun_is_counted():
+    release = threading.Event()
+    started = threading.Event()
+
+    def run_block(block, beat):
+        started.set()
+        if block.beat == 0:
+            release.wait(2)
+
+    executor = BlockExecutor(run_block, size=2)
+    executor.submit(Block(0), 0)
+    assert started.wait(2)
+    executor.submit(Block(1), 1)
+    release.set()
+    executor.shutdown()
+    stats = executor.stats()
+    # Block 0 finished after block 1 was due, on a pool with a free worker
+    assert stats["overruns"] == 1 and stats["saturated"] == 0
+    assert stats["last_overrun"] == (0, 1)
+    assert stats["submitted"] == stats["completed"] == 2
+
+
+def test_blocks_finishing_in_time_are_not_overruns():
+    executor = BlockExecutor(lambda block, beat: None, size=2)
+    for beat in range(5):
+        executor.submit(Block(beat), beat)
+        deadline = time.time() + 2
+        while executor.stats()["completed"] <= beat and time.time() < deadline:
+            time.sleep(0.001)
+    executor.shutdown()
+    assert executor.stats()["overruns"] == 0
+
+
+def test_saturated_pool_is_counted():
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def run_block(block, beat):
+        started.release()
+        release.wait(2)
+
+    executor = BlockExecutor(run_block, size=2)
+    for beat in range(2):
+        executor.submit(Block(beat), beat)
+    assert started.acquire(timeout=2) and started.acquire(timeout=2)
+    assert executor.stats()["saturated"] == 0
+    executor.submit(Block(2), 2)
+    assert executor.stats()["saturated"] == 1
+    release.set()
+    executor.shutdown()
+
+
+def test_errors_do_not_kill_workers():
+    done = threading.Event()
+
+    def run_block(block, beat):
+        if block.beat == 0:
+            raise RuntimeError("boom")
+        done.set()
+
+    executor = BlockExecutor(run_block, size=1)
+    executor.submit(Block(0), 0)
+    executor.submit(Block(1), 1)
+    assert done.wait(2)
+    executor.shutdown()
+
+
+def test_clock_uses_pool_or_threads(clock):
+    clock.set_block_executor("pool", size=2)
+    clock.start()
+    assert clock.executor.size == 2
+    called = threading.Event()
+    clock.schedule(called.set, clock.now() + 0.25)
+    assert called.wait(2)
+    assert clock.executor.stats()["completed"] >= 1
+
+    clock.set_block_executor("thread")
+    assert clock.executor is None
+    called.clear()
+    clock.schedule(called.set, clock.now() + 0.25)
+    assert called.wait(2)
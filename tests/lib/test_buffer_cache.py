@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Tests for the BufferManager's cache of the buffers found for sample player symbols."""
+
+import wave
+from types import SimpleNamespace
+
+import pytest
+
+from renardo.gatherer.sample_management.sample_pack_library import SamplePackLibrary
+from renardo.sc_backend.buffer_management import BufferManager, nil
+from renardo.settings_manager import settings
+
+
+def write_wav(path, channels=1):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(44100)
+        f.writeframes(b"\0\0" * 441 * channels)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    write_wav(tmp_path / "samples" / "0_test" / "x" / "lower" / "a.wav")
+    write_wav(tmp_path / "samples" / "0_test" / "x" / "lower" / "b.wav", channels=2)
+    (tmp_path / "samples" / "0_test" / "x" / "upper").mkdir()
+    write_wav(tmp_path / "samples" / "0_test" / settings.get("samples.NON_ALPHA")["-"] / "hat.wav")
+    (tmp_path / "loops").mkdir()
+
+    library = SamplePackLibrary(tmp_path / "samples", [])
+    library._extra_paths = [tmp_path / "loops"]
+    searches = []
+    find_sample = library._find_sample
+    library._find_sample = lambda *args: searches.append(args) or find_sample(*args)
+
+    server = SimpleNamespace(max_buffers=16, read=[], freed=[])
+    server.bufferRead = lambda path, bufnum: server.read.append(bufnum)
+    server.bufferFree = server.freed.append
+    manager = BufferManager(server, library)
+    manager.searches = searches
+    return manager
+
+
+def test_same_buffers_as_searching(manager):
+    for symbol, index, synthdef in (("x", 0, "play1"), ("x", 1, "play2"), ("x", 2, "play1"), ("-", 0, "play1")):
+        buffer, name = manager.resolve(symbol, 0, index)
+        assert buffer is manager._resolve(symbol, index)[0] and buffer is not nil
+        assert name == synthdef == buffer.synthdef
+        assert manager.get_buffer_from_symbol(symbol, 0, index) is buffer
+    assert manager.resolve(" ") == (nil, "play1") and manager.resolve(".")[0] is nil
+    # Each sample was loaded once, and only searched for when not cached
+    assert manager._server.read == [1, 2, 3]
+    searches = len(manager.searches)
+    for _ in range(3):
+        manager.resolve("x", 0, 1)
+    assert len(manager.searches) == searches
+
+
+def test_missing_samples_are_cached(manager, tmp_path):
+    assert manager.resolve("loop", 0, 0)[0] is nil
+    assert manager.resolve("loop", 0, 0)[0] is nil
+    assert len(manager.searches) == 1
+
+    write_wav(tmp_path / "loops" / "loop.wav")
+    assert manager.resolve("loop", 0, 0)[0] is nil
+    manager.clear_cache()
+    assert manager.resolve("loop", 0, 0)[0] is not nil
+
+
+def test_cache_invalidation(manager, tmp_path, monkeypatch):
+    buffer = manager.resolve("x", 0, 1)[0]
+    # Freed buffers are loaded again
+    assert manager.free_buffer(buffer.bufnum)
+    assert manager.resolve("x", 0, 1)[0] is not buffer
+    assert manager._server.read == [buffer.bufnum, buffer.bufnum]
+
+    # Samples added to the packs are found once the library is scanned again
+    write_wav(tmp_path / "samples" / "0_test" / "x" / "lower" / "aa.wav")
+    assert manager.resolve("x", 0, 1)[1] == "play2"
+    manager._sample_library.rescan()
+    assert manager.resolve("x", 0, 1)[1] == "play1"
+
+    searches = len(manager.searches)
+    monkeypatch.setattr(settings, "version", settings.version + 1)
+    manager.resolve("x", 0, 1)
+    assert len(manager.searches) == searches + 1
+
+
+def test_cache_is_bounded(manager):
+    manager.max_resolved = 8
+    for index in range(20):
+        manager.resolve("x", 0, index)
+    assert len(manager._resolved) <= 8
+    assert manager._server.read == [1, 2]
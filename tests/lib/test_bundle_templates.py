@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Tests for the bundle templates making the bundles of notes with a known structure."""
+
+import random
+
+import pytest
+
+from renardo.lib.Player import Player
+from renardo.sc_backend import SCEffect
+from renardo.sc_backend.osc_encoder import EncodedBundle
+
+from .test_offline_render import make_session
+
+
+@pytest.fixture
+def session():
+    clock, server, play = make_session()
+    for name, fullname, arguments, order in (("vib", "Vibrato", {"vib": 0, "vibdepth": 0.02}, 0),
+                                              ("room", "Reverb", {"room": 0, "mix": 0.1}, 2)):
+        server.fxlist.new(SCEffect(name, "", fullname=fullname, arguments=arguments, order=order))
+    Player.set_effect_manager(server.fxlist)
+    yield clock, server, play
+    clock.stop()
+
+
+def bundles(server, packets, templates, effects=None):
+    """ Returns the binary bundles of packets and the node and bus IDs used after them """
+    server.use_bundle_templates = templates
+    server.node, server.bus = 5000, 10
+    try:
+        binary = [server.get_synth_bundle("pluck", packet, 1700000000.5 + i, effects).getBinary()
+                  for i, packet in enumerate(packets)]
+    finally:
+        del server.use_bundle_templates
+    return binary, (server.node, server.bus)
+
+
+def test_same_bundles_as_the_generic_path(session):
+    clock, server, play = session
+    rng = random.Random(11)
+    player = play("p1", lpf=[0, 800], room=[0, 0, 0.5], vib=[0, 2], amp=[1, 0.5], pan=[-1, 1], sus=[1, 2, 0.5])
+    packets = []
+    for n in range(48):
+        player.event_n = n
+        player._get_event()
+        packet = player._new_message_header(dict(player.event))
+        packet["amp"] = rng.choice([0.25, 1, 3])
+        packets.append(packet)
+    assert bundles(server, packets, False) == bundles(server, packets, True)
+    # One template per structure (effects on or off)
+    assert 1 < len(server.bundle_templates) <= 8
+    assert all(template is not None for template in server.bundle_templates.values())
+    assert bundles(server, packets, False) == bundles(server, packets, True, effects=("lpf", "room", "vib"))
+
+
+def test_unusual_values_use_the_generic_path(session):
+    clock, server, play = session
+    player = play("p1")
+    player._get_event()
+    packet = player._new_message_header(dict(player.event))
+
+    # A value that isn't a float disables the template of its structure
+    odd = dict(packet, freq=int(packet["freq"]))
+    assert bundles(server, [odd] * 3, False) == bundles(server, [odd] * 3, True)
+    assert list(server.bundle_templates.values()) == [None]
+
+    # A value that can't be converted to float is set to 0 by the generic path, with a warning
+    server.get_synth_bundle("pluck", packet)
+    bad = dict(packet, pan="left")
+    expected = bundles(server, [bad], False)
+    assert bundles(server, [bad], True) == expected
+
+
+def test_templates_are_invalidated(session):
+    clock, server, play = session
+    player = play("p1", room=0.5)
+    player._get_event()
+    packet = player._new_message_header(dict(player.event))
+    server.get_synth_bundle("pluck", packet)
+    assert len(server.bundle_templates) == 1
+
+    server.fxlist.version += 1  # as EffectManager.reload does
+    bundle = server.get_synth_bundle("pluck", packet)
+    assert isinstance(bundle, EncodedBundle) and len(server.bundle_templates) == 1
+
+    server.fxlist.new(SCEffect("room", "", fullname="Reverb2", arguments={"room": 0, "damp": 0.5}, order=2))
+    binary = bundles(server, [packet], True)[0][0]
+    assert b"Reverb2\0" in binary and b"damp" in binary
+    assert bundles(server, [packet], False)[0][0] == binary
+
+    server.loadSynthDef("/tmp/pluck.scd")
+    assert server.bundle_templates == {}
+    server.get_synth_bundle("pluck", packet)
+    server.update_synthdef_dict(server.synthdefs)
+    assert server.bundle_templates == {}
+
+
+def test_templates_are_bounded(session):
+    clock, server, play = session
+    server.max_bundle_templates = 4
+    player = play("p1")
+    player._get_event()
+    packet = player._new_message_header(dict(player.event))
+    for i in range(10):
+        server.get_synth_bundle("pluck", dict(packet, **{"extra{}".format(i): 1.0}))
+    assert len(server.bundle_templates) <= 4
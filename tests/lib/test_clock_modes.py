@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Tests for the TempoClock "threads" and "event" scheduling modes."""
+
+import threading
+import time
+
+import pytest
+
+
+def wait_for(event, timeout=2.0):
+    assert event.wait(timeout), "scheduled callback was not called"
+
+
+@pytest.mark.parametrize("mode", ["threads", "event"])
+def test_scheduled_callback_is_called_on_time(clock, mode):
+    clock.mode = mode
+    clock.start()
+    called = threading.Event()
+    lateness = []
+
+    def callback(beat):
+        lateness.append(time.time() - clock.get_time_at_beat(beat))
+        called.set()
+
+    beat = clock.now() + 1
+    clock.schedule(callback, beat, args=(beat,))
+    wait_for(called)
+    assert 0 <= lateness[0] < 0.05
+
+
+def test_event_mode_has_no_timing_thread(clock):
+    clock.mode = "event"
+    clock.start()
+    assert clock._timing_thread is None
+    assert clock._scheduling_thread.is_alive()
+
+
+def test_event_mode_is_woken_by_earlier_event(clock):
+    clock.mode = "event"
+    clock.start()
+    clock.schedule(lambda: None, clock.now() + 1000)
+    time.sleep(0.05)  # let the scheduler go to sleep on the far event
+    called = threading.Event()
+    clock.schedule(called.set, clock.now() + 0.5)
+    wait_for(called, timeout=0.5)
+
+
+def test_event_mode_wake_while_computing_deadline(clock, monkeypatch):
+    clock.mode = "event"
+    computing = threading.Event()
+    get_next_deadline = clock._get_next_deadline
+
+    def slow_get_next_deadline():
+        deadline = get_next_deadline()
+        if not computing.is_set():
+            computing.set()
+            time.sleep(0.1)  # an earlier event is scheduled meanwhile
+        return deadline
+
+    monkeypatch.setattr(clock, "_get_next_deadline", slow_get_next_deadline)
+    clock.start()
+    assert computing.wait(2)
+    called = threading.Event()
+    lateness = []
+
+    def callback(beat):
+        lateness.append(time.time() - clock.get_time_at_beat(beat))
+        called.set()
+
+    beat = clock.now() + 0.5  # due after the deadline is computed, long before the 0.5s wait ends
+    clock.schedule(callback, beat, args=(beat,))
+    wait_for(called)
+    assert lateness[0] < 0.05
+
+
+def test_set_mode_switches_running_clock(clock):
+    clock.start()
+    assert clock._timing_thread is not None
+    beat = clock.now()
+    clock.set_mode("event")
+    assert clock.mode == "event"
+    assert clock._timing_thread is None
+    assert clock.now() >= beat
+    called = threading.Event()
+    clock.schedule(called.set, clock.now() + 0.5)
+    wait_for(called)
+    clock.set_mode("threads")
+    assert clock._timing_thread.is_alive()
+
+
+def test_set_mode_rejects_unknown_mode(clock):
+    with pytest.raises(ValueError):
+        clock.set_mode("polling")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Tests for the cached effect chains used to build the bundles of notes."""
+
+import random
+
+import pytest
+
+from renardo.lib.Patterns import P
+from renardo.lib.Player import Player
+from renardo.lib.TempoClock.scheduling_queue import QueueBlock
+from renardo.sc_backend import SCEffect
+from renardo.sc_backend.custom_osc_lib import OSCMessage
+
+from .test_offline_render import make_session
+
+EFFECTS = [
+    ("vib", "Vibrato", {"vib": 0, "vibdepth": 0.02}, 0),
+    ("crush", "BitCrush", {"crush": 0, "bits": 8}, 1),
+    ("shape", "Shape", {"shape": 0}, 1),
+    ("hpf", "HPF", {"hpf": 0, "hpr": 1}, 2),
+    ("room", "Reverb", {"room": 0, "mix": 0.1}, 2),
+]
+
+
+@pytest.fixture
+def session():
+    clock, server, play = make_session()
+    for name, fullname, arguments, order in EFFECTS:
+        server.fxlist.new(SCEffect(name, "", fullname=fullname, arguments=arguments, order=order))
+    Player.set_effect_manager(server.fxlist)
+    yield clock, server, play
+    clock.stop()
+
+
+def reference_effect_nodes(server, order, node, bus, group_id, packet):
+    """ How the effect nodes were built before effect chains """
+    pkg = []
+    for fx in server.fxlist.order[order]:
+        if fx in packet and packet[fx] != 0:
+            this_effect = server.prepare_effect(fx, packet)
+            node = server.nextnodeID()
+            msg = OSCMessage("/s_new")
+            msg.append([server.fxlist[fx].fullname, node, 1, group_id, 'bus', bus] + this_effect)
+            pkg.append(msg)
+    return pkg, node
+
+
+def binary(messages):
+    return [message.getBinary() for message in messages]
+
+
+def test_same_nodes_as_checking_every_effect(session):
+    clock, server, play = session
+    rng = random.Random(3)
+    keys = [key for effect in server.fxlist.values() for key in effect.args]
+    for _ in range(200):
+        packet = {key: rng.choice([0, 0, 0.5, 2]) for key in keys if rng.random() < 0.7}
+        chain = server.get_effect_chain(packet)
+        for order in range(3):
+            server.node = 5000
+            expected, last = reference_effect_nodes(server, order, 42, 8, 41, packet)
+            server.node = 5000
+            pkg, node = server.get_effect_nodes(chain[order], 42, 8, 41, packet)
+            assert binary(pkg) == binary(expected) and node == last
+
+
+def test_chains_are_cached_until_effects_change(session):
+    clock, server, play = session
+    packet = {"lpf": 500, "room": 0.5, "hpf": 0}
+    chain = server.get_effect_chain(packet)
+    assert [[name for name, arguments in effects] for effects in chain] == [[], [], ["LPF", "Reverb"]]
+    assert chain[2][1] == ("Reverb", (("room", 0), ("mix", 0.1)))
+    assert server.get_effect_chain(dict(packet)) is chain
+    # Only the given effects are looked up
+    assert server.get_effect_chain(packet, ("room",))[2] == [chain[2][1]]
+
+    server.fxlist.new(SCEffect("dist", "", fullname="Distortion", arguments={"dist": 0}, order=1))
+    assert server.get_effect_chain(packet) is not chain
+    assert server.get_effect_chain(dict(packet, dist=1))[1] == [("Distortion", (("dist", 0),))]
+
+
+def test_player_only_checks_effects_that_can_be_on(session):
+    clock, server, play = session
+    player = play("p1", lpf=[0, 800], room=0.5, vib=0, amp=(1, 0.5))
+    player._get_event()
+    assert player._get_active_effects() == ("lpf", "room")
+    assert player._get_active_effects(degree=2) is None
+
+    bundles = {}
+    timestamp = clock.get_time() + 1
+    for effects in ("plan", "all"):
+        if effects == "all":
+            player.__dict__["_get_active_effects"] = lambda **kwargs: None
+        server.node, server.bus = 5000, 10
+        player.set_queue_block(QueueBlock(clock.scheduling_queue, lambda: None, 0))
+        player._send_osc_messages_to_server(timestamp=timestamp)
+        assert player.active_effects is None
+        bundles[effects] = binary(player.queue_block.osc_messages)
+    assert len(bundles["plan"]) == 2 and bundles["plan"] == bundles["all"]
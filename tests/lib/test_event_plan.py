@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Tests for the compiled Player event plan."""
+
+import json
+import random
+
+import pytest
+
+from renardo.lib.Player import Player
+from renardo.lib.Patterns import P, PRand, PGroup
+from renardo.lib.Player.event_plan import AttributeDict, EventPlan
+
+from .test_offline_render import make_session
+
+
+def normalise(value):
+    """ Returns a value that can be compared with == (PGroups compare element-wise) """
+    if isinstance(value, PGroup):
+        return (type(value).__name__, tuple(map(normalise, value.data)))
+    return value
+
+
+def events(player, plan, n=24):
+    Player.use_event_plan = plan
+    try:
+        result = []
+        for i in range(n):
+            player.event_n = i
+            random.seed(i)
+            player._get_event()
+            result.append({key: normalise(value) for key, value in player.event.items()})
+        return result
+    finally:
+        Player.use_event_plan = True
+
+
+def test_attribute_dict_version():
+    attr = AttributeDict(a=1)
+    assert attr.version == 0
+    attr["b"] = 2
+    attr.update(c=3)
+    attr.pop("a")
+    del attr["b"]
+    assert attr.version == 4 and attr == {"c": 3}
+
+
+KWARGS = [
+    dict(dur=1/4, lpf=500, room=0.3),
+    dict(dur=[1/4, 1/2], amp=PRand([0.5, 1]), pan=[-1, 0, 1]),
+    dict(dur=1/2, sus=(1, 2), lpf=[P(400, 800), 1000]),
+    dict(dur=1/4, delay=P(0, 0.5), amp=[1, 0.5]),
+]
+
+
+@pytest.mark.parametrize("kwargs", KWARGS)
+def test_event_plan_matches_evaluating_every_attribute(kwargs):
+    clock, server, play = make_session()
+    try:
+        player = play("p1", **kwargs)
+        assert events(player, True) == events(player, False)
+    finally:
+        clock.stop()
+
+
+def test_event_plan_classifies_attributes():
+    clock, server, play = make_session()
+    try:
+        player = play("p1", dur=1/4, lpf=500, amp=PRand([0.5, 1]))
+        plan = EventPlan(player.attr)
+        assert "lpf" not in plan.dynamic and plan.template["lpf"] == 500
+        assert ("degree", player.attr["degree"].data) in plan.cyclic
+        assert "amp" in plan.dynamic
+    finally:
+        clock.stop()
+
+
+def test_event_plan_rebuilt_when_attributes_change():
+    clock, server, play = make_session()
+    try:
+        player = play("p1", dur=1/4, lpf=500)
+        player._get_event()
+        plan = player.event_plan
+        player._get_event()
+        assert player.event_plan is plan
+        player.lpf = 300
+        player._get_event()
+        assert player.event_plan is not plan and player.event["lpf"] == 300
+        # Some Player methods write to `attr` directly
+        player.event_n = 1
+        player.attrmap("degree", "lpf", {0: 100, 2: 200, 4: 400}.get)
+        player._get_event()
+        assert player.event["lpf"] == 200
+    finally:
+        clock.stop()
+
+
+def test_rendered_session_unchanged(tmp_path):
+    def render(plan):
+        Player.use_event_plan = plan
+        try:
+            clock, server, play = make_session()
+            play("p1", dur=[1/4, 1/2], amp=PRand([0.5, 1]), lpf=[500, P(300, 900)], pan=[-1, 1])
+            play("p2", dur=1/2, sus=(1, 2), delay=P(0, 0.25))
+            path = tmp_path / "{}.log".format(plan)
+            clock.render(beats=12, path=str(path), format="log", seed=1, start=0)
+            clock.stop()
+            return [json.loads(line) for line in path.read_text().splitlines()]
+        finally:
+            Player.use_event_plan = True
+
+    assert render(True) == render(False)
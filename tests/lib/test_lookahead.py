@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Tests for the TempoClock look-ahead rendering horizon."""
+
+import threading
+import time
+
+import pytest
+
+from renardo.lib.TempoClock.scheduling_queue import QueueBlock
+
+
+class Bundle:
+    """Stand-in for an OSCBundle"""
+    def __init__(self, timetag):
+        self.timetag = timetag
+
+
+class StubPlayer:
+    """Renders one bundle per call, like a Player adding to its queue block"""
+    def __init__(self):
+        self.rerendered = []
+
+    def __call__(self, block):
+        block.append_osc_message(Bundle(block.time))
+
+    def rerender(self, block, event_n, event_index):
+        self.rerendered.append((event_n, event_index))
+        block.append_osc_message(Bundle(block.time))
+
+
+@pytest.fixture
+def sent(clock, monkeypatch):
+    messages = []
+    monkeypatch.setattr(clock.server, "sendOSC", messages.append)
+    return messages
+
+
+def render(clock, block):
+    clock._TempoClock__run_block(block, clock.now())
+
+
+def make_block(clock, beat, func):
+    block = QueueBlock(clock.scheduling_queue, lambda: func(block), beat)
+    return block
+
+
+def test_lookahead_horizon(clock):
+    assert clock.get_lookahead_beats() == 0
+    clock.set_lookahead(1, "beats")
+    assert clock.get_lookahead_beats() == 1
+    clock.set_lookahead(250)  # ms at 240 bpm
+    assert clock.get_lookahead_beats() == pytest.approx(1)
+    with pytest.raises(ValueError):
+        clock.set_lookahead(1, "bars")
+
+
+def test_rendered_block_is_stamped_and_held(clock, sent):
+    clock.set_lookahead(2, "beats")
+    beat = clock.now() + 1
+    block = make_block(clock, beat, lambda b: b.append_osc_message(Bundle(b.time)))
+    render(clock, block)
+    assert block.time == pytest.approx(clock.get_time_at_beat(beat) + clock.latency)
+    assert sent == [] and clock.rendered_blocks() == [block]
+    clock._send_rendered_blocks(beat)
+    assert len(sent) == 1 and sent[0].timetag == block.time
+    assert clock.late_blocks == 0
+
+
+def test_block_rendered_too_late_is_sent_and_counted(clock, sent):
+    clock.set_lookahead(2, "beats")
+    block = make_block(clock, clock.now() - 0.5, lambda b: b.append_osc_message(Bundle(b.time + 1)))
+    render(clock, block)
+    assert len(sent) == 1 and clock.rendered_blocks() == []
+    assert clock.late_blocks == 1
+
+
+def test_late_blocks_counted_from_worker_threads(clock, sent):
+    clock.set_lookahead(2, "beats")
+    beat = clock.now() - 0.5
+
+    def run():
+        for _ in range(200):
+            render(clock, make_block(clock, beat, lambda b: None))
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert clock.late_blocks == 1600
+    clock.reset_stats()
+    assert clock.late_blocks == 0
+
+
+def test_tempo_change_restamps_rendered_blocks(clock, sent):
+    clock.set_lookahead(8, "beats")
+    beat = clock.now() + 4
+    block = make_block(clock, beat, lambda b: b.append_osc_message(Bundle(b.time)))
+    render(clock, block)
+    clock.update_tempo_now(120)
+    expected = clock.get_time_at_beat(beat) + clock.latency
+    assert block.time == pytest.approx(expected)
+    assert block.osc_messages[0].timetag == pytest.approx(expected)
+
+
+def test_run_when_due_items_are_called_on_send(clock, sent):
+    clock.set_lookahead(2, "beats")
+    calls = []
+
+    def func():
+        calls.append(1)
+    func.run_when_due = True
+    beat = clock.now() + 1
+    block = QueueBlock(clock.scheduling_queue, func, beat)
+    render(clock, block)
+    assert calls == []
+    clock._send_rendered_blocks(beat)
+    assert calls == [1]
+
+
+def test_items_rendered_ahead_read_the_block_beat(clock, sent):
+    clock.set_lookahead(2, "beats")
+    beat = clock.now() + 1.5
+    seen = []
+    render(clock, make_block(clock, beat, lambda b: seen.append(clock.now())))
+    assert seen == [beat]
+    # Only in the rendering thread, while rendering
+    assert clock.now() < beat
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(clock.now()))
+    thread.start()
+    thread.join()
+    assert seen[0] < beat
+
+
+def test_cancel_and_rerender(clock, sent):
+    clock.set_lookahead(2, "beats")
+    player = StubPlayer()
+    block = make_block(clock, clock.now() + 1, player)
+    render(clock, block)
+    block.set_rendered(player, (3, 12.0), list(block.osc_messages))
+    old = block.osc_messages[0]
+    clock.rerender(player)
+    assert player.rerendered == [(3, 12.0)]
+    assert len(block.osc_messages) == 1 and block.osc_messages[0] is not old
+    clock.cancel_rendered_blocks(player)
+    assert block.osc_messages == [] and player not in block.rendered
+
+
+def test_set_time_cancels_rendered_blocks(clock, sent):
+    clock.set_lookahead(2, "beats")
+    render(clock, make_block(clock, clock.now() + 1, lambda b: None))
+    clock.set_time(0)
+    assert clock.rendered_blocks() == []
+
+
+@pytest.mark.parametrize("mode", ["threads", "event"])
+def test_lookahead_callback_runs_before_its_beat(clock, mode):
+    clock.mode = mode
+    clock.set_lookahead(1, "beats")
+    clock.start()
+    called = threading.Event()
+    early = []
+
+    def callback(beat):
+        early.append(clock.get_time_at_beat(beat) - time.time())
+        called.set()
+
+    beat = clock.now() + 2
+    clock.schedule(callback, beat, args=(beat,))
+    assert called.wait(2.0)
+    assert 0.15 < early[0] < 0.3  # 1 beat at 240 bpm
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Tests for the node ID allocator and the bus pool of the ServerManager."""
+
+import threading
+
+import pytest
+
+from renardo.sc_backend.node_allocator import BusPool, NodeIDAllocator
+
+from .test_offline_render import make_session
+
+
+@pytest.fixture
+def session():
+    clock, server, play = make_session()
+    yield clock, server, play
+    clock.stop()
+
+
+def test_node_ids_in_one_thread():
+    nodes = NodeIDAllocator(1000, range_size=8)
+    assert nodes.last == 1000
+    assert [nodes.next() for _ in range(20)] == list(range(1001, 1021))
+    assert nodes.last == 1020 and nodes.ranges == 3
+    nodes.reset(5000)
+    assert nodes.next() == 5001
+
+
+def test_node_ids_are_unique_across_threads():
+    nodes = NodeIDAllocator(1000, range_size=16)
+    got = [[] for _ in range(8)]
+    barrier = threading.Barrier(len(got))
+
+    def run(ids):
+        barrier.wait()
+        for _ in range(5000):
+            ids.append(nodes.next())
+
+    threads = [threading.Thread(target=run, args=(ids,)) for ids in got]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    every = [node for ids in got for node in ids]
+    assert len(set(every)) == len(every) == 40000
+    assert min(every) == 1001
+    # Each thread gets increasing IDs
+    assert all(ids == sorted(ids) for ids in got)
+
+
+def test_node_ids_of_short_lived_threads():
+    # In the clock's "thread" executor mode every block runs in a thread of its own
+    nodes = NodeIDAllocator(1000, range_size=64)
+    got = []
+
+    def run():
+        got.extend(nodes.next() for _ in range(5))
+
+    for _ in range(100):
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+    assert got == list(range(1001, 1501))
+    assert nodes.ranges == 8
+    # Threads running at the same time still get IDs of their own
+    barrier = threading.Barrier(4)
+    ids = [[] for _ in range(4)]
+
+    def run_together(got):
+        barrier.wait()
+        got.extend(nodes.next() for _ in range(100))
+
+    threads = [threading.Thread(target=run_together, args=(got,)) for got in ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    every = got + [node for got in ids for node in got]
+    assert len(set(every)) == len(every)
+    nodes.reset(5000)
+    assert nodes.stats()["spare"] == 0 and nodes.next() == 5001
+
+
+def test_node_ids_in_clock_thread_mode(session):
+    clock, server, play = session
+    clock.set_block_executor("thread")
+    clock.start()
+    server.node = 1000
+    ids, done = [], threading.Event()
+
+    def block():
+        ids.extend(server.nextnodeID() for _ in range(3))
+        if len(ids) == 60:
+            done.set()
+
+    start = clock.now() + 0.1
+    for i in range(20):
+        clock.schedule(block, start + i * 0.05)
+    assert done.wait(5)
+    assert len(set(ids)) == 60
+    assert server.nodes.ranges <= 4  # instead of one per block
+
+
+def test_node_ids_wrap_around():
+    nodes = NodeIDAllocator(1000, range_size=10, max_id=1030)
+    assert [nodes.next() for _ in range(30)][-10:] == list(range(1001, 1011))
+
+
+def test_buses_are_not_shared_by_playing_notes():
+    pool = BusPool(4, 20)
+    assert pool.size == 8
+    # Four notes of 1 second each second: never more than 4 playing at the same time
+    notes = []
+    for i in range(40):
+        start = i / 4
+        notes.append((start, start + 1, pool.allocate(start, start + 1, group=i)))
+    for start, end, bus in notes:
+        playing = [other for other in notes if other[0] < end and start < other[1]]
+        assert len({note[2] for note in playing}) == len(playing)
+    assert pool.exhausted == 0 and pool.peak <= 5
+    assert pool.stats(now=notes[-1][0])["in_use"] == 4
+
+
+def test_bus_exhaustion():
+    pool = BusPool(4, 10)
+    buses = [pool.allocate(0, 10 + i, group=i) for i in range(3)]
+    assert buses == [4, 6, 8] and pool.exhausted == 0
+    # Every bus is in use: the one released first is shared
+    assert pool.allocate(1, 20, group=3) == 4
+    assert pool.exhausted == 1
+    assert pool.stats(now=1)["exhausted"] == 1
+    # Released buses are free again
+    assert pool.release(1) == 6
+    assert pool.release(1) is None
+    assert pool.allocate(2, 20) == 6
+    assert pool.exhausted == 1 and pool.released == 1
+
+
+def test_buses_of_notes_given_out_of_order():
+    now = [0.0]
+    pool = BusPool(4, 8, time=lambda: now[0])
+    first = pool.allocate(1.0, 1.5, group=1)
+    # A note starting after the release of the first one is given a bus before a note of
+    # another Player starting earlier: the first bus is not free until the clock gets there,
+    # so the earlier note has to share it
+    later = pool.allocate(2.0, 2.5, group=2)
+    assert later != first and pool.exhausted == 0
+    assert pool.allocate(1.2, 1.7, group=3) == first and pool.exhausted == 1
+    now[0] = 3.0
+    assert pool.stats()["in_use"] == 0
+    assert pool.allocate(3.5, 4.0) in (first, later) and pool.exhausted == 1
+
+
+def test_empty_bus_pool():
+    pool = BusPool(4, 4)
+    assert pool.size == 0
+    with pytest.raises(RuntimeError, match="empty"):
+        pool.allocate(0, 1)
+
+
+def test_server_buses(session):
+    clock, server, play = session
+    player = play("p1", sus=16)
+    player._get_event()
+    packet = player._new_message_header(dict(player.event))
+    server.bus = 0
+    buses = set()
+    for _ in range(10):
+        server.get_synth_bundle("pluck", packet, 1000.0)
+        buses.add(server.bus)
+    assert len(buses) == 10
+    assert server.allocation_stats()["buses"]["exhausted"] == 0
+
+    # The bus of a note is free once scsynth reports the end of its group
+    server.bus = 0
+    server.get_synth_bundle("pluck", packet, 1000.0)
+    (group, bus), = server.buses.groups.items()
+    assert bus == server.bus and group < server.node
+    server._handle_node_end("/n_end", [group, 1, -1, -1, 1], ("127.0.0.1", 57110))
+    assert server.buses.groups == {} and server.buses.released == 1
+    assert server.allocation_stats()["buses"]["buses"] == 48
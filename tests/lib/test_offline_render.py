@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Tests for TempoClock.render (offline rendering to an OSC score / replay log)."""
+
+import json
+import threading
+
+import pytest
+
+from renardo.lib.TempoClock.offline import read_score
+
+
+def make_session():
+    """Returns a clock, its server and a function starting a 'pluck' Player, without SuperCollider"""
+    from renardo.sc_backend import ServerManager, EffectManager, SCEffect
+    from renardo.sc_backend.sc_music_resource import SCInstrument
+    from renardo.lib.TempoClock import TempoClock
+    from renardo.lib.Player import Player
+    from renardo.lib.TimeVar import TimeVar
+
+    server = ServerManager("127.0.0.1", 0, 0)
+    SCEffect.set_server(server)
+    fx = EffectManager()
+    fx.new(SCEffect("lpf", "", fullname="LPF", arguments={"lpf": 0, "lpr": 1}, order=2))
+    server.setFx(fx)
+    synths = {}
+    SCInstrument.set_instrument_dict(synths)
+    SCInstrument.set_server(server)
+    pluck = SCInstrument("pluck", "", auto_load_to_server=False)
+    server.update_synthdef_dict(synths)
+    Player.set_effect_manager(fx)
+    Player.set_synth_dict(synths)
+
+    TempoClock.set_server(server)
+    clock = TempoClock(bpm=120)
+    server.set_clock(clock)
+    Player.set_clock(clock)
+    TimeVar.set_clock(clock)
+
+    def play(name, **kwargs):
+        player = Player(name)
+        player >> pluck([0, 2, 4], **kwargs)
+        return player
+
+    return clock, server, play
+
+
+@pytest.fixture
+def session():
+    clock, server, play = make_session()
+    yield clock, server, play
+    clock.stop()
+
+
+def test_render_score(session, tmp_path):
+    clock, server, play = session
+    play("p1", dur=1/2)
+    path = tmp_path / "score.osc"
+    stats = clock.render(beats=8, path=str(path), start=0)
+    # The player starts on the next bar (beat 4): 8 notes until beat 8
+    assert stats["events"] == 8 and stats["bundles"] == 8
+    assert stats["seconds"] == pytest.approx(4.0)
+    assert stats["events_per_second"] > 0
+
+    score = read_score(str(path))
+    times = [seconds for seconds, _ in score]
+    assert times == sorted(times)
+    assert score[0] == (0.0, [["/g_new", ",iii", 1, 0, 0]])
+    assert score[-1][0] == pytest.approx(4.0)
+    notes = [seconds for seconds, messages in score if messages[0][0] == "/g_new" and messages[0][2] != 1]
+    assert notes == pytest.approx([2.0 + 0.25 * i for i in range(8)])
+    assert clock.now() == pytest.approx(8, abs=0.1)
+
+
+def test_render_log_is_deterministic(tmp_path):
+    from renardo.lib.Patterns import PRand
+
+    def render(name):
+        clock, server, play = make_session()
+        play("p1", dur=1/4, amp=PRand([0.5, 1]))
+        path = tmp_path / name
+        clock.render(beats=8, path=str(path), format="log", seed=42, start=0)
+        clock.stop()
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    first, second = render("first.log"), render("second.log")
+    assert len(first) == 16
+    assert first == second
+    assert first[0]["time"] == 2.0 and first[1]["time"] == pytest.approx(2.125)
+    assert first[0]["beat"] == 4
+
+
+def test_render_calls_items_in_live_order(session):
+    from renardo.lib.TempoClock.scheduling_queue import QueueBlock
+
+    clock, server, play = session
+    calls = []
+
+    def due():
+        calls.append("due")
+    due.run_when_due = True
+    for lookahead, expected in ((0, ["due", "other"]), (1, ["other", "due"])):
+        clock.set_lookahead(lookahead, "beats")
+        calls.clear()
+        block = QueueBlock(clock.scheduling_queue, due, 0)
+        block.add(lambda: calls.append("other"))
+        clock._render_block(block)
+        assert calls == expected
+
+
+def test_clock_starts_after_render(session):
+    clock, server, play = session
+    clock.stop()
+    assert not clock.ticking
+    clock.render(beats=4, start=0)
+    assert not clock.ticking
+    called = threading.Event()
+    clock.schedule(called.set, clock.now() + 0.5)
+    assert clock.ticking and called.wait(2)
+    assert clock.now() > 4
+
+
+def test_render_rejects_unknown_format(session):
+    clock, server, play = session
+    with pytest.raises(ValueError):
+        clock.render(beats=1, format="wav")
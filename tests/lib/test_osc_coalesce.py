@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Tests for nesting the bundles of a clock block into MTU sized datagrams."""
+
+import socket
+import struct
+
+import pytest
+
+from renardo.lib.TempoClock import QueueBlock
+from renardo.sc_backend import ServerManager
+from renardo.sc_backend.custom_osc_lib import OSCBundle, OSCMessage
+from renardo.sc_backend.osc_encoder import BUNDLE_HEADER_SIZE, coalesce_bundles, nest_bundles
+from renardo.settings_manager import settings
+
+from .test_offline_render import make_session
+
+
+def elements(binary):
+    """ Returns the time tag and elements of a binary bundle """
+    assert binary[:8] == b"#bundle\0"
+    timetag, pos, items = binary[8:16], 16, []
+    while pos < len(binary):
+        size, = struct.unpack(">i", binary[pos:pos + 4])
+        items.append(binary[pos + 4:pos + 4 + size])
+        pos += 4 + size
+    assert pos == len(binary)
+    return timetag, items
+
+
+def note_bundles(session, count, timestamp):
+    """ Returns the bundles of `count` notes played at `timestamp` """
+    clock, server, play = session
+    block = QueueBlock(clock.scheduling_queue, lambda: None, 0)
+    for i in range(count):
+        player = play("p{}".format(i), lpf=[0, 500], amp=0.5)
+        player.set_queue_block(block)
+        player._get_event()
+        player._send_osc_messages_to_server(timestamp=timestamp)
+    return block
+
+
+@pytest.fixture
+def session():
+    clock, server, play = make_session()
+    yield clock, server, play
+    clock.stop()
+
+
+@pytest.fixture
+def coalesce():
+    keys = ("sc_backend.OSC_COALESCE_BUNDLES", "sc_backend.OSC_MTU")
+    previous = {key: settings.get(key) for key in keys}
+    settings.set("sc_backend.OSC_COALESCE_BUNDLES", True)
+    settings.set("sc_backend.OSC_MTU", 1500)
+    yield
+    for key, value in previous.items():
+        settings.set(key, value)
+
+
+def test_nest_bundles():
+    bundles = []
+    for i in range(10):
+        bundle = OSCBundle(time=100)
+        msg = OSCMessage("/s_new")
+        msg.append(["pluck", 1000 + i, 0, 1] + [0.5] * i * 8)
+        bundle.append(msg)
+        bundles.append(bundle)
+    sizes = [len(bundle.getBinary()) for bundle in bundles]
+    max_size = BUNDLE_HEADER_SIZE + 4 + sizes[-1]
+
+    datagrams = nest_bundles(bundles, max_size)
+    assert 1 < len(datagrams) < len(bundles)
+    nested = []
+    for datagram in datagrams:
+        binary = datagram.getBinary()
+        assert len(binary) <= max_size
+        if datagram in bundles:
+            nested.append(binary)
+        else:
+            timetag, items = elements(binary)
+            assert timetag == bundles[0].getBinary()[8:16] and len(items) > 1
+            nested.extend(items)
+    # Every bundle, in order, with the same bytes
+    assert nested == [bundle.getBinary() for bundle in bundles]
+
+    # Bundles too large for a datagram are sent on their own
+    datagrams = nest_bundles(bundles, BUNDLE_HEADER_SIZE + 4 + sizes[3])
+    assert datagrams[-6:] == bundles[-6:]
+    assert nest_bundles(bundles, 10) == bundles
+
+
+def test_coalesce_keeps_other_messages():
+    a, b, c = (OSCBundle(time=t) for t in (100, 100, 200))
+    for bundle in (a, b, c):
+        bundle.append(OSCMessage("/n_free"))
+    midi = OSCBundle("/foxdot_midi", time=100)
+    midi.append(OSCMessage("/foxdot_midi"))
+    message = OSCMessage("/b_free")
+    datagrams = coalesce_bundles([a, midi, c, b, message], 1000)
+    assert datagrams[1:] == [midi, c, message]
+    assert elements(datagrams[0].getBinary())[1] == [a.getBinary(), b.getBinary()]
+
+
+def test_settings_are_read_on_change():
+    assert ServerManager.coalesce_size is None
+    keys = ("sc_backend.OSC_COALESCE_BUNDLES", "sc_backend.OSC_MTU")
+    previous = {key: settings.get(key) for key in keys}
+    try:
+        settings.set("sc_backend.OSC_COALESCE_BUNDLES", True)
+        settings.set("sc_backend.OSC_MTU", 9000)
+        assert ServerManager.coalesce_size == 9000 - 28
+    finally:
+        for key, value in previous.items():
+            settings.set(key, value)
+    assert ServerManager.coalesce_size is None
+
+
+def test_block_sends_fewer_datagrams(session, request):
+    clock, server, play = session
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(("127.0.0.1", 0))
+    sink.settimeout(1)
+    server.client.connect(sink.getsockname())
+
+    def receive(block):
+        sent = block.send_osc_messages()
+        datagrams = [sink.recv(65536) for _ in sent]
+        return sent, datagrams
+
+    timestamp = clock.get_time() + 3600
+    block = note_bundles(session, 12, timestamp)
+    try:
+        sent, separate = receive(block)
+        assert len(sent) == 12
+
+        request.getfixturevalue("coalesce")
+        sent, nested = receive(block)
+    finally:
+        sink.close()
+    assert 1 < len(sent) < 12
+    assert all(len(datagram) <= 1500 - 28 for datagram in nested)
+    assert [item for datagram in nested for item in elements(datagram)[1]] == separate
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Golden tests for the OSC encoder writing note bundles into bytearrays."""
+
+import random
+import socket
+import struct
+
+import pytest
+
+from renardo.lib.Player import Player
+from renardo.lib.TempoClock.offline import score_bundle
+from renardo.sc_backend import SCEffect
+from renardo.sc_backend.custom_osc_lib import OSCBundle, OSCClient, OSCMessage, decodeOSC
+from renardo.sc_backend.osc_encoder import EncodedBundle, OSCEncoder, padded_string
+
+from .test_offline_render import make_session
+
+
+def reference_bundle(messages, timestamp=0):
+    """ Encodes (address, args) messages with OSCMessage and OSCBundle """
+    bundle = OSCBundle(time=timestamp)
+    for address, args in messages:
+        msg = OSCMessage(address)
+        msg.append(args)
+        bundle.append(msg)
+    return bundle
+
+
+def encoded_bundle(messages, timestamp=0, encoder=None):
+    encoder = encoder or OSCEncoder()
+    for address, args in messages:
+        encoder.add_message(address, args)
+    return encoder.bundle(timestamp)
+
+
+def random_args(rng):
+    values = [
+        lambda: rng.randint(-2 ** 31, 2 ** 31 - 1),
+        lambda: rng.uniform(-1e6, 1e6),
+        lambda: float(rng.randint(0, 4)),
+        lambda: "".join(rng.choice("abcdefgh") for _ in range(rng.randint(0, 9))),
+        lambda: rng.choice(["bus", "sus", "freq", "été", ""]),
+    ]
+    return [rng.choice(values)() for _ in range(rng.randint(0, 70))]
+
+
+def test_same_bytes_as_osc_bundle():
+    rng = random.Random(5)
+    encoder = OSCEncoder(size=16)  # grows while writing
+    for _ in range(300):
+        messages = [("/s_new" if rng.random() < 0.8 else "/a" * rng.randint(1, 5), random_args(rng))
+                    for _ in range(rng.randint(0, 12))]
+        timestamp = rng.choice([0, 1700000000.25 + rng.random()])
+        expected = reference_bundle(messages, timestamp)
+        bundle = encoded_bundle(messages, timestamp, encoder)
+        assert bundle.getBinary() == expected.getBinary()
+        assert bytes(bundle.getBuffer()) == expected.getBinary()
+        assert bundle.message == expected.message and bundle.typetags == expected.typetags
+        assert expected == bundle and len(bundle) == len(messages)
+
+
+def test_other_argument_types_are_encoded_like_osc_message():
+    class Name(str):
+        pass
+    messages = [("/s_new", [Name("pluck"), 1, 2.5, Name("bus")])]
+    assert encoded_bundle(messages).getBinary() == reference_bundle(messages).getBinary()
+    with pytest.raises(struct.error):
+        encoded_bundle([("/s_new", [2 ** 31])])
+    with pytest.raises(AttributeError):
+        encoded_bundle([("/s_new", [None])])
+
+
+def test_padded_strings():
+    for text in ("", "abc", "abcd", "synth", "été"):
+        binary = padded_string(text)
+        assert len(binary) % 4 == 0 and binary.rstrip(b"\0") == text.encode()
+        assert binary.endswith(b"\0") and padded_string(text) is binary
+
+
+def test_encoded_bundles_behave_like_osc_bundles():
+    messages = [("/g_new", [1001, 1, 1]), ("/s_new", ["pluck", 1002, 1, 1001, "bus", 4, "amp", 0.5])]
+    bundle, expected = encoded_bundle(messages, 100.5), reference_bundle(messages, 100.5)
+    # Moving the time tag (see QueueBlock.restamp)
+    bundle.timetag += 2
+    expected.timetag += 2
+    assert bundle.getBinary() == expected.getBinary()
+    assert decodeOSC(bundle.getBinary())[2:] == decodeOSC(expected.getBinary())[2:]
+    assert [msg.getBinary() for msg in bundle.values()] == [msg.getBinary() for msg in expected.values()]
+    assert score_bundle(1.5, bundle) == score_bundle(1.5, expected)
+
+    copy = bundle.copy()
+    assert isinstance(copy, EncodedBundle) and copy.getBinary() == bundle.getBinary()
+    extra = OSCMessage("/n_free")
+    extra.append(1002)
+    bundle.append(extra)
+    expected.append(extra)
+    assert bundle.getBinary() == expected.getBinary() and copy.getBinary() != bundle.getBinary()
+
+    outer, reference = OSCBundle(), OSCBundle()
+    outer.append(bundle)
+    reference.append(expected)
+    assert outer.getBinary() == reference.getBinary()
+
+
+def test_client_sends_the_buffer():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(2)
+    client = OSCClient()
+    client.connect(receiver.getsockname())
+    try:
+        bundle = encoded_bundle([("/s_new", ["pluck", 1002, 1, 1001, "freq", 440.0])], 100.0)
+        client.send(bundle)
+        assert receiver.recv(4096) == bundle.getBinary()
+        # The memoryview given to the socket doesn't keep the bundle from changing
+        bundle.timetag = 200.0
+        client.send(bundle)
+        assert receiver.recv(4096) == bundle.getBinary()
+    finally:
+        client.close()
+        receiver.close()
+
+
+@pytest.fixture
+def session():
+    clock, server, play = make_session()
+    for name, fullname, arguments, order in (("vib", "Vibrato", {"vib": 0, "vibdepth": 0.02}, 0),
+                                              ("room", "Reverb", {"room": 0, "mix": 0.1}, 2)):
+        server.fxlist.new(SCEffect(name, "", fullname=fullname, arguments=arguments, order=order))
+    Player.set_effect_manager(server.fxlist)
+    yield clock, server, play
+    clock.stop()
+
+
+def reference_synth_bundle(server, synthdef, packet, timestamp):
+    """ How ServerManager.get_synth_bundle built bundles before the encoder """
+    bundle = OSCBundle(time=timestamp)
+    synthdef = server.synthdefs[synthdef]
+    group_id = server.nextnodeID()
+    msg = OSCMessage("/g_new")
+    msg.append([group_id, 1, 1])
+    bundle.append(msg)
+    this_bus = server.nextbusID()
+    this_node = server.nextnodeID()
+    msg, this_node = server.get_init_node(this_node, this_bus, group_id, synthdef, packet)
+    bundle.append(msg)
+    pkg, this_node = server.get_control_effect_nodes(this_node, this_bus, group_id, packet)
+    for msg in pkg:
+        bundle.append(msg)
+    msg, this_node = server.get_synth_node(this_node, this_bus, group_id, synthdef, packet)
+    bundle.append(msg)
+    pkg, this_node = server.get_pre_env_effect_nodes(this_node, this_bus, group_id, packet)
+    for msg in pkg:
+        bundle.append(msg)
+    pkg, this_node = server.get_post_env_effect_nodes(this_node, this_bus, group_id, packet)
+    for msg in pkg:
+        bundle.append(msg)
+    msg, _ = server.get_exit_node(this_node, this_bus, group_id, packet)
+    bundle.append(msg)
+    return bundle
+
+
+def test_synth_bundles_are_unchanged(session):
+    clock, server, play = session
+    player = play("p1", lpf=[0, 800], room=[0, 0.5], vib=[0, 0, 2], amp=[1, 0.5], pan=[-1, 1])
+    for n in range(12):
+        player.event_n = n
+        player._get_event()
+        packet = player._new_message_header(dict(player.event))
+        server.node, server.bus = 5000, 10
+        expected = reference_synth_bundle(server, "pluck", packet, 1700000000.5)
+        state = server.node, server.bus
+        server.node, server.bus = 5000, 10
+        bundle = server.get_synth_bundle("pluck", packet, timestamp=1700000000.5)
+        assert isinstance(bundle, EncodedBundle)
+        assert bundle.getBinary() == expected.getBinary()
+        assert (server.node, server.bus) == state
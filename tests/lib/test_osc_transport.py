@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Tests for the asyncio OSC transport of queries, against a stub scsynth / sclang."""
+
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from renardo.sc_backend import ServerManager
+from renardo.sc_backend.custom_osc_lib import OSCMessage, decodeOSC
+from renardo.sc_backend.osc_transport import OSCTransport, RequestTimeout, ServerStatus
+
+STATUS = [1, 20, 4, 5, 120, 1.5, 3.0, 48000.0, 47999.5]
+INFO = [48000.0, 47999.5, 4, 5, 1024, 16384, 2, 2, 1024, 8192, 2048]
+
+
+class StubServer:
+    """Replies to /status, /foxdot/info and /sync like scsynth and sclang do. Replies to /sync
+    are held until `hold` of them were received, then sent in reverse order"""
+
+    def __init__(self, hold=1):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.settimeout(0.05)
+        self.address = self.socket.getsockname()
+        self.hold = hold
+        self.received = []
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def message(address, args):
+        msg = OSCMessage(address)
+        msg.append(args)
+        return msg.getBinary()
+
+    def run(self):
+        held = []
+        while self.running:
+            try:
+                data, remote = self.socket.recvfrom(65536)
+            except socket.timeout:
+                continue
+            decoded = decodeOSC(data)
+            self.received.append(decoded)
+            if decoded[0] == "/status":
+                self.socket.sendto(self.message("/n_go", [1000, 1, -1, -1, 0]), remote)  # not a reply
+                self.socket.sendto(self.message("/status.reply", STATUS), remote)
+            elif decoded[0] == "/foxdot/info":
+                self.socket.sendto(self.message("/foxdot/info", INFO), remote)
+            elif decoded[0] == "/sync":
+                held.append((decoded[2], remote))
+                if len(held) >= self.hold:
+                    for token, remote in reversed(held):
+                        self.socket.sendto(self.message("/synced", [token]), remote)
+                    held = []
+            elif decoded[0] == "/notify":
+                self.socket.sendto(self.message("/n_end", [1234, 1, -1, -1, 1]), remote)
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        self.socket.close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer(hold=3)
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def transport():
+    transport = OSCTransport()
+    yield transport
+    transport.close()
+
+
+def test_synchronous_queries(stub, transport):
+    status = transport.query_status(stub.address)
+    assert status == ServerStatus(*STATUS[1:])
+    assert status.num_synths == 4
+    assert transport.request(OSCMessage("/foxdot/info"), stub.address, "/foxdot/info") == INFO
+    with pytest.raises(RequestTimeout):
+        transport.request(OSCMessage("/unknown"), stub.address, "/unknown.reply", timeout=0.1)
+    assert transport.osc.pending == {}
+
+
+def sync_message(token):
+    message = OSCMessage("/sync")
+    message.append(token)
+    return message
+
+
+def test_concurrent_queries_are_correlated(stub, transport):
+    async def queries():
+        osc = transport.osc
+        return await asyncio.gather(
+            *(osc.request(sync_message(token), stub.address, "/synced", token) for token in (7, 8)),
+            osc.query_status(stub.address),
+            osc.sync(stub.address))
+
+    # The replies to /sync come in reverse order, after the /status reply
+    first, second, status, token = transport.call(queries(), timeout=5)
+    assert (first, second) == ([7], [8])
+    assert status.num_ugens == 20
+    assert [message[2] for message in stub.received if message[0] == "/sync"] == [7, 8, token]
+
+
+def test_awaitable_from_another_loop(stub, transport):
+    async def queries():
+        return await asyncio.gather(*(transport.run(transport.osc.query_status(stub.address)) for _ in range(5)))
+
+    assert asyncio.run(queries()) == [ServerStatus(*STATUS[1:])] * 5
+
+
+def test_server_manager_queries(stub):
+    server = ServerManager("localhost", stub.address[1], stub.address[1])
+    try:
+        assert server.getInfo().num_audio_bus_channels == 1024
+        assert server.getStatus().num_groups == 5
+        assert asyncio.run(server.query_status()).avg_cpu == 1.5
+        assert asyncio.run(server.query_info()).max_nodes == 8192
+
+        # /n_end notifications free the bus of a note's group
+        bus = server.nextbusID(1000.0, 10, group=1234)
+        server.watch_node_ends()
+        server.getStatus()  # replied after /n_end
+        assert server.buses.groups == {} and server.buses.free[-1] == bus
+    finally:
+        server.transport.close()
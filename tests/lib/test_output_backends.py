@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Tests for the Players' output backends."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from renardo.lib.InstrumentProxy import InstrumentProxy
+from renardo.lib.Player import Player
+from renardo.lib.Player.output_backends import (
+    OutputBackend, SCBundleBackend, SCMidiBackend, AbletonBackend, ReaperFreshBackend,
+    register_output_backend, get_output_backend,
+)
+from renardo.lib.TempoClock.scheduling_queue import QueueBlock
+from renardo.sc_backend.Midi import MidiInstrumentProxy, ReaperInstrumentProxy
+
+from .test_offline_render import make_session
+
+
+@pytest.fixture
+def session():
+    clock, server, play = make_session()
+    yield clock, server, play
+    clock.stop()
+
+
+class RecordingProxy(InstrumentProxy):
+    def __init__(self, degree=0, **kwargs):
+        InstrumentProxy.__init__(self, "pluck", degree, kwargs)
+
+
+class RecordingBackend(OutputBackend):
+    name = "recording"
+    calls = []
+
+    def emit(self, messages, timestamp):
+        self.calls.append(([dict(message) for message in messages], timestamp))
+
+
+register_output_backend("RecordingProxy", RecordingBackend)
+
+
+def send_event(player, clock):
+    player._get_event()
+    player.set_queue_block(QueueBlock(clock.scheduling_queue, lambda: None, 0))
+    timestamp = clock.get_time() + 1
+    player._send_osc_messages_to_server(timestamp=timestamp)
+    return timestamp
+
+
+def test_backend_bound_on_rshift(session):
+    clock, server, play = session
+    player = play("p1")
+    assert type(player.output_backend) is SCBundleBackend and player.output_backend.synthdef == "pluck"
+    player >> MidiInstrumentProxy([0, 1])
+    assert type(player.output_backend) is SCMidiBackend
+    player >> ReaperInstrumentProxy([0, 1])
+    assert type(player.output_backend) is SCMidiBackend
+    player >> RecordingProxy([0, 1])
+    assert type(player.output_backend) is RecordingBackend
+
+
+def test_registry_uses_most_specific_class(session):
+    clock, server, play = session
+    player = play("p1")
+
+    class AbletonInstrument(MidiInstrumentProxy):
+        pass
+
+    assert type(get_output_backend(player, AbletonInstrument())) is AbletonBackend
+    assert type(get_output_backend(player, None)) is SCBundleBackend
+
+
+def test_chord_emitted_in_one_call(session):
+    clock, server, play = session
+    player = Player("p2")
+    player >> RecordingProxy((0, 2, 4), amp=(1, 0.5, 0))
+    RecordingBackend.calls.clear()
+    timestamp = send_event(player, clock)
+    assert len(RecordingBackend.calls) == 1
+    messages, emitted_at = RecordingBackend.calls[0]
+    assert emitted_at == timestamp
+    assert [message["midinote"] for message in messages] == [60.0, 64.0, 67.0]
+    # The backend filters the messages it doesn't send (amp=0 here)
+    assert [message["amp"] for message in messages] == [1, 0.5, 0]
+
+
+def test_nested_chord_voices_are_emitted(session, monkeypatch):
+    from renardo.lib.Patterns import P
+
+    clock, server, play = session
+    player = play("p1")
+    player.degree = [P(0, P(2, 4))]
+    emitted = []
+    monkeypatch.setattr(player.output_backend, "emit",
+                        lambda messages, timestamp: emitted.extend(dict(message) for message in messages))
+    send_event(player, clock)
+    assert [round(message["freq"], 1) for message in emitted] == [261.6, 329.6, 392.0]
+    assert [message["degree"] for message in emitted] == [0, 2, 4]
+
+
+def test_sc_backend_bundles(session):
+    clock, server, play = session
+    player = play("p1", amp=(1, 0, 1))
+    timestamp = send_event(player, clock)
+    bundles = player.queue_block.osc_messages
+    assert len(bundles) == 2
+    assert [bundle.timetag for bundle in bundles] == [timestamp, timestamp]
+
+
+def test_reaper_fresh_backend(session):
+    from renardo.reaper_backend_fresh.reaper_fresh_instrument import ReaperFreshInstrument
+
+    clock, server, play = session
+    notes = []
+    project = SimpleNamespace(_osc=SimpleNamespace(play_note=lambda *args: notes.append(args)))
+    player = Player("p3")
+    player >> ReaperFreshInstrument(project=project, channel=2, degree=(0, 4), sus=0.5, amp=0.5)
+    assert type(player.output_backend) is ReaperFreshBackend
+    send_event(player, clock)
+    assert notes == [(3, 60, 63, 250), (3, 67, 63, 250)]
+    # Never sent to SuperCollider
+    assert player.queue_block.osc_messages == []
+
+
+def test_reaper_fresh_project_created_after_binding(session, monkeypatch):
+    import sys
+    from renardo.reaper_backend_fresh.reaper_fresh_instrument import ReaperFreshInstrument
+    from renardo.settings_manager import settings
+
+    clock, server, play = session
+    # No runtime (and no project) when the instrument is assigned
+    monkeypatch.delitem(sys.modules, "renardo.runtime", raising=False)
+    player = Player("p3")
+    player >> ReaperFreshInstrument(channel=0, degree=0, sus=0.5, amp=1)
+    send_event(player, clock)
+    assert player.queue_block.osc_messages == []
+
+    notes = []
+    project = SimpleNamespace(_osc=SimpleNamespace(play_note=lambda *args: notes.append(args)))
+    monkeypatch.setitem(sys.modules, "renardo.runtime", SimpleNamespace(reaper_fresh_project=project))
+    send_event(player, clock)
+    assert notes == [(1, 60, 127, 250)]
+
+    # Notes go to SuperCollider while the REAPER backend is disabled
+    sent = []
+    monkeypatch.setattr(player.output_backend.sc_backend, "emit", lambda messages, timestamp: sent.append(messages))
+    enabled = settings.get("reaper_backend.REAPER_BACKEND_ENABLED")
+    settings.set("reaper_backend.REAPER_BACKEND_ENABLED", False)
+    try:
+        send_event(player, clock)
+    finally:
+        settings.set("reaper_backend.REAPER_BACKEND_ENABLED", enabled)
+    assert len(notes) == 1 and len(sent) == 1
+
+
+def test_midi_backend(session, monkeypatch):
+    player_integration = pytest.importorskip("renardo.midi_backend.player_integration")
+
+    clock, server, play = session
+    player = play("p4")
+    scheduled = []
+    monkeypatch.setattr(player_integration.midi_clock, "schedule_note", lambda *args, **kwargs: scheduled.append(kwargs))
+    instrument = SimpleNamespace(instrument=SimpleNamespace(output="port", channel=1))
+    player.output_backend = player_integration.MidiBackend(player, instrument)
+    player.event_n = 0
+    send_event(player, clock)
+    # Degrees are sent as they are, not through the Player's scale
+    assert [kwargs["note"] for kwargs in scheduled] == [
+        player_integration._midi_note_from_degree(degree, 5) for degree in (0, 2, 4)
+    ]
+    assert [kwargs["note_id"] for kwargs in scheduled] == ["p4_0_0", "p4_0_1", "p4_0_2"]
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Golden test: iterative PGroup expansion in Player._send_osc_message."""
+
+import pytest
+
+from renardo.lib.Player import Player
+from renardo.lib.Patterns import P, PGroup
+from renardo.lib.Patterns.PGroups import PGroupPlus, PGroupMod
+
+from .test_offline_render import make_session
+
+
+def recursive_send_osc_message(self, event, index, timestamp=None, verbose=True, **kwargs):
+    """ The recursive implementation used before, kept as the reference """
+    packet = {}
+    event = event.copy()
+    event.update(kwargs)
+    for key, value in event.items():
+        if isinstance(value, PGroup):
+            new_event = {}
+            for new_key, new_value in event.items():
+                if isinstance(new_value, PGroup):
+                    new_event[new_key] = new_value[index]
+                else:
+                    new_event[new_key] = new_value
+            for i in range(self._get_event_length(new_event)):
+                recursive_send_osc_message(self, new_event, i, timestamp, verbose)
+            return None
+        else:
+            packet[key] = value
+    if ("amp" in packet) and ("amplify" in packet):
+        packet["amp"] = packet["amp"] * packet["amplify"]
+    self._push_osc_to_server(packet, timestamp, verbose, **kwargs)
+    return None
+
+
+SHAPES = [
+    {},
+    {"degree": P(0, 2, 4)},
+    {"degree": P(0, P(2, 4))},
+    {"degree": P(P(0, 1), P(2, 3, 4), 5)},
+    {"degree": P(0, P(2, P(4, 6, 7)))},
+    {"degree": P(0, 2, 4), "amp": P(1, 0.5)},
+    {"degree": P(0, 2), "amp": P(1, 0.5, 0.25), "pan": P(-1, P(0, 1))},
+    {"degree": P(0, P(1, 2)), "lpf": P(P(100, 200), 300, P(400, 500, 600))},
+    {"degree": PGroupPlus(0, 2), "sus": P(1, 2)},
+    {"degree": PGroupMod([0, 3]), "amp": P(1, 0.5)},
+    {"degree": 2, "amp": P(P(1, 0.5))},
+]
+
+
+@pytest.fixture
+def player():
+    clock, server, play = make_session()
+    player = play("p1")
+    player._get_event()
+    yield player
+    clock.stop()
+
+
+def sent_packets(player, send, shape, kwargs):
+    packets = []
+
+    def record(packet, timestamp, verbose=True, **kw):
+        packets.append(({key: value for key, value in packet.items()}, timestamp, verbose, kw))
+
+    player.__dict__["_push_osc_to_server"] = record
+    event = dict(player.event, **shape)
+    player.event = event
+    for i in range(player._get_event_length(**kwargs)):
+        send(player, event, i, 1.5, True, **kwargs)
+    del player.__dict__["_push_osc_to_server"]
+    return packets
+
+
+@pytest.mark.parametrize("shape", SHAPES, ids=str)
+@pytest.mark.parametrize("kwargs", [{}, {"amp": 0.5}, {"pan": P(-1, 1)}], ids=str)
+def test_expansion_matches_recursion(player, shape, kwargs):
+    expected = sent_packets(player, recursive_send_osc_message, shape, kwargs)
+    result = sent_packets(player, Player._send_osc_message, shape, kwargs)
+    assert len(result) == len(expected)
+    for (packet, *rest), (old_packet, *old_rest) in zip(result, expected):
+        assert list(packet.items()) == list(old_packet.items())
+        assert rest == old_rest
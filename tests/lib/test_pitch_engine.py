@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Tests for the memoized pitch tables behind get_freq_and_midi."""
+
+import threading
+
+import pytest
+
+from renardo.lib.Patterns import P, PGroup
+from renardo.lib.Root import Note
+from renardo.lib.Scale import (
+    Scale, ScalePattern, Tuning, PitchEngine,
+    get_freq_and_midi, get_freqs_and_midis, _get_freq_and_midi,
+)
+
+from .test_offline_render import make_session
+
+SCALES = [
+    Scale.major,
+    Scale.minor,
+    Scale.chromatic,
+    Scale.major.pentatonic,
+    ScalePattern([0, 2, 4, 5, 7, 9, 11], name="just", tuning=Tuning.just),
+    ScalePattern([0, 1, 3, 4, 6, 7, 9], name="bp", tuning=Tuning.bohlen_pierce),
+    [0, 3, 7],
+    P[0, 2, 5, 7, 10],
+    Scale.default,
+]
+
+DEGREES = [0, 1, 4, 7, -1, -8, 30, 47, 48, 200, -49, 0.5, 2.25, -1.5, 3.0]
+OCTAVES = [5, 3, 0, -1, 10, 11, 5.5]
+ROOTS = [0, 2, 1.5, -3]
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = PitchEngine()
+    monkeypatch.setattr("renardo.lib.Scale.pitch_engine", engine)
+    return engine
+
+
+@pytest.mark.parametrize("scale", SCALES, ids=repr)
+def test_same_results_as_calculating(engine, scale):
+    for root in ROOTS:
+        for octave in OCTAVES:
+            for degree in DEGREES:
+                assert get_freq_and_midi(degree, octave, root, scale) == _get_freq_and_midi(degree, octave, root, scale)
+    # Second time round, everything comes from the tables or the LRU cache
+    misses = engine.misses
+    for degree in DEGREES:
+        get_freq_and_midi(degree, 5, 0, scale)
+    assert engine.misses == misses
+
+
+def test_uncached_scales(engine):
+    assert get_freq_and_midi(440, 5, 0, Scale.freq) == (440, 69.0)
+    assert get_freq_and_midi("x", 5, 0, Scale.major, midi_map={"x": 2, "default": 0}) == \
+        _get_freq_and_midi(2, 5, 0, Scale.major)
+    assert not engine.tables or all(key[0][0] is not type(Scale.freq) for key in engine.tables)
+
+
+def test_values_not_identities_are_cached(engine):
+    root = Note(0)
+    major = get_freq_and_midi(2, 5, root, Scale.default)
+    Scale.default.set("minor")
+    try:
+        root.set(2)
+        assert get_freq_and_midi(2, 5, root, Scale.default) == _get_freq_and_midi(2, 5, 2, Scale.minor)
+        assert get_freq_and_midi(2, 5, root, Scale.default) != major
+    finally:
+        Scale.default.set("major")
+
+    scale = ScalePattern([0, 2, 4], name="mutable")
+    before = get_freq_and_midi(1, 5, 0, scale)
+    scale.data[1] = 3
+    assert get_freq_and_midi(1, 5, 0, scale) == (before[0] * 2 ** (1 / 12), before[1] + 1)
+
+
+def test_caches_are_bounded(engine):
+    engine.max_tables = 3
+    engine.lru_size = 10
+    for root in range(6):
+        get_freq_and_midi(0, 5, root, Scale.major)
+    for i in range(30):
+        get_freq_and_midi(i + 0.5, 5, 0, Scale.major)
+    assert len(engine.tables) == 3 and len(engine.lru) == 10
+
+
+def test_tables_are_filled_as_played(engine):
+    get_freq_and_midi(2, 5, 7, Scale.major)
+    table, = engine.tables.values()
+    assert list(table) == [(2.0, 5.0)] and engine.misses == 1
+    get_freq_and_midi(2, 5, 7, Scale.major)
+    assert engine.misses == 1
+
+
+def test_caches_used_from_threads(engine):
+    engine.max_tables = 2
+    engine.lru_size = 4
+    errors = []
+
+    def run(offset):
+        try:
+            for i in range(2000):
+                root = (i + offset) % 5
+                assert get_freq_and_midi(i % 7, 5, root, Scale.major) == _get_freq_and_midi(i % 7, 5, root, Scale.major)
+                get_freq_and_midi(i % 11 + 0.5, 5, root, Scale.minor)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(engine.tables) <= 2 and len(engine.lru) <= 4
+    assert engine.hits + engine.misses == 8 * 2000 * 2
+
+
+def test_batch_conversion(engine):
+    chord = P(0, P(2, 4), 6.5)
+    freqs, midinotes = get_freqs_and_midis(chord, 4, 2, Scale.minor)
+    assert type(freqs) is type(chord) and isinstance(freqs[1], PGroup)
+    for i, degree in enumerate([0, 2, 4, 6.5]):
+        group = 1 if i in (1, 2) else (0 if i == 0 else 2)
+        freq = freqs[group][i - 1] if group == 1 else freqs[group]
+        midinote = midinotes[group][i - 1] if group == 1 else midinotes[group]
+        assert (freq, midinote) == _get_freq_and_midi(degree, 4, 2, Scale.minor)
+
+    freqs, midinotes = get_freqs_and_midis([0, 1, 2], 5, 0, Scale.major)
+    assert midinotes == [60.0, 62.0, 64.0] and len(freqs) == 3
+
+
+def test_player_chords_use_batch_pitches():
+    clock, server, play = make_session()
+    try:
+        player = play("p1", oct=4, root=2)
+        player.scale = Scale.dorian
+        headers = []
+        new_message_header = player._new_message_header
+
+        def record(event, **kwargs):
+            headers.append(dict(new_message_header(event, **kwargs)))
+            return headers[-1]
+
+        player.__dict__["_new_message_header"] = record
+        player.event_n = 0
+        player._get_event()
+        player.event["degree"] = P(0, P(2, 9), 4.5)
+        pitches = player._get_chord_pitches()
+        assert set(pitches[3]) == {0, 2, 9, 4.5}
+        player._send_osc_messages_to_server(timestamp=clock.get_time() + 1)
+        assert player.chord_pitches is None
+        assert [header["degree"] for header in headers] == [0, 2, 9, 4.5]
+        for header in headers:
+            assert (header["freq"], header["midinote"]) == _get_freq_and_midi(header["degree"], 4, 2, Scale.dorian)
+    finally:
+        clock.stop()
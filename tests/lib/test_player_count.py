@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Property tests: Player.count with duration prefix sums against the linear walk."""
+
+import math
+import random
+
+import pytest
+
+from renardo.lib.Patterns import PRand
+from renardo.lib.Player.rest import rest
+from renardo.lib.Utils import get_first_item, modulo_index
+
+from .test_offline_render import make_session
+
+
+def linear_count(player, now, event_after=False):
+    """ The implementation walking one duration at a time, kept as the reference """
+    n = 0
+    acc = 0
+    dur = 0
+    durations = list(map(get_first_item, player.current_dur))
+    total_dur = float(sum(durations))
+    acc = now - (now % total_dur)
+    n = int(len(durations) * (acc / total_dur))
+    if acc != now:
+        while True:
+            dur = float(modulo_index(durations, n))
+            if acc + dur == now:
+                acc += dur
+                n += 1
+                break
+            elif acc + dur > now:
+                if event_after:
+                    acc += dur
+                    n += 1
+                break
+            else:
+                acc += dur
+                n += 1
+    return n, acc
+
+
+@pytest.fixture
+def player():
+    clock, server, play = make_session()
+    yield play("p1")
+    clock.stop()
+
+
+def set_dur(player, durations):
+    player.dur = durations
+    player.dur_updated()
+    return player
+
+
+def times(rng, durations):
+    """ Clock times to count at: on and around event boundaries, and random """
+    result = [0, 0.0]
+    acc = 0
+    for dur in durations * 3:
+        acc += float(get_first_item(dur))
+        result += [acc, acc - 1/16, acc + 1/32]
+    result += [rng.randrange(0, 64 * 16) / 16 for _ in range(20)]
+    result += [rng.uniform(0, 1000) for _ in range(20)]
+    return [t for t in result if t >= 0]
+
+
+DYADIC = [1/8, 1/4, 1/2, 3/4, 1, 1.5, 2, 4, rest(1/2), rest(1)]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_count_matches_linear_walk(player, seed):
+    # Sums of these durations are exact floats, so the results must be identical
+    rng = random.Random(seed)
+    durations = [rng.choice(DYADIC) for _ in range(rng.randint(1, 9))]
+    set_dur(player, durations)
+    for now in times(rng, durations):
+        for event_after in (False, True):
+            assert player.count(now, event_after) == linear_count(player, now, event_after), (durations, now)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_count_with_inexact_durations(player, seed):
+    rng = random.Random(seed)
+    durations = [rng.choice([1/3, 2/3, 0.1, 0.7, 1/6, 1]) for _ in range(rng.randint(1, 9))]
+    set_dur(player, durations)
+    for now in [rng.uniform(0, 1000) for _ in range(50)]:
+        for event_after in (False, True):
+            n, acc = player.count(now, event_after)
+            old_n, old_acc = linear_count(player, now, event_after)
+            assert n == old_n and math.isclose(acc, old_acc, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def test_count_prefix_sums_cached(player):
+    set_dur(player, [1/2, 1/4])
+    player.count(10)
+    offsets = player.dur_offsets
+    player.count(11.3)
+    assert player.dur_offsets is offsets and offsets[2:] == ([0.0, 0.5, 0.75, 1.25, 1.5], 0.75)
+    set_dur(player, [1])
+    player.count(12)
+    assert player.dur_offsets is not offsets
+
+
+def test_dur_updated_version(player):
+    calls = []
+    rhythm = player.rhythm
+    player.__dict__["rhythm"] = lambda: calls.append(1) or rhythm()
+
+    player.dur = [1, 1/2]
+    assert player.dur_updated() is True
+    assert player.dur_updated() is False
+    # Plain durations aren't evaluated again until `dur` is set
+    assert len(calls) == 1
+
+    player.dur = [1, 1/2]
+    assert player.dur_updated() is False
+    player.dur = [1/2]
+    assert player.dur_updated() is True and player.current_dur == [1/2]
+
+    # Generated durations are evaluated for every event
+    player.dur = [1, PRand([1, 2])]
+    player.dur_updated()
+    del calls[:]
+    for _ in range(5):
+        player.dur_updated()
+    assert len(calls) == 5
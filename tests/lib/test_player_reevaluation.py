@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Tests for re-evaluating a playing Player with the same or slightly different arguments."""
+
+import random
+
+import pytest
+
+from renardo.lib.InstrumentProxy import InstrumentProxy
+from renardo.lib.Patterns import P, PGroup
+from renardo.lib.Player import Player
+from renardo.lib.Player.event_plan import structure_key
+from renardo.lib.ring import Ring
+from renardo.lib.TimeVar import var
+
+from .test_offline_render import make_session
+
+
+@pytest.fixture
+def session():
+    clock, server, play = make_session()
+    yield clock, server, play
+    clock.stop()
+
+
+def pluck(degree, **kwargs):
+    return InstrumentProxy("pluck", degree, kwargs)
+
+
+def test_structure_keys(session):
+    assert structure_key(P[0, 1, P(2, 4)]) == structure_key(P[0, 1, (2, 4)])
+    assert structure_key(P[0, 1]) != structure_key(P[0, 1.0])
+    assert structure_key(P[0, 1]) != structure_key(PGroup(0, 1))
+    assert structure_key(P*(0, 1)) == structure_key(P*(0, 1)) != structure_key(P+(0, 1))
+    assert structure_key([0.5, "x"]) == structure_key([0.5, "x"]) != structure_key((0.5, "x"))
+    tv = var([0, 1])
+    assert structure_key(tv) == structure_key(tv) != structure_key(var([0, 1]))
+    assert structure_key(Ring([0, 1])) is None
+    assert structure_key(P[0, Ring([0, 1])]) is None
+
+
+def test_same_line_skips_everything(session):
+    clock, server, play = session
+    player = Player("p1")
+    line = lambda: pluck([0, 2, 4], dur=[1, 0.5, 0.5], amp=P[1, 0.5], lpf=var([500, 1000]), pan=(-1, 1))
+    player >> line()
+    patterns = dict(player.attr)
+    player >> line()
+    # degree, root, dur, sus, amp, pan ("scale" and the new var aren't Player attributes)
+    assert player.skipped_attributes == 6
+    assert player.attr["lpf"] is not patterns["lpf"]
+    assert all(player.attr[key] is patterns[key] for key in patterns if key != "lpf")
+
+
+def test_changed_attributes_are_set(session):
+    clock, server, play = session
+    player = Player("p1")
+    player >> pluck([0, 2, 4], dur=[1, 0.5], amp=1)
+    dur = player.attr["dur"]
+    player >> pluck([0, 2, 4], dur=[1, 0.5], amp=0.5)
+    assert player.attr["amp"] == P[0.5] and player.attr["dur"] is dur
+    assert player.skipped_attributes == 4
+    # Changed directly since the last >>
+    player.dur = 2
+    player >> pluck([0, 2, 4], dur=[1, 0.5], amp=0.5)
+    assert player.attr["dur"] == P[1, 0.5] and player.attr["sus"] == P[1, 0.5]
+    # Modified with +, then without
+    player >> pluck([0, 2, 4], dur=[1, 0.5], amp=0.5) + 2
+    assert player.attr["degree"] == P[2, 4, 6]
+    player >> pluck([0, 2, 4], dur=[1, 0.5], amp=0.5)
+    assert player.attr["degree"] == P[0, 2, 4]
+
+
+def test_uncomparable_values_are_set(session):
+    clock, server, play = session
+    player = Player("p1")
+    other = play("p2")
+    player >> pluck([0, 2], amp=Ring([1, 0.5]), pan=other.pan)
+    player >> pluck([0, 2], amp=Ring([1, 0.5]), pan=other.pan)
+    assert player.attr["amp"] == P[0.5]
+    # A stopped Player starts again from reset attributes
+    player.stop()
+    player >> pluck([0, 2], amp=0.5)
+    assert player.skipped_attributes == 0
+
+
+def test_same_events_as_setting_everything(session):
+    clock, server, play = session
+    rng = random.Random(17)
+    values = {
+        "dur": [1, [1, 0.5], P*(0.5, 1), 0.25],
+        "amp": [1, 0.5, [1, 0, 0.5]],
+        "lpf": [0, 500, [500, 2000]],
+        "sus": [None, 2],
+        "degree": [[0, 2, 4], [0, (2, 4)], 3],
+    }
+    fast, slow = Player("p1"), Player("p2")
+    # Sets every attribute, like before re-evaluations were compared
+    slow.__dict__["update_attr"] = lambda name, value, compare=True: Player.update_attr(slow, name, value, False)
+    for _ in range(40):
+        chosen = {key: rng.choice(options) for key, options in values.items()}
+        degree = chosen.pop("degree")
+        kwargs = {key: value for key, value in chosen.items() if value is not None}
+        fast >> pluck(degree, **kwargs)
+        slow >> pluck(degree, **kwargs)
+        for key in values:
+            assert structure_key(fast.attr[key]) == structure_key(slow.attr[key]), key
+        assert structure_key(fast.modifier) == structure_key(slow.modifier)
+        fast.event_n = slow.event_n = rng.randrange(8)
+        assert fast._get_event().event == slow._get_event().event
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Tests for the opt-in per-player profiling counters."""
+
+import json
+
+import pytest
+
+from renardo.lib.Player.profiler import PlayerStats
+from renardo.lib.TempoClock.scheduling_queue import QueueBlock
+
+from .test_offline_render import make_session
+
+
+@pytest.fixture
+def session():
+    clock, server, play = make_session()
+    yield clock, server, play
+    clock.stop()
+
+
+def play_notes(clock, player, notes, timestamp=None):
+    player.set_queue_block(QueueBlock(clock.scheduling_queue, lambda: None, 0))
+    timestamp = timestamp if timestamp is not None else clock.get_time() + 1
+    for n in range(notes):
+        player.event_n = n
+        player._get_event()
+        player._send_osc_messages_to_server(timestamp=timestamp)
+    return player.queue_block.osc_messages
+
+
+def test_disabled_by_default(session):
+    clock, server, play = session
+    player = play("p1")
+    assert player.profiler is None and player.stats() is None
+    play_notes(clock, player, 4)
+    assert player.profiler is None
+
+
+def test_counts_notes_and_bytes(session):
+    clock, server, play = session
+    player = play("p1", lpf=800).enable_stats()
+    bundles = play_notes(clock, player, 6)
+    stats = player.stats()
+    assert stats["notes"] == 6 and stats["messages"] == 6 and stats["osc_messages"] == len(bundles) == 6
+    assert stats["osc_bytes"] == sum(len(bundle.getBinary()) for bundle in bundles)
+    assert set(stats["cpu"]) == set(stats["wall"]) == {"event", "messages", "submit"}
+    assert all(value > 0 for value in stats["wall"].values())
+    assert stats["notes_per_sec"] > 0 and stats["osc_bytes_per_sec"] > 0
+    # Recording doesn't change the bundles
+    player.enable_stats(False)
+    server.node = server.bus = 0
+    expected = [bundle.getBinary() for bundle in play_notes(clock, player, 6, timestamp=100)]
+    server.node = server.bus = 0
+    assert [bundle.getBinary() for bundle in play_notes(clock, player.enable_stats(), 6, timestamp=100)] == expected
+
+    player.reset_stats()
+    assert player.stats()["notes"] == 0 and player.stats()["cpu_total"] == 0
+
+
+def test_summary_rates():
+    stats = PlayerStats()
+    stats.notes, stats.osc_bytes = 8, 1000
+    stats.cpu["event"], stats.cpu["submit"] = 0.25, 0.25
+    summary = stats.summary(elapsed=2.0)
+    assert summary["notes_per_sec"] == 4 and summary["osc_bytes_per_sec"] == 500
+    assert summary["cpu_per_note"] == 1 / 16 and summary["load"] == 0.25
+    assert stats.summary(elapsed=0)["notes_per_sec"] == 0
+
+
+def test_clock_top_and_snapshot(session, capsys, tmp_path):
+    clock, server, play = session
+    busy, quiet = play("p1", dur=1/4), play("p2")
+    clock.top()
+    assert "enable_player_stats" in capsys.readouterr().out
+
+    clock.enable_player_stats()
+    play_notes(clock, busy, 20)
+    play_notes(clock, quiet, 1)
+    clock.top(n=5)
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split()[0] == "PLAYER" and [line.split()[0] for line in lines[1:]] == ["p1", "p2"]
+    clock.top(n=1, sort="notes")
+    assert len(capsys.readouterr().out.splitlines()) == 2
+
+    snapshot = json.loads(clock.stats_json(path=tmp_path / "stats.json"))
+    assert (tmp_path / "stats.json").read_text() == json.dumps(snapshot, indent=2)
+    assert snapshot["players"]["p1"]["notes"] == 20 and snapshot["players"]["p2"]["notes"] == 1
+
+    clock.enable_player_stats(False)
+    assert busy.stats() is None and clock.player_stats() == {}
+
+
+def test_players_started_after_enabling(session):
+    from renardo.lib.TimeVar import linvar
+
+    clock, server, play = session
+    clock.enable_player_stats()
+    player = play("p3")
+    play_notes(clock, player, 2)
+    assert player.stats()["notes"] == 2
+    object.__setattr__(clock, "bpm", linvar([120, 140], 8))  # as after a tempo change
+    assert json.loads(clock.stats_json())["bpm"] == pytest.approx(clock.get_bpm(), abs=1)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Tests for the heap based SchedulingQueue."""
+
+import functools
+import gc
+import random
+import sys
+import threading
+
+from renardo.lib.Player import Player
+from renardo.lib.TempoClock import SchedulingQueue, QueueBlock
+from renardo.lib.TempoClock.scheduling_queue import CallableSignatureCache
+
+
+def event(*args, **kwargs):
+    return None
+
+
+def other_event():
+    return None
+
+
+def test_empty_queue(stub_clock):
+    queue = SchedulingQueue(stub_clock)
+    assert len(queue) == 0
+    assert queue.next() == sys.maxsize
+    assert queue.pop() == []
+    assert queue.before_next_event(0)
+    assert not queue.after_next_event(1000)
+    assert str(queue) == "[]"
+
+
+def test_pop_returns_blocks_in_beat_order(stub_clock):
+    queue = SchedulingQueue(stub_clock)
+    beats = [random.Random(1).randrange(64) / 4 for _ in range(200)]
+    for beat in beats:
+        queue.add(event, beat)
+    assert len(queue) == len(set(beats))
+    popped = []
+    while len(queue):
+        block = queue.pop()
+        assert isinstance(block, QueueBlock)
+        popped.append(block.beat)
+    assert popped == sorted(set(beats))
+
+
+def test_same_beat_is_coalesced(stub_clock):
+    queue = SchedulingQueue(stub_clock)
+    queue.add(event, 4)
+    queue.add(other_event, 4.0)
+    queue.add(event, 2)
+    assert len(queue) == 2
+    assert queue.next() == 2
+    queue.pop()
+    block = queue.pop()
+    assert block.objects() == [event, other_event]
+
+
+def test_next_and_after_next_event(stub_clock):
+    queue = SchedulingQueue(stub_clock)
+    queue.add(event, 8)
+    queue.add(event, 3)
+    assert queue.next() == 3
+    assert queue.before_next_event(2.5)
+    assert not queue.after_next_event(2.99)
+    assert queue.after_next_event(3)
+
+
+def test_iteration_keeps_legacy_order(stub_clock):
+    queue = SchedulingQueue(stub_clock)
+    for beat in (1, 5, 3):
+        queue.add(event, beat)
+    # The legacy list stored the next block last
+    assert [block.beat for block in queue] == [5, 3, 1]
+    assert [block.beat for block in queue.data] == [5, 3, 1]
+
+
+def test_sorted_view_is_rebuilt_after_changes(stub_clock):
+    queue = SchedulingQueue(stub_clock)
+    for beat in (1, 5, 3):
+        queue.add(event, beat)
+    view = queue._sorted_blocks()
+    assert queue._sorted_blocks() is view
+    queue.add(other_event, 5)  # added to an existing block
+    assert queue._sorted_blocks() is view
+    queue.add(event, 4)
+    assert [block.beat for block in queue] == [5, 4, 3, 1]
+    queue.pop()
+    assert [block.beat for block in queue] == [5, 4, 3]
+    # The data is a copy
+    queue.data.clear()
+    assert len(list(queue)) == 3
+
+
+def test_clear(stub_clock):
+    queue = SchedulingQueue(stub_clock)
+    for beat in range(10):
+        queue.add(event, beat)
+    queue.clear()
+    assert len(queue) == 0
+    queue.add(event, 1)
+    assert queue.pop().beat == 1
+
+
+def test_kwargs_are_filtered_for_callable(stub_clock):
+    queue = SchedulingQueue(stub_clock)
+    kwargs = {"verbose": True}
+    queue.add(other_event, 1, kwargs=kwargs)
+    assert queue.pop().all_items()[0].kwargs == {}
+
+
+def test_signature_cache_shares_entries_between_lambdas():
+    cache = CallableSignatureCache()
+    for i in range(10):
+        func = lambda a, b=1: None
+        assert cache.get(func) == (frozenset(("a", "b")), False)
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 9
+    assert stats["hit_rate"] == 0.9
+
+
+def test_signature_cache_fast_path_for_players():
+    cache = CallableSignatureCache()
+    player = Player.__new__(Player)
+    assert cache.get(player) == (frozenset(), True)
+    assert cache.stats()["fast_path"] == 1
+    assert len(cache) == 0
+
+
+def test_signature_cache_does_not_keep_types_alive():
+    cache = CallableSignatureCache()
+
+    class Callable:
+        def __call__(self, x, **kwargs):
+            pass
+
+    assert cache.get(Callable()) == (frozenset(("self", "x")), True)
+    assert len(cache) == 1
+    del Callable
+    gc.collect()
+    assert len(cache) == 0
+
+
+def test_signature_cache_skips_partials():
+    cache = CallableSignatureCache()
+    func = functools.partial(lambda a, b: None, 1)
+    assert cache.get(func) == (frozenset(("b",)), False)
+    assert cache.stats()["uncached"] == 1
+    assert len(cache) == 0
+
+
+def test_signature_cache_per_queue_and_thread_safe(stub_clock):
+    queue, other = SchedulingQueue(stub_clock), SchedulingQueue(stub_clock)
+    assert queue.signature_cache is not other.signature_cache
+    barrier = threading.Barrier(8)
+
+    def run():
+        barrier.wait()
+        for beat in range(2000):
+            queue.add(lambda a=1: None, beat % 16, kwargs={"a": 2, "b": 3})
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = queue.signature_cache.stats()
+    assert stats["hits"] + stats["misses"] == 16000 and stats["misses"] <= 8
+    assert other.signature_cache.stats()["hits"] == 0
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Tests for the read-only settings snapshot and its change notifications."""
+
+import pytest
+
+from renardo.settings_manager import SettingsManager, SettingsSnapshot
+
+
+@pytest.fixture
+def manager(tmp_path):
+    (tmp_path / "settings.toml").write_text('[core]\nPUBLIC = "file"\n')
+    return SettingsManager(
+        tmp_path / "settings.toml",
+        tmp_path / "internal_settings.toml",
+        {"core": {"PUBLIC": "default", "BOTH": "public"}, "sc_backend": {"OSC_MIDI_ADDRESS": "/foxdot_midi"}},
+        {"core": {"BOTH": "internal", "INTERNAL": 1}, "samples": {"DIR": "x"}},
+    )
+
+
+def test_snapshot_matches_get(manager):
+    snapshot = manager.snapshot
+    for key in ("core.PUBLIC", "core.BOTH", "core.INTERNAL", "samples.DIR", "sc_backend.OSC_MIDI_ADDRESS"):
+        assert snapshot.get(key) == manager.get(key)
+    assert snapshot.core.PUBLIC == "file"
+    assert snapshot.sc_backend.OSC_MIDI_ADDRESS == "/foxdot_midi"
+    assert snapshot.sc_backend.get("OSC_MIDI_ADDRESS") == "/foxdot_midi"
+    assert snapshot.get("core.MISSING", 3) == 3
+    assert isinstance(snapshot.core, SettingsSnapshot)
+    with pytest.raises(AttributeError):
+        snapshot.core.MISSING
+
+
+def test_snapshot_is_read_only(manager):
+    snapshot = manager.snapshot
+    with pytest.raises(AttributeError):
+        snapshot.core = {}
+    with pytest.raises(AttributeError):
+        snapshot.core.PUBLIC = "changed"
+    # Changing the settings doesn't change an existing snapshot
+    manager.set("core.PUBLIC", "changed")
+    assert snapshot.core.PUBLIC == "file"
+    assert manager.snapshot.core.PUBLIC == "changed"
+
+
+def test_snapshot_versions(manager):
+    snapshot = manager.snapshot
+    assert manager.snapshot is snapshot and snapshot.version == manager.version
+    manager.set("core.NEW", True)
+    assert manager.snapshot is not snapshot and manager.snapshot.version > snapshot.version
+    for change in (
+        lambda: manager.set_from_dict({"core": {"A": 1}}),
+        lambda: manager.set_defaults_from_dict({"core": {"B": 2}}),
+        lambda: manager.reset("core.PUBLIC"),
+        lambda: manager.reset(),
+    ):
+        version = manager.version
+        change()
+        assert manager.version > version and manager.snapshot.version == manager.version
+
+
+def test_subscribers(manager, tmp_path):
+    calls = []
+    callback = manager.subscribe(calls.append)
+    manager.set("core.PUBLIC", "set")
+    assert calls[-1].core.PUBLIC == "set"
+
+    (tmp_path / "settings.toml").write_text('[core]\nPUBLIC = "reloaded"\n')
+    manager.load_from_file()
+    assert calls[-1].core.PUBLIC == "reloaded" and calls[-1] is manager.snapshot
+
+    # A failing subscriber doesn't stop the others
+    manager.subscribe(lambda snapshot: 1 / 0)
+    manager.subscribe(calls.append)
+    manager.set("core.PUBLIC", "again")
+    assert [snapshot.core.PUBLIC for snapshot in calls[-2:]] == ["again", "again"]
+
+    manager.unsubscribe(callback)
+    count = len(calls)
+    manager.set("core.PUBLIC", "last")
+    assert len(calls) == count + 1
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Tests for the TempoClock timing telemetry."""
+
+import gc
+import random
+import weakref
+
+import pytest
+
+from renardo.lib.TempoClock.scheduling_queue import QueueBlock
+from renardo.lib.TempoClock.telemetry import Histogram, ClockStats
+
+
+def test_histogram_percentiles_within_precision():
+    rng = random.Random(0)
+    values = [rng.uniform(0, 0.1) for _ in range(10000)]
+    histogram = Histogram(unit=1e-6)
+    histogram.record_many(values)
+    values.sort()
+    for p in (50, 90, 99):
+        exact = values[int(p / 100.0 * len(values)) - 1]
+        assert histogram.percentile(p) == pytest.approx(exact, rel=0.02)
+    assert histogram.count == len(values)
+    assert histogram.max == values[-1]
+    assert histogram.summary()["mean"] == pytest.approx(sum(values) / len(values))
+
+
+def test_histogram_small_values_are_exact_and_negative_clamped():
+    histogram = Histogram(unit=1)
+    for value in (-3, 0, 1, 2, 3):
+        histogram.record(value)
+    assert histogram.percentile(40) == 0
+    assert histogram.percentile(100) == 3
+
+
+def test_histogram_rolling_window():
+    histogram = Histogram(unit=1, window=10)
+    histogram.record_many([1000] * 100)
+    histogram.record_many([1] * 10)
+    assert histogram.rolling_percentile(99) == 1
+    assert histogram.percentile(50) == pytest.approx(1000, rel=0.02)
+
+
+def test_clock_stats_groups_items():
+    stats = ClockStats()
+
+    def make():
+        return lambda: None
+
+    a, b = make(), make()  # same code object
+    stats.record_block(0.01, 0.002, 3, [(a, 0.001), (b, 0.003)])
+    stats.record_block(0.02, 0.001, 1, [(stats.reset, 0.0005)])
+    summary = stats.summary()
+    assert summary["blocks"] == 2 and summary["osc_messages"] == 4
+    name = a.__code__.co_qualname if hasattr(a.__code__, "co_qualname") else "<lambda>"
+    assert summary["items"][name]["calls"] == 2
+    assert summary["items"][name]["total"] == pytest.approx(0.004)
+    assert list(summary["items"])[0] == name  # slowest first
+    assert summary["item_cost"]["count"] == 3
+    stats.reset()
+    assert stats.summary()["blocks"] == 0
+
+
+def test_clock_stats_dont_keep_items_alive():
+    class Item:
+        def __init__(self, name):
+            self.id = name
+
+        def __call__(self):
+            pass
+
+    stats = ClockStats()
+    item = Item("p1")
+    stats.record_block(0.01, 0.002, 1, [(item, 0.001)])
+    stats.record_block(0.01, 0.002, 1, [(Item("p1"), 0.001)])
+    assert stats.summary()["items"]["Item(p1)"]["calls"] == 2
+    ref = weakref.ref(item)
+    del item
+    gc.collect()
+    assert ref() is None
+
+
+def test_clock_stats_disabled_by_default(clock):
+    assert clock.telemetry is None
+    assert clock.stats() is None
+
+
+def test_clock_records_blocks(clock, monkeypatch):
+    monkeypatch.setattr(clock.server, "sendOSC", lambda msg: None)
+    clock.enable_stats()
+    run_block = clock._TempoClock__run_block
+    for n in range(4):
+        block = QueueBlock(clock.scheduling_queue, lambda: None, n)
+        block.add(lambda: None)
+        run_block(block, n + 0.25)
+    stats = clock.stats()
+    assert stats["blocks"] == 4
+    assert stats["item_cost"]["count"] == 8
+    assert stats["lateness_beats"]["max"] == pytest.approx(0.25)
+    assert stats["block_duration"]["count"] == 4
+    clock.reset_stats()
+    assert clock.stats()["blocks"] == 0
+    clock.enable_stats(False)
+    assert clock.stats() is None
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Tests for the TempoClock time sources and Clock.step()."""
+
+import time
+
+import pytest
+
+from renardo.lib.TempoClock.time_source import (
+    RealTimeSource, SimulatedTimeSource, ScaledTimeSource, get_time_source
+)
+
+
+def test_real_time_source_is_anchored_to_wall_clock():
+    source = RealTimeSource()
+    assert source.time() == pytest.approx(time.time(), abs=0.01)
+    first = source.time()
+    assert source.time() >= first
+
+
+def test_simulated_time_source():
+    source = SimulatedTimeSource(start=10)
+    assert source.time() == 10
+    assert source.advance(0.5) == 10.5
+    source.sleep(1)
+    assert source.time() == 11.5
+    source.set(20)
+    assert source.time() == 20
+    assert source.real_seconds(5) == 0
+    with pytest.raises(ValueError):
+        source.set(19)
+    with pytest.raises(ValueError):
+        source.advance(-1)
+
+
+def test_scaled_time_source():
+    base = SimulatedTimeSource(start=100)
+    source = ScaledTimeSource(rate=2, source=base)
+    assert source.time() == 100
+    base.advance(1)
+    assert source.time() == 102
+    source.set_rate(0.5)
+    assert source.time() == 102  # no jump when the rate changes
+    base.advance(2)
+    assert source.time() == 103
+    source.sleep(1)
+    assert base.time() == 105
+    with pytest.raises(ValueError):
+        source.set_rate(0)
+
+
+def test_get_time_source():
+    assert isinstance(get_time_source("simulated", start=1), SimulatedTimeSource)
+    with pytest.raises(ValueError):
+        get_time_source("sundial")
+
+
+def test_step_runs_blocks_at_exact_times(clock):
+    clock.set_time_source(SimulatedTimeSource())
+    start = clock.get_time()
+    calls = []
+    for beat in (1, 1.5, 3):
+        clock.schedule(lambda: calls.append((clock.now(), clock.get_time())), beat)
+    assert clock.step(2) == 2
+    assert clock.now() == pytest.approx(2)
+    assert calls == [(1, pytest.approx(start + 0.25)), (1.5, pytest.approx(start + 0.375))]
+    assert clock.step(2) == 1
+    assert calls[-1] == (3, pytest.approx(start + 0.75))
+    assert clock.get_time() == pytest.approx(start + 1.0)
+
+
+def test_step_needs_simulated_time(clock):
+    with pytest.raises(TypeError):
+        clock.step(1)
+
+
+def test_step_player_timetags_and_cpu_per_beat():
+    from .test_offline_render import make_session
+
+    clock, server, play = make_session()
+    clock.set_time_source(SimulatedTimeSource(start=1000))
+    clock.set_time(0)
+    sent = []
+    server.sendOSC = sent.append
+    play("p1", dur=1/2)
+    started = time.process_time()
+    clock.step(8)
+    cpu_per_beat = (time.process_time() - started) / 8
+    assert cpu_per_beat >= 0
+    # Starts on the next bar: beats 4 to 8 (included) at 120 bpm
+    times = [bundle.timetag - clock.latency for bundle in sent]
+    assert times == pytest.approx([1000 + 2.0 + 0.25 * i for i in range(9)])
+    clock.stop()
+
+
+def test_timevar_seconds_use_clock_time_source(clock):
+    from renardo.lib.TimeVar import TimeVar
+
+    source = SimulatedTimeSource()
+    clock.set_time_source(source)
+    clock.set_time(0)
+    TimeVar.set_clock(clock)
+    var = TimeVar([0, 1], [1, 1], seconds=True)
+    source.advance(1.5)
+    assert var.get_current_time() == pytest.approx(1.5)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Tests for the weak clock registries and a Clock.future soak test."""
+
+import gc
+import os
+import time
+import tracemalloc
+
+import pytest
+
+from renardo.lib.TempoClock.weak_registry import WeakRegistry, ScheduledItems
+from renardo.lib.TempoClock.point_in_time_registry import PointInTimeRegistry
+from renardo.lib.TempoClock.clock import PointInTime
+
+# Events of the soak test, which only runs when set (e.g. RENARDO_SOAK_EVENTS=1000000)
+SOAK_EVENTS = int(os.environ.get("RENARDO_SOAK_EVENTS") or 0)
+
+
+class Item:
+    def __call__(self):
+        return None
+
+
+def drain(clock):
+    """ Runs every block in the clock's queue, as the scheduling thread would """
+    while len(clock.scheduling_queue):
+        block = clock.scheduling_queue.pop()
+        clock._TempoClock__run_block(block, block.beat)
+
+
+def test_weak_registry_identity_and_order():
+    a, b = Item(), Item()
+    registry = WeakRegistry([a, b, a])
+    assert list(registry) == [a, b]
+    assert a in registry and Item() not in registry
+    registry.remove(a)
+    assert list(registry) == [b]
+    with pytest.raises(ValueError):
+        registry.remove(a)
+
+
+def test_weak_registry_drops_collected_objects():
+    registry = WeakRegistry()
+    item = Item()
+    registry.add(item)
+    assert len(registry) == 1
+    del item
+    gc.collect()
+    assert len(registry) == 0
+
+
+def test_weak_registry_keeps_objects_without_weakref_support():
+    registry = WeakRegistry()
+    wrapper = object().__str__  # method-wrapper objects can't be weakly referenced
+    registry.add(wrapper)
+    assert wrapper in registry
+    registry.discard(wrapper)
+    assert len(registry) == 0
+
+
+def test_scheduled_items_released_after_last_call():
+    items = ScheduledItems()
+    item = Item()
+    items.add(item)
+    items.add(item)
+    assert items.pending(item) == 2
+    items.release(item)
+    assert item in items
+    items.release(item)
+    assert item not in items and items.pending(item) == 0
+
+
+def test_scheduled_items_keep():
+    playing = WeakRegistry()
+    items = ScheduledItems(keep=playing)
+    item = Item()
+    playing.add(item)
+    items.add(item)
+    items.release(item)
+    assert item in items
+
+
+def test_clock_forgets_one_shot_events(clock):
+    calls = []
+    clock.future(1, lambda: calls.append(1))
+    clock.future(2, lambda: calls.append(2))
+    assert len(clock.items) == 2
+    drain(clock)
+    assert calls == [1, 2]
+    assert len(clock.items) == 0
+
+
+def test_clock_keeps_rescheduled_events(clock):
+    def event():
+        if len(calls) < 3:
+            clock.future(1, event)
+        calls.append(1)
+    calls = []
+    clock.future(1, event)
+    while len(clock.scheduling_queue):
+        assert event in clock
+        drain(clock)
+    assert len(calls) == 4
+    assert event not in clock
+
+
+def test_clock_clear_and_players(clock):
+    class StubPlayer(Item):
+        def kill(self):
+            clock.playing.remove(self)
+    player = StubPlayer()
+    clock.playing.add(player)
+    clock.items.add(player)
+    assert clock.players() == [player]
+    assert clock.players(ex=[player]) == []
+    clock.playing.remove(player)
+    assert clock.players() == []
+    clock.playing.add(player)
+    clock.clear()
+    assert clock.players() == [] and len(clock.items) == 0
+
+
+def test_point_in_time_registry_drops_collected_sources():
+    registry = PointInTimeRegistry()
+    source, derived = PointInTime(), PointInTime()
+    registry.register_derived_point(source, derived, "add")
+    assert registry.get_derived_points(source) == [(derived, "add")]
+    assert registry.get_source_points(derived) == [source]
+    del source
+    gc.collect()
+    assert len(registry) == 0
+    assert registry.get_source_points(derived) == []
+
+
+def test_point_in_time_registry_remove_point():
+    registry = PointInTimeRegistry()
+    source, derived = PointInTime(), PointInTime()
+    registry.register_derived_point(source, derived)
+    registry.remove_point(derived)
+    assert registry.get_derived_points(source) == []
+    assert registry.notify_derived_points(source, 4) == 0
+    assert len(registry) == 0
+
+
+@pytest.mark.skipif(not SOAK_EVENTS, reason="set RENARDO_SOAK_EVENTS to run the soak test")
+def test_future_soak(clock):
+    """ Schedules SOAK_EVENTS one-shot lambdas: memory and scheduling time stay flat """
+    batch = 10000
+    batches = max(SOAK_EVENTS // batch, 4)
+    calls = [0]
+
+    def callback():
+        calls[0] += 1
+
+    timings, memory = [], []
+    tracemalloc.start()
+    try:
+        for n in range(batches):
+            start = time.perf_counter()
+            for i in range(batch):
+                clock.future((i % 64) / 4, lambda: callback())
+            timings.append(time.perf_counter() - start)
+            drain(clock)
+            assert len(clock.items) == 0
+            gc.collect()
+            memory.append(tracemalloc.get_traced_memory()[0])
+    finally:
+        tracemalloc.stop()
+
+    assert calls[0] == batches * batch
+    # Memory doesn't grow with the number of events scheduled so far
+    assert memory[-1] - memory[1] < 1024 * 1024
+    # Scheduling cost doesn't grow either (compare the medians of the first and last quarters)
+    quarter = max(len(timings) // 4, 1)
+    first = sorted(timings[1:quarter + 1])[quarter // 2]
+    last = sorted(timings[-quarter:])[quarter // 2]
+    assert last < first * 3